@@ -1,59 +1,145 @@
-from dotenv import load_dotenv
+import atexit
 import os
-from flask import Flask, app, jsonify, make_response, Response, request
-from werkzeug.exceptions import BadRequest, Unauthorized
-import requests
+import json
+from typing import Any, Optional
 
-from meal_max.utils.logger import configure_logger
+import click
+from dotenv import load_dotenv
 
-# from flask_cors import CORS
+# Module-level settings throughout the package are read from the environment at
+# import time, so .env has to be loaded before any of them are imported
+load_dotenv()
 
-"""test commeent  
-dsf
-dsf
+from flask import Blueprint, Flask, current_app, jsonify, make_response, Response, request, stream_with_context
+from werkzeug.exceptions import BadRequest, Unauthorized
+import requests
 
-dsf
-"""
+from meal_max.clients.mongo_client import pool_listener
+from meal_max.clients.tmdb_client import tmdb_get
 from meal_max.db import db
-from meal_max.models import kitchen_model #Used as template
-from meal_max.models.battle_model import BattleModel #Used as template
+from meal_max.models import kitchen_model
+from meal_max.models.battle_aggregator import battle_aggregator
+from meal_max.models.battle_jobs import battle_jobs
+from meal_max.models.battle_registry import BattleModelRegistry
+from meal_max.models.leaderboard import leaderboard
+from meal_max.models.meal_cache import meal_cache
 from meal_max.utils.sql_utils import check_database_connection, check_table_exists
-from meal_max.models.mongo_session_model import login_user, logout_user 
-
+from meal_max.models.mongo_session_model import login_user, logout_user
+from meal_max.models.session_store import CachedSessionStore, get_session_store
+from meal_max.models.simulation_model import SIMULATION_DEFAULT_RUNS, simulate_win_probabilities
+from meal_max.models.tournament_model import run_tournament
 from meal_max.models.user_model import Users
 from meal_max.models.watchlist_model import Watchlist
+from meal_max.utils.import_utils import detect_format, iter_records
+from meal_max.utils.logger import configure_logger, init_request_ids, log_stats
+from meal_max.utils.random_utils import get_random_source
+from meal_max.utils.rate_limit import login_ip_limiter, login_user_limiter
+from meal_max.utils.token_utils import issue_token, revoke_token, verify_token
 
-# Load environment variables from .env file
-load_dotenv()
-TMDB_API_KEY = os.getenv("TMDB_API_KEY")
-TMDB_READ_ACCESS_TOKEN = os.getenv("TMDB_READ_ACCESS_TOKEN")
 
-app = Flask(__name__)
-configure_logger(app.logger)
+# Every route and CLI command; create_app registers them on each new app.
+# cli_group=None keeps the commands at the top level, e.g. 'flask init-db'.
+bp = Blueprint('api', __name__, cli_group=None)
 
+# One BattleModel per logged-in user; evicted models are saved back to their session
+battle_registry = BattleModelRegistry(flush=logout_user)
+atexit.register(battle_registry.close)
 
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv("SQLALCHEMY_DATABASE_URI", "sqlite:///watchlist.db")
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
-db.init_app(app)
+def create_app(config: Optional[dict[str, Any]] = None) -> Flask:
+    """
+    Creates and configures the application.
+
+    Nothing here connects to a database or external service: SQLAlchemy
+    connects on the first query, MongoDB and TMDB clients are created on
+    first use, and caches fill as they are read. Tables are created by the
+    'init-db' command rather than on every start.
 
-with app.app_context():
-    db.init_app(app)  
+    Args:
+        config (dict, optional): Settings overriding those read from the environment, e.g. in tests
+
+    Returns:
+        Flask: The application
+    """
+    app = Flask(__name__)
+    app.config.from_mapping(
+        SQLALCHEMY_DATABASE_URI=os.getenv("SQLALCHEMY_DATABASE_URI", "sqlite:///watchlist.db"),
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        TMDB_READ_ACCESS_TOKEN=os.getenv("TMDB_READ_ACCESS_TOKEN"),
+        START_BATTLE_AGGREGATOR=kitchen_model.BATTLE_STATS_MODE == "async",
+    )
+    if config:
+        app.config.update(config)
+
+    configure_logger(app.logger)
+    init_request_ids(app)
+    db.init_app(app)
+    app.register_blueprint(bp)
+
+    # With BATTLE_STATS_MODE=async, battles are only logged and meal stats are folded in the background
+    if app.config['START_BATTLE_AGGREGATOR']:
+        battle_aggregator.start()
+
+    return app
+
+
+@bp.cli.command('init-db')
+def init_db_command():
+    """Create the user and watchlist tables and the meal indexes and battle log."""
     db.create_all()
+    if Users.ensure_kdf_params_column():
+        click.echo("Added the kdf_params column to the users table")
+    click.echo("Created the user and watchlist tables")
+    try:
+        check_table_exists("meals")
+    except Exception:
+        click.echo("No meals table yet; skipping the meal indexes and battle log", err=True)
+        return
+    kitchen_model.ensure_leaderboard_indexes()
+    kitchen_model.ensure_battle_results_table()
+    kitchen_model.ensure_meal_version_column()
+    click.echo("Created the meal indexes and battle log")
+
 
-#Ensures TMDB are loaded into the environment 
-TMDB_READ_ACCESS_TOKEN = os.getenv("TMDB_READ_ACCESS_TOKEN")
-BASE_URL = "https://api.themoviedb.org/3"
+def get_bearer_token():
+    """
+    Extracts the session token from an 'Authorization: Bearer <token>' header.
+
+    Returns:
+        The token string, or None if the header is absent.
+    """
+    auth_header = request.headers.get('Authorization', '')
+    if auth_header.startswith('Bearer '):
+        return auth_header[len('Bearer '):].strip()
+    return None
+
+def get_token_user_id():
+    """
+    Identifies the caller from their session token with a local HMAC check.
+
+    Returns:
+        The user ID embedded in the token, or None if no token was sent.
+    Raises:
+        401 error if the token is invalid, expired or revoked.
+    """
+    token = get_bearer_token()
+    if token is None:
+        return None
+    try:
+        return verify_token(token)
+    except ValueError as e:
+        current_app.logger.warning("Rejected session token: %s", str(e))
+        raise Unauthorized(str(e))
 
 ####################################################
 #
 # Root routes
 #
 ####################################################
-@app.route('/')
+@bp.route('/')
 def root():
     return jsonify({"message": "Welcome to Movie Max"}), 200
-@app.route('/api')
+@bp.route('/api')
 def api_root():
     return jsonify({"message": "Welcome to Movie Max API!"}), 200
 ####################################################
@@ -63,7 +149,7 @@ def api_root():
 ####################################################
 
 
-@app.route('/api/health', methods=['GET'])
+@bp.route('/api/health', methods=['GET'])
 def healthcheck() -> Response:
     """
     Health check route to verify the service is running.
@@ -71,10 +157,38 @@ def healthcheck() -> Response:
     Returns:
         JSON response indicating the health status of the service.
     """
-    app.logger.info('Health check')
+    current_app.logger.info('Health check')
     return make_response(jsonify({'status': 'healthy'}), 200)
 
-@app.route('/api/db-check', methods=['GET'])
+@bp.route('/api/metrics', methods=['GET'])
+def metrics() -> Response:
+    """
+    Route to report in-process counters for load-shedding components.
+
+    Returns:
+        JSON response with the login rate limiter counters, battle registry usage,
+        MongoDB connection pool checkouts, the session cache, meal cache and leaderboard hit rates,
+        random number buffer usage, the battle job queue, the battle log aggregator
+        and the log queue.
+    """
+    session_store = get_session_store()
+    return make_response(jsonify({
+        'login_rate_limit': {
+            'by_ip': login_ip_limiter.stats(),
+            'by_username': login_user_limiter.stats()
+        },
+        'battle_registry': battle_registry.stats(),
+        'mongo_pool': pool_listener.stats(),
+        'session_cache': session_store.stats() if isinstance(session_store, CachedSessionStore) else None,
+        'meal_cache': meal_cache.stats(),
+        'leaderboard': leaderboard.stats(),
+        'random_source': get_random_source().stats(),
+        'battle_jobs': battle_jobs.stats(),
+        'battle_aggregator': battle_aggregator.stats(),
+        'logging': log_stats()
+    }), 200)
+
+@bp.route('/api/db-check', methods=['GET'])
 def db_check() -> Response:
     """
     Route to check if the database connection and users table are functional.
@@ -85,18 +199,189 @@ def db_check() -> Response:
         404 error if there is an issue with the database.
     """
     try:
-        app.logger.info("Checking database connection...")
+        current_app.logger.info("Checking database connection...")
         check_database_connection()
-        app.logger.info("Database connection is OK.")
-        app.logger.info("Checking if meals table exists...")
+        current_app.logger.info("Database connection is OK.")
+        current_app.logger.info("Checking if meals table exists...")
         check_table_exists("meals")
-        app.logger.info("meals table exists.")
+        current_app.logger.info("meals table exists.")
         return make_response(jsonify({'database_status': 'healthy'}), 200)
     except Exception as e:
         return make_response(jsonify({'error': str(e)}), 404)
 
 
-@app.route('/api/create-user', methods=['POST'])
+####################################################
+#
+# Leaderboard
+#
+####################################################
+
+
+@bp.route('/api/leaderboard', methods=['GET'])
+def get_leaderboard() -> Response:
+    """
+    Route to get the meal leaderboard, a page at a time or streamed in full.
+
+    Query Parameters:
+        - sort (str): 'wins' or 'win_pct'. Defaults to 'wins'.
+        - cuisine (str, optional): Only include meals of this cuisine.
+        - difficulty (str, optional): Only include meals of this difficulty (LOW, MED, HIGH).
+        - limit (int, optional): The page size.
+        - cursor (str, optional): The next_cursor of the previous page.
+        - stream (bool, optional): If 'true', stream every matching meal as one JSON array instead of a page.
+
+    Returns:
+        JSON response with the page of meals and the next_cursor, or the streamed array of meals.
+    Raises:
+        400 error if a parameter is invalid.
+        500 error if there is an issue reading the leaderboard.
+    """
+    sort_by = request.args.get('sort', 'wins')
+    cuisine = request.args.get('cuisine')
+    difficulty = request.args.get('difficulty')
+    try:
+        if request.args.get('stream', 'false').lower() == 'true':
+            meals = kitchen_model.iter_leaderboard(sort_by, cuisine=cuisine, difficulty=difficulty)
+
+            def generate():
+                yield '['
+                for i, meal in enumerate(meals):
+                    yield (',' if i else '') + json.dumps(meal)
+                yield ']'
+
+            return Response(stream_with_context(generate()), mimetype='application/json')
+
+        limit = request.args.get('limit', kitchen_model.LEADERBOARD_PAGE_SIZE, type=int)
+        page = kitchen_model.get_leaderboard_page(sort_by, cuisine=cuisine, difficulty=difficulty,
+                                                  limit=limit, cursor=request.args.get('cursor'))
+        return make_response(jsonify(page), 200)
+    except ValueError as e:
+        current_app.logger.error("Invalid leaderboard request: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        current_app.logger.error("Failed to get leaderboard: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@bp.route('/api/tournament', methods=['POST'])
+def tournament() -> Response:
+    """
+    Route to run a tournament between many meals and record the results.
+
+    Expected JSON Input:
+        - meal_ids (List[int]): The IDs of the meals entering, in seeding order.
+        - format (str, optional): 'single_elimination' (default) or 'round_robin'.
+
+    Returns:
+        JSON response with the champion, the number of battles, the standings and,
+        for single elimination, the bracket rounds.
+    Raises:
+        400 error if input validation fails.
+        500 error if there is an issue running the tournament.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        meal_ids = data.get('meal_ids')
+        if not isinstance(meal_ids, list) or not all(isinstance(meal_id, int) for meal_id in meal_ids):
+            return make_response(jsonify({'error': 'Invalid input, meal_ids must be a list of meal IDs'}), 400)
+
+        result = run_tournament(meal_ids, data.get('format', 'single_elimination'))
+
+        current_app.logger.info("Tournament won by %s", result['champion']['meal'])
+        return make_response(jsonify(result), 200)
+    except ValueError as e:
+        current_app.logger.error("Invalid tournament: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        current_app.logger.error("Failed to run tournament: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@bp.route('/api/simulate', methods=['POST'])
+def simulate() -> Response:
+    """
+    Route to estimate pairwise win probabilities between meals without changing their stats.
+
+    Expected JSON Input:
+        - meal_ids (List[int]): The IDs of the meals to compare.
+        - simulations (int, optional): Battles simulated per pair.
+        - seed (int, optional): Seed for reproducible results.
+
+    Returns:
+        JSON response with the meal IDs and the matrix of win probabilities, where
+        entry [i][j] is the chance that meal i beats meal j when prepped first.
+    Raises:
+        400 error if input validation fails.
+        500 error if there is an issue running the simulation.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        meal_ids = data.get('meal_ids')
+        if not isinstance(meal_ids, list) or not all(isinstance(meal_id, int) for meal_id in meal_ids):
+            return make_response(jsonify({'error': 'Invalid input, meal_ids must be a list of meal IDs'}), 400)
+
+        result = simulate_win_probabilities(meal_ids, data.get('simulations', SIMULATION_DEFAULT_RUNS), data.get('seed'))
+        return make_response(jsonify(result), 200)
+    except ValueError as e:
+        current_app.logger.error("Invalid simulation: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        current_app.logger.error("Failed to run simulation: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@bp.route('/api/battle-jobs', methods=['POST'])
+def submit_battle_job() -> Response:
+    """
+    Route to queue a battle or tournament for the worker pool.
+
+    Expected JSON Input:
+        - kind (str): 'battle' or 'tournament'.
+        - meal_ids (List[int]): The IDs of the meals taking part; exactly two for a battle.
+        - format (str, optional): The tournament format.
+
+    Returns:
+        JSON response with the job ID and status, and a Location header to poll.
+    Raises:
+        400 error if input validation fails.
+        503 error with a Retry-After header if the job queue is full.
+    """
+    data = request.get_json(silent=True) or {}
+    meal_ids = data.get('meal_ids')
+    if not isinstance(meal_ids, list) or not all(isinstance(meal_id, int) for meal_id in meal_ids):
+        return make_response(jsonify({'error': 'Invalid input, meal_ids must be a list of meal IDs'}), 400)
+
+    try:
+        job = battle_jobs.submit(data.get('kind', 'battle'), meal_ids, data.get('format'))
+    except ValueError as e:
+        current_app.logger.error("Invalid battle job: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 400)
+    except RuntimeError as e:
+        current_app.logger.warning("Battle job shed: %s", str(e))
+        response = make_response(jsonify({'error': 'Server is busy, please retry.'}), 503)
+        response.headers['Retry-After'] = '1'
+        return response
+
+    response = make_response(jsonify({'job_id': job.id, 'status': job.status}), 202)
+    response.headers['Location'] = f'/api/battle-jobs/{job.id}'
+    return response
+
+@bp.route('/api/battle-jobs/<job_id>', methods=['GET'])
+def get_battle_job(job_id: str) -> Response:
+    """
+    Route to get the status, and once finished the result, of a queued battle or tournament.
+
+    Path Parameter:
+        - job_id (str): The ID returned when the job was queued.
+
+    Returns:
+        JSON response with the job's status, result or error, and timestamps.
+    Raises:
+        404 error if the job is unknown to this server process or has been pruned.
+    """
+    job = battle_jobs.get(job_id)
+    if job is None:
+        return make_response(jsonify({'error': f'Battle job {job_id} not found'}), 404)
+    return make_response(jsonify(job.to_dict()), 200)
+
+@bp.route('/api/create-user', methods=['POST'])
 def create_user() -> Response:
         """
         Route to create a new user.
@@ -111,7 +396,7 @@ def create_user() -> Response:
             400 error if input validation fails.
             500 error if there is an issue adding the user to the database.
         """
-        app.logger.info('Creating new user')
+        current_app.logger.info('Creating new user')
         try:
             # Get the JSON data from the request
             data = request.get_json()
@@ -124,16 +409,128 @@ def create_user() -> Response:
                 return make_response(jsonify({'error': 'Invalid input, both username and password are required'}), 400)
 
             # Call the User function to add the user to the database
-            app.logger.info('Adding user: %s', username)
+            current_app.logger.info('Adding user: %s', username)
             Users.create_user(username, password)
 
-            app.logger.info("User added: %s", username)
+            current_app.logger.info("User added: %s", username)
             return make_response(jsonify({'status': 'user added', 'username': username}), 201)
         except Exception as e:
-            app.logger.error("Failed to add user: %s", str(e))
+            current_app.logger.error("Failed to add user: %s", str(e))
             return make_response(jsonify({'error': str(e)}), 500)
 
-@app.route('/api/delete-user', methods=['DELETE'])
+@bp.route('/api/bulk-create-users', methods=['POST'])
+def bulk_create_users() -> Response:
+    """
+    Route to create many users at once.
+
+    Accepts either a multipart upload under 'file' (.csv, .jsonl or .json), which
+    is streamed rather than loaded into memory, or a JSON array of users.
+
+    Expected record fields:
+        - username (str): The username for the new user.
+        - password (str): The password for the new user.
+
+    Returns:
+        JSON response with the number of users created and the duplicate and invalid rows.
+    Raises:
+        400 error if the upload or payload cannot be parsed.
+        503 error with a Retry-After header if password hashing is saturated.
+        500 error if there is an issue adding the users to the database.
+    """
+    current_app.logger.info('Bulk creating users')
+    try:
+        if 'file' in request.files:
+            upload = request.files['file']
+            rows = iter_records(upload.stream, detect_format(upload.filename or ''))
+        else:
+            rows = request.get_json(silent=True)
+            if not isinstance(rows, list):
+                return make_response(jsonify({'error': 'Invalid input, expected a file upload or a JSON array of users'}), 400)
+
+        summary = Users.bulk_create_users(rows)
+
+        current_app.logger.info("Bulk created %d users", summary['created'])
+        return make_response(jsonify({'status': 'users added', **summary}), 201)
+    except ValueError as e:
+        current_app.logger.error("Invalid bulk user input: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 400)
+    except RuntimeError as e:
+        current_app.logger.warning("Bulk user import shed: %s", str(e))
+        response = make_response(jsonify({'error': 'Server is busy, please retry.'}), 503)
+        response.headers['Retry-After'] = '1'
+        return response
+    except Exception as e:
+        current_app.logger.error("Failed to bulk add users: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@bp.cli.command('create-users')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', type=int, default=None, help='Users per insert batch.')
+def create_users_command(path, batch_size):
+    """Create users from a CSV, JSON Lines or JSON file."""
+    with open(path, 'r', newline='') as fh:
+        summary = Users.bulk_create_users(iter_records(fh, detect_format(path)), batch_size=batch_size)
+    click.echo(f"Created {summary['created']} users")
+    for username in summary['duplicates']:
+        click.echo(f"Duplicate username: {username}", err=True)
+    for invalid in summary['invalid']:
+        click.echo(f"Invalid row {invalid['row']}: {invalid['error']}", err=True)
+
+@bp.route('/api/bulk-create-meals', methods=['POST'])
+def bulk_create_meals() -> Response:
+    """
+    Route to create many meals at once.
+
+    Accepts either a multipart upload under 'file' (.csv, .jsonl or .json), which
+    is streamed rather than loaded into memory, or a JSON array of meals.
+
+    Expected record fields:
+        - meal (str): The name of the meal.
+        - cuisine (str): The type of cuisine.
+        - price (float): The price of the meal.
+        - difficulty (str): The difficulty level of the meal (LOW, MED, HIGH).
+
+    Returns:
+        JSON response with the number of meals created and the duplicate and invalid rows.
+    Raises:
+        400 error if the upload or payload cannot be parsed.
+        500 error if there is an issue adding the meals to the database.
+    """
+    current_app.logger.info('Bulk creating meals')
+    try:
+        if 'file' in request.files:
+            upload = request.files['file']
+            rows = iter_records(upload.stream, detect_format(upload.filename or ''))
+        else:
+            rows = request.get_json(silent=True)
+            if not isinstance(rows, list):
+                return make_response(jsonify({'error': 'Invalid input, expected a file upload or a JSON array of meals'}), 400)
+
+        summary = kitchen_model.bulk_create_meals(rows)
+
+        current_app.logger.info("Bulk created %d meals", summary['created'])
+        return make_response(jsonify({'status': 'meals added', **summary}), 201)
+    except ValueError as e:
+        current_app.logger.error("Invalid bulk meal input: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        current_app.logger.error("Failed to bulk add meals: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@bp.cli.command('create-meals')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', type=int, default=None, help='Meals per insert transaction.')
+def create_meals_command(path, batch_size):
+    """Create meals from a CSV, JSON Lines or JSON file."""
+    with open(path, 'r', newline='') as fh:
+        summary = kitchen_model.bulk_create_meals(iter_records(fh, detect_format(path)), batch_size=batch_size)
+    click.echo(f"Created {summary['created']} meals")
+    for meal in summary['duplicates']:
+        click.echo(f"Duplicate meal: {meal}", err=True)
+    for invalid in summary['invalid']:
+        click.echo(f"Invalid row {invalid['row']}: {invalid['error']}", err=True)
+
+@bp.route('/api/delete-user', methods=['DELETE'])
 def delete_user() -> Response:
     """
     Route to delete a user.
@@ -147,7 +544,7 @@ def delete_user() -> Response:
         400 error if input validation fails.
         500 error if there is an issue deleting the user from the database.
     """
-    app.logger.info('Deleting user')
+    current_app.logger.info('Deleting user')
     try:
         # Get the JSON data from the request
         data = request.get_json()
@@ -159,16 +556,16 @@ def delete_user() -> Response:
             return make_response(jsonify({'error': 'Invalid input, username is required'}), 400)
 
         # Call the User function to delete the user from the database
-        app.logger.info('Deleting user: %s', username)
+        current_app.logger.info('Deleting user: %s', username)
         Users.delete_user(username)
 
-        app.logger.info("User deleted: %s", username)
+        current_app.logger.info("User deleted: %s", username)
         return make_response(jsonify({'status': 'user deleted', 'username': username}), 200)
     except Exception as e:
-        app.logger.error("Failed to delete user: %s", str(e))
+        current_app.logger.error("Failed to delete user: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
-@app.route('/api/login', methods=['POST'])
+@bp.route('/api/login', methods=['POST'])
 def login():
     """
     Route to log in a user and load their combatants.
@@ -178,49 +575,74 @@ def login():
         - password (str): The user's password.
 
     Returns:
-        JSON response indicating the success of the login.
+        JSON response indicating the success of the login, including a signed
+        session token to send as 'Authorization: Bearer <token>' on later requests.
 
     Raises:
         400 error if input validation fails.
         401 error if authentication fails (invalid username or password).
+        429 error if the username or client IP has made too many recent attempts.
+        503 error if the password hashing pool is saturated.
         500 error for any unexpected server-side issues.
     """
     data = request.get_json()
-    if not data or 'username' not in data or 'password' not in data:
-        app.logger.error("Invalid request payload for login.")
+    if not isinstance(data, dict) or 'username' not in data or 'password' not in data:
+        current_app.logger.error("Invalid request payload for login.")
         raise BadRequest("Invalid request payload. 'username' and 'password' are required.")
 
     username = data['username']
     password = data['password']
+    if not isinstance(username, str) or not isinstance(password, str):
+        current_app.logger.error("Invalid request payload for login.")
+        raise BadRequest("Invalid request payload. 'username' and 'password' must be strings.")
+
+    # Shed brute-force traffic before it reaches the database or the password hash. The IP is
+    # only charged once the username is admitted, so a locked account does not use up its IP's budget.
+    for limiter, key in ((login_user_limiter, username), (login_ip_limiter, request.remote_addr)):
+        if not limiter.hit(key):
+            current_app.logger.warning("Login rate limit exceeded for %s: %s", limiter.name, key)
+            response = jsonify({"error": "Too many login attempts. Please try again later."})
+            response.headers['Retry-After'] = str(int(limiter.retry_after(key)) + 1)
+            return response, 429
 
     try:
         # Validate user credentials
         if not Users.check_password(username, password):
-            app.logger.warning("Login failed for username: %s", username)
+            current_app.logger.warning("Login failed for username: %s", username)
             raise Unauthorized("Invalid username or password.")
 
         # Get user ID
         user_id = Users.get_id_by_username(username)
 
-        # Load user's combatants into the battle model
-        login_user(user_id, battle_model)
+        # Load user's combatants into their battle model
+        login_user(user_id, battle_registry.get(user_id))
 
-        app.logger.info("User %s logged in successfully.", username)
-        return jsonify({"message": f"User {username} logged in successfully."}), 200
+        current_app.logger.info("User %s logged in successfully.", username)
+        return jsonify({
+            "message": f"User {username} logged in successfully.",
+            "token": issue_token(user_id)
+        }), 200
 
     except Unauthorized as e:
         return jsonify({"error": str(e)}), 401
+    except RuntimeError as e:
+        # Raised when the password hashing pool is saturated
+        current_app.logger.warning("Login shed for username %s: %s", username, str(e))
+        return jsonify({"error": "Server is busy, please retry."}), 503
     except Exception as e:
-        app.logger.error("Error during login for username %s: %s", username, str(e))
+        current_app.logger.error("Error during login for username %s: %s", username, str(e))
         return jsonify({"error": "An unexpected error occurred."}), 500
 
 
-@app.route('/api/logout', methods=['POST'])
+@bp.route('/api/logout', methods=['POST'])
 def logout():
     """
     Route to log out a user and save their combatants to MongoDB.
 
-    Expected JSON Input:
+    The caller is identified by their session token if one is sent, in which
+    case the token is revoked; otherwise by username.
+
+    Expected JSON Input (without a session token):
         - username (str): The username of the user.
 
     Returns:
@@ -230,28 +652,36 @@ def logout():
         400 error if input validation fails or user is not found in MongoDB.
         500 error for any unexpected server-side issues.
     """
-    data = request.get_json()
-    if not data or 'username' not in data:
-        app.logger.error("Invalid request payload for logout.")
+    token_user_id = get_token_user_id()
+    data = request.get_json(silent=True) or {}
+    if token_user_id is None and 'username' not in data:
+        current_app.logger.error("Invalid request payload for logout.")
         raise BadRequest("Invalid request payload. 'username' is required.")
 
-    username = data['username']
+    username = data.get('username', token_user_id)
 
     try:
-        # Get user ID
-        user_id = Users.get_id_by_username(username)
-
-        # Save user's combatants and clear the battle model
-        logout_user(user_id, battle_model)
-
-        app.logger.info("User %s logged out successfully.", username)
+        # Get user ID, skipping the database when the token already identifies the user
+        if token_user_id is not None:
+            user_id = token_user_id
+            revoke_token(get_bearer_token())
+        else:
+            user_id = Users.get_id_by_username(username)
+
+        # Save user's combatants and release their battle model. If it is no longer
+        # in memory it was evicted, and its combatants were saved at that point.
+        battle_model = battle_registry.pop(user_id)
+        if battle_model is not None:
+            logout_user(user_id, battle_model)
+
+        current_app.logger.info("User %s logged out successfully.", username)
         return jsonify({"message": f"User {username} logged out successfully."}), 200
 
     except ValueError as e:
-        app.logger.warning("Logout failed for username %s: %s", username, str(e))
+        current_app.logger.warning("Logout failed for username %s: %s", username, str(e))
         return jsonify({"error": str(e)}), 400
     except Exception as e:
-        app.logger.error("Error during logout for username %s: %s", username, str(e))
+        current_app.logger.error("Error during logout for username %s: %s", username, str(e))
         return jsonify({"error": "An unexpected error occurred."}), 500
 
 ##########################################################
@@ -262,7 +692,7 @@ def logout():
 ##########################################################
 
 
-@app.route('/api/search-movie/<string:query>', methods=['GET'])
+@bp.route('/api/search-movie/<string:query>', methods=['GET'])
 def search_movie(query):
     """
     Search for a movie using the TMDB API.
@@ -273,15 +703,11 @@ def search_movie(query):
     Returns:
         JSON response with movie search results or an error message.
     """
-    if not TMDB_READ_ACCESS_TOKEN:  # Change: Validate API key existence
-        app.logger.error("TMDB read access not found.")
+    token = current_app.config['TMDB_READ_ACCESS_TOKEN']
+    if not token:  # Change: Validate API key existence
+        current_app.logger.error("TMDB read access not found.")
         return jsonify({"error": "TMDB read access token not configured"}), 500
 
-    url = f"{BASE_URL}/search/movie"
-    headers = {
-    "accept": "application/json",
-        "Authorization": f"Bearer {TMDB_READ_ACCESS_TOKEN}"
-    }
     params = {
         "query": query,
         "include_adult": "false",
@@ -289,7 +715,7 @@ def search_movie(query):
         "page": 1
     }
     try:
-        response = requests.get(url, headers=headers, params=params)  # API request
+        response = tmdb_get("/search/movie", token, params)  # API request
         response.raise_for_status()  # Raise HTTP errors, if any
         data = response.json()
 
@@ -308,20 +734,13 @@ def search_movie(query):
         return jsonify(filtered_results)
     
     except requests.exceptions.RequestException as e:
-        app.logger.error(f"Error calling TMDB API: {e}")
+        current_app.logger.error(f"Error calling TMDB API: {e}")
         return jsonify({"error": "Failed to fetch movie data"}), 500
     
-@app.route('/api/movie/<int:movie_id>/providers', methods=['GET'])
+@bp.route('/api/movie/<int:movie_id>/providers', methods=['GET'])
 def get_movie_providers(movie_id):
-    # Construct the URL using the movie_id from the route
-    url = f"{BASE_URL}/movie/{movie_id}/watch/providers"
-    headers = {
-        "accept": "application/json",
-        "Authorization": f"Bearer {TMDB_READ_ACCESS_TOKEN}"
-    }
-
-    # Send a GET request to the TMDB API
-    response = requests.get(url, headers=headers)
+    # Send a GET request to the TMDB API, using the movie_id from the route
+    response = tmdb_get(f"/movie/{movie_id}/watch/providers", current_app.config['TMDB_READ_ACCESS_TOKEN'])
 
     # Check if the request was successful
     if response.status_code == 200:
@@ -333,15 +752,9 @@ def get_movie_providers(movie_id):
         # If not successful, maybe the movie doesn't exist or TMDB is down.
         return jsonify({"error": "Failed to get watch providers"}), 500
     
-@app.route('/api/movie/<int:movie_id>/recommendations', methods=['GET'])
+@bp.route('/api/movie/<int:movie_id>/recommendations', methods=['GET'])
 def get_recommendations(movie_id):
-    url = f"{BASE_URL}/movie/{movie_id}/recommendations"
-    headers = {
-        "accept": "application/json",
-        "Authorization": f"Bearer {TMDB_READ_ACCESS_TOKEN}"
-    }
-
-    response = requests.get(url, headers=headers)
+    response = tmdb_get(f"/movie/{movie_id}/recommendations", current_app.config['TMDB_READ_ACCESS_TOKEN'])
 
     if response.status_code == 200:
         data = response.json()
@@ -371,7 +784,7 @@ def get_recommendations(movie_id):
 #
 ##########################################################
 '''
-@app.route('/add-to-watchlist', methods=['POST'])
+@bp.route('/add-to-watchlist', methods=['POST'])
 def add_to_watchlist():
     data = request.json
     user_id = data['user_id']
@@ -391,19 +804,16 @@ def add_to_watchlist():
 '''
 
 
-@app.route('/add-to-watchlist', methods=['POST'])
+@bp.route('/add-to-watchlist', methods=['POST'])
 def add_to_watchlist():
     data = request.json
-    user_id = data['user_id']
+    user_id = get_token_user_id()
+    if user_id is None:
+        user_id = data['user_id']
     movie_id = data['movie_id']
 
     # Validate if the movie exists on TMDB
-    url = f"{BASE_URL}/movie/{movie_id}"
-    headers = {
-        "accept": "application/json",
-        "Authorization": f"Bearer {TMDB_READ_ACCESS_TOKEN}"
-    }
-    response = requests.get(url, headers=headers)
+    response = tmdb_get(f"/movie/{movie_id}", current_app.config['TMDB_READ_ACCESS_TOKEN'])
     
     if response.status_code != 200:
         return jsonify({"error": "Invalid movie ID"}), 400
@@ -431,7 +841,7 @@ def add_to_watchlist():
     return jsonify({"message": "Movie added to watchlist!"}), 201
 
 '''
-@app.route('/get-watchlist/<int:user_id>', methods=['GET'])
+@bp.route('/get-watchlist/<int:user_id>', methods=['GET'])
 def get_watchlist(user_id):
     watchlist = Watchlist.query.filter_by(user_id=user_id).all()
     movie_details = []
@@ -450,10 +860,12 @@ def get_watchlist(user_id):
     return jsonify(movie_details), 200
 '''
 
-@app.route('/mark-watched', methods=['PUT'])
+@bp.route('/mark-watched', methods=['PUT'])
 def mark_watched():
     data = request.json
-    user_id = data['user_id']
+    user_id = get_token_user_id()
+    if user_id is None:
+        user_id = data['user_id']
     movie_id = data['movie_id']
 
     # Find the movie in the watchlist
@@ -467,10 +879,12 @@ def mark_watched():
 
     return jsonify({"message": "Movie marked as watched!"}), 200
 
-@app.route('/remove-from-watchlist', methods=['DELETE'])
+@bp.route('/remove-from-watchlist', methods=['DELETE'])
 def remove_from_watchlist():
     data = request.json
-    user_id = data['user_id']
+    user_id = get_token_user_id()
+    if user_id is None:
+        user_id = data['user_id']
     movie_id = data['movie_id']
 
     # Find the movie in the watchlist
@@ -490,4 +904,4 @@ def remove_from_watchlist():
 
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    create_app().run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
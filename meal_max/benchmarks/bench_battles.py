@@ -0,0 +1,126 @@
+"""
+Stress concurrent battle recording and check that no result is lost.
+
+Runs thousands of battles from many threads against a scratch SQLite
+database, drawing combatants from a small pool of hot meals so battles
+contend on the same rows. Every worker records battles with
+record_battle_result and, for a share of them, the per-meal
+update_meal_stats path. Afterwards each meal's battles, wins and version
+are checked against the battle_results log. Run from the project root:
+
+    python benchmarks/bench_battles.py --battles 5000 --workers 16 --meals 8 --modes sync async
+"""
+import argparse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from meal_max.models import kitchen_model  # noqa: E402
+from meal_max.models.kitchen_model import (  # noqa: E402
+    aggregate_battle_results, record_battle_result, update_meal_stats
+)
+from meal_max.utils import sql_utils  # noqa: E402
+from meal_max.utils.sql_utils import close_db_connection, get_db_connection  # noqa: E402
+
+
+def setup(path: str, meals: int) -> None:
+    sql_utils.DB_PATH = path
+    kitchen_model._battle_results_ready = False
+    kitchen_model._meal_versions_ready = False
+    with get_db_connection() as conn:
+        conn.execute("""
+            CREATE TABLE meals (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, meal TEXT NOT NULL UNIQUE, cuisine TEXT NOT NULL,
+                price REAL NOT NULL, difficulty TEXT, battles INTEGER DEFAULT 0, wins INTEGER DEFAULT 0,
+                deleted BOOLEAN DEFAULT FALSE
+            )
+        """)
+        conn.executemany("INSERT INTO meals (meal, cuisine, price, difficulty) VALUES (?, ?, 10.0, 'MED')",
+                         [(f"Meal {i}", "Italian") for i in range(meals)])
+        conn.commit()
+
+
+def run(battles: int, workers: int, meals: int, stat_updates: float, seed: int) -> tuple:
+    def worker(index: int) -> tuple:
+        rng = random.Random(seed + index)
+        updates = Counter()  # (meal_id, result) -> update_meal_stats calls
+        try:
+            for _ in range(battles // workers):
+                winner_id, loser_id = rng.sample(range(1, meals + 1), 2)
+                if rng.random() < stat_updates:
+                    for meal_id, result in ((winner_id, "win"), (loser_id, "loss")):
+                        update_meal_stats(meal_id, result)
+                        updates[meal_id, result] += 1
+                else:
+                    record_battle_result(winner_id, loser_id)
+            return updates
+        finally:
+            close_db_connection()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(worker, range(workers)))
+    return time.perf_counter() - start, sum(results, Counter())
+
+
+def verify(updates: Counter, exact_versions: bool) -> list:
+    while aggregate_battle_results():
+        pass
+    problems = []
+    with get_db_connection() as conn:
+        rows = conn.execute("SELECT id, battles, wins, version FROM meals").fetchall()
+        logged = dict(conn.execute("""
+            SELECT meal_id, COUNT(*) FROM (
+                SELECT winner_id AS meal_id FROM battle_results UNION ALL SELECT loser_id FROM battle_results
+            ) GROUP BY meal_id
+        """).fetchall())
+        logged_wins = dict(conn.execute("SELECT winner_id, COUNT(*) FROM battle_results GROUP BY winner_id").fetchall())
+    for meal_id, battles, wins, version in rows:
+        expected_wins = logged_wins.get(meal_id, 0) + updates[meal_id, "win"]
+        expected_battles = logged.get(meal_id, 0) + updates[meal_id, "win"] + updates[meal_id, "loss"]
+        if (battles, wins) != (expected_battles, expected_wins):
+            problems.append(f"meal {meal_id}: {battles} battles and {wins} wins, "
+                            f"expected {expected_battles} and {expected_wins}")
+        # In async mode the aggregator bumps the version once per batch rather than per battle
+        if version > battles or (exact_versions and version != battles):
+            problems.append(f"meal {meal_id}: version {version} after {battles} battles")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--battles", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--meals", type=int, default=8, help="size of the hot meal pool")
+    parser.add_argument("--stat-updates", type=float, default=0.2,
+                        help="share of battles recorded through update_meal_stats instead")
+    parser.add_argument("--modes", nargs="+", default=["sync", "async"], choices=["sync", "async"])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in args.modes:
+            kitchen_model.BATTLE_STATS_MODE = mode
+            setup(os.path.join(tmp, f"{mode}.db"), args.meals)
+            elapsed, updates = run(args.battles, args.workers, args.meals, args.stat_updates, args.seed)
+            problems = verify(updates, exact_versions=mode == "sync")
+            failed = failed or bool(problems)
+            print(f"{mode:>6}: {args.battles // args.workers * args.workers / elapsed:,.0f} battles per second "
+                  f"with {args.workers} workers, "
+                  f"{'consistent' if not problems else 'INCONSISTENT'}")
+            for problem in problems:
+                print(f"        {problem}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Compare login/logout throughput across session store backends.
+
+A login is a session lookup (creating the session the first time), a logout
+is a save of two combatants. Run from the project root:
+
+    python benchmarks/bench_session_store.py --users 1000 --rounds 5 --backends memory sqlite mongo
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from meal_max.models.session_store import create_session_store, SQLiteSessionStore  # noqa: E402
+
+
+def run(store, users: int, rounds: int) -> float:
+    combatants = [{"meal_id": 1}, {"meal_id": 2}]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for user_id in range(users):
+            if store.find(user_id) is None:
+                store.create(user_id)
+            store.save(user_id, combatants)
+    return (users * rounds) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--backends", nargs="+", default=["memory", "sqlite"], choices=["memory", "sqlite", "mongo"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in args.backends:
+            if backend == "sqlite":
+                store = SQLiteSessionStore(os.path.join(tmp, "sessions.db"))
+            else:
+                store = create_session_store(backend)
+            try:
+                rate = run(store, args.users, args.rounds)
+            except Exception as e:
+                print(f"{backend:>8}: failed ({e})")
+                continue
+            print(f"{backend:>8}: {rate:,.0f} login/logout cycles per second")
+
+
+if __name__ == "__main__":
+    main()
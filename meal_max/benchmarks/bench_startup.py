@@ -0,0 +1,71 @@
+"""
+Measure cold start: a fresh interpreter importing the app, creating it and
+serving its first health check.
+
+Each run is a new process, so nothing is shared between runs. Exits with
+status 1 if the median exceeds the target, so it can guard CI. Run from the
+project root:
+
+    python benchmarks/bench_startup.py --runs 10 --target 1.0 --imports 10
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Runs in the child process; prints the seconds from interpreter start to the first response
+PROBE = """
+import time
+start = time.perf_counter()
+import app
+flask_app = app.create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"})
+assert flask_app.test_client().get("/api/health").status_code == 200
+print(time.perf_counter() - start)
+"""
+
+
+def run_once(env: dict) -> float:
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, env=env, capture_output=True, text=True,
+                            check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(env: dict, count: int) -> list:
+    # -X importtime reports cumulative microseconds per module on stderr
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    timings = []
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)", line)
+        if match and len(match.group(2)) == 3:  # modules imported directly by app
+            timings.append((int(match.group(1)) / 1e6, match.group(3)))
+    return sorted(timings, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--target", type=float, default=1.0, help="maximum median cold start, in seconds")
+    parser.add_argument("--imports", type=int, default=10, help="slowest imports to list, 0 for none")
+    args = parser.parse_args()
+
+    env = dict(os.environ, LOG_LEVEL="WARNING")
+    times = [run_once(env) for _ in range(args.runs)]
+    median = statistics.median(times)
+    print(f"cold start: median {median * 1000:.0f} ms, min {min(times) * 1000:.0f} ms, "
+          f"max {max(times) * 1000:.0f} ms over {args.runs} runs (target {args.target * 1000:.0f} ms)")
+
+    if args.imports:
+        print("slowest imports:")
+        for seconds, module in slowest_imports(env, args.imports):
+            print(f"  {seconds * 1000:7.1f} ms  {module}")
+
+    sys.exit(0 if median <= args.target else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,5 +13,8 @@ else
     echo "Skipping database creation."
 fi
 
+# Create any missing tables and columns; safe to run on every start
+flask --app app init-db
+
 # Start the Python application
 exec python app.py
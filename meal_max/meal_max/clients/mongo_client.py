@@ -1,7 +1,8 @@
 import logging
 import os
+import threading
 
-from pymongo import MongoClient
+from pymongo import MongoClient, monitoring
 
 from meal_max.utils.logger import configure_logger
 
@@ -12,8 +13,163 @@ configure_logger(logger)
 
 MONGO_HOST = os.environ.get('MONGO_HOST', 'localhost')
 MONGO_PORT = int(os.environ.get('MONGO_PORT', 27017))
+MONGO_DB_NAME = os.environ.get('MONGO_DB_NAME', 'meal_max')
 
-logger.info("Connecting to MongoDB at %s:%d", MONGO_HOST, MONGO_PORT)
-mongo_client = MongoClient(host=MONGO_HOST, port=MONGO_PORT)
-db = mongo_client['meal_max']
-sessions_collection = db['sessions']
\ No newline at end of file
+# Connection pool and timeout settings, passed straight through to MongoClient
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', 100))
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', 0))
+MONGO_MAX_IDLE_TIME_MS = int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', 0)) or None
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', 0)) or None
+MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', 5000))
+MONGO_SOCKET_TIMEOUT_MS = int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS', 0)) or None
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+
+
+class PoolCheckoutListener(monitoring.ConnectionPoolListener):
+    """
+    Counts connection pool checkouts and the time spent waiting for them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.checked_out = 0
+            self.connections_created = 0
+            self.checkout_wait_ms = 0.0
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.checkout_wait_ms += (getattr(event, 'duration', 0) or 0) * 1000
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+        logger.warning("MongoDB connection checkout failed: %s", event.reason)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_created += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'checkout_failures': self.checkout_failures,
+                'checked_out': self.checked_out,
+                'connections_created': self.connections_created,
+                'avg_checkout_wait_ms': self.checkout_wait_ms / self.checkouts if self.checkouts else 0.0,
+            }
+
+    # Events we do not track
+    def connection_check_out_started(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_closed(self, event): pass
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+
+
+pool_listener = PoolCheckoutListener()
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_mongo_client() -> MongoClient:
+    """
+    Returns the process-wide MongoClient, creating it on first use.
+
+    A client inherited across fork() is never reused: the child creates its own
+    on first use, so pre-fork servers do not share sockets between workers.
+
+    Returns:
+        MongoClient: The client
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                logger.info("Connecting to MongoDB at %s:%d", MONGO_HOST, MONGO_PORT)
+                _client = MongoClient(
+                    host=MONGO_HOST,
+                    port=MONGO_PORT,
+                    maxPoolSize=MONGO_MAX_POOL_SIZE,
+                    minPoolSize=MONGO_MIN_POOL_SIZE,
+                    maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+                    waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+                    connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+                    socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+                    serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                    event_listeners=[pool_listener],
+                )
+                _client_pid = pid
+    return _client
+
+
+def close_mongo_client() -> None:
+    """
+    Closes the MongoClient if one has been created in this process.
+    """
+    global _client, _client_pid
+    with _client_lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client = None
+        _client_pid = None
+
+
+def _reset_after_fork() -> None:
+    # The parent's client (and its lock) must not be touched in the child
+    global _client, _client_pid, _client_lock
+    _client = None
+    _client_pid = None
+    _client_lock = threading.Lock()
+    pool_listener.__init__()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_collection(name: str):
+    """
+    Returns a collection from the meal_max database, creating the client if needed.
+
+    Args:
+        name (str): The collection name
+
+    Returns:
+        Collection: The collection
+    """
+    return get_mongo_client()[MONGO_DB_NAME][name]
+
+
+class LazyCollection:
+    """
+    A stand-in for a collection that resolves it on first attribute access.
+
+    Lets modules keep a module-level collection handle without connecting at import time.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(get_collection(self._name), attr)
+
+
+sessions_collection = LazyCollection('sessions')
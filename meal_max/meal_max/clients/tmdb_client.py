@@ -0,0 +1,73 @@
+import logging
+import os
+import threading
+from typing import Any, Optional
+
+import requests
+
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+TMDB_BASE_URL = os.environ.get('TMDB_BASE_URL', 'https://api.themoviedb.org/3')
+TMDB_TIMEOUT = float(os.environ.get('TMDB_TIMEOUT', 10))
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def get_tmdb_session() -> requests.Session:
+    """
+    Returns the process-wide TMDB HTTP session, creating it on first use.
+
+    The session keeps connections to TMDB alive between requests. Like the
+    MongoClient, a session inherited across fork() is never reused.
+
+    Returns:
+        requests.Session: The session
+    """
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                logger.info("Opening HTTP session to %s", TMDB_BASE_URL)
+                _session = requests.Session()
+                _session.headers["accept"] = "application/json"
+                _session_pid = pid
+    return _session
+
+
+def close_tmdb_session() -> None:
+    """
+    Closes the TMDB session if one has been created in this process.
+    """
+    global _session, _session_pid
+    with _session_lock:
+        if _session is not None and _session_pid == os.getpid():
+            _session.close()
+        _session = None
+        _session_pid = None
+
+
+def tmdb_get(path: str, token: Optional[str], params: Optional[dict[str, Any]] = None) -> requests.Response:
+    """
+    Sends a GET request to the TMDB API.
+
+    Args:
+        path (str): The API path, e.g. '/search/movie'
+        token (str): The TMDB read access token
+        params (dict, optional): Query parameters
+
+    Returns:
+        requests.Response: The response
+
+    Raises:
+        requests.exceptions.RequestException: If the request fails or times out
+    """
+    return get_tmdb_session().get(f"{TMDB_BASE_URL}{path}", params=params, timeout=TMDB_TIMEOUT,
+                                  headers={"Authorization": f"Bearer {token}"})
@@ -0,0 +1,111 @@
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Optional
+
+from meal_max.models.kitchen_model import BATTLE_AGGREGATE_BATCH_SIZE, aggregate_battle_results
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+BATTLE_AGGREGATE_INTERVAL = float(os.getenv("BATTLE_AGGREGATE_INTERVAL", 1.0))
+
+
+class BattleResultAggregator:
+    """
+    Folds the battle log into meal stats in the background.
+
+    Every `interval` seconds the aggregator folds battles in batches of
+    `batch_size` until the log is drained, so meal stats trail the battles by
+    at most about one interval. Only needed when BATTLE_STATS_MODE is 'async'.
+    Running one per process is safe: each batch is folded under SQLite's write
+    lock and counted once.
+
+    Attributes:
+        interval (float): Seconds between background runs
+        batch_size (int): Battles folded per transaction
+        aggregated (int): The number of battles read by this aggregator
+    """
+
+    def __init__(self, interval: float = BATTLE_AGGREGATE_INTERVAL, batch_size: int = BATTLE_AGGREGATE_BATCH_SIZE):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.aggregated = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> int:
+        """
+        Folds batches until the log is drained.
+
+        Returns:
+            int: The number of battles read
+
+        Raises:
+            sqlite3.Error: For any database errors
+        """
+        total = 0
+        while True:
+            count = aggregate_battle_results(self.batch_size)
+            total += count
+            self.aggregated += count
+            if count < self.batch_size:
+                return total
+
+    def start(self) -> None:
+        """
+        Starts the background thread, if it is not running yet.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped = False
+                self._thread = threading.Thread(target=self._run, name="battle-aggregator", daemon=True)
+                self._thread.start()
+
+    def close(self) -> None:
+        """
+        Stops the background thread and folds whatever is still in the log.
+        """
+        self._stopped = True
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.interval + 5)
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error("Failed to aggregate battle results on shutdown: %s", str(e))
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "aggregated": self.aggregated,
+            "failures": self.failures,
+        }
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.run_once()
+            except sqlite3.Error as e:
+                self.failures += 1
+                logger.warning("Aggregating battle results failed, retrying in %.0fs: %s", self.interval, str(e))
+            except Exception:
+                # Anything else is a bug, but stopping would silently freeze the meal stats
+                self.failures += 1
+                logger.exception("Unexpected error aggregating battle results, retrying in %.0fs", self.interval)
+
+
+battle_aggregator = BattleResultAggregator()
+atexit.register(battle_aggregator.close)
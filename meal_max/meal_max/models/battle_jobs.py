@@ -0,0 +1,240 @@
+from collections import deque
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from typing import Any, Callable, Optional
+
+from meal_max.models.battle_model import BattleModel
+from meal_max.models.kitchen_model import get_meals_by_ids
+from meal_max.models.tournament_model import run_tournament
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+BATTLE_WORKERS = int(os.getenv("BATTLE_WORKERS", 4))
+BATTLE_QUEUE_DEPTH = int(os.getenv("BATTLE_QUEUE_DEPTH", 1000))
+BATTLE_JOB_RETENTION = int(os.getenv("BATTLE_JOB_RETENTION", 10000))  # finished jobs kept for status lookups
+
+JOB_KINDS = ("battle", "tournament")
+
+
+class BattleJob:
+    """
+    A battle or tournament waiting for, or processed by, a worker.
+
+    Attributes:
+        id (str): The job ID
+        kind (str): 'battle' or 'tournament'
+        status (str): 'queued', 'running', 'done' or 'failed'
+        result (Any): The outcome, once the job is done
+        error (str): The error message, if the job failed
+    """
+    __slots__ = ("id", "kind", "status", "result", "error", "created_at", "started_at", "finished_at", "_run")
+
+    def __init__(self, kind: str, run: Callable[[], Any]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._run = run
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+def _battle(meal_ids: list) -> dict[str, Any]:
+    if len(meal_ids) != 2:
+        raise ValueError("A battle needs exactly two meal IDs.")
+    meals = get_meals_by_ids(meal_ids)
+    model = BattleModel()
+    for meal_id in meal_ids:
+        if meal_id not in meals:
+            raise ValueError(f"Meal with ID {meal_id} not found or has been deleted")
+        model.prep_combatant(meals[meal_id])
+    return {"winner": model.battle()}
+
+
+class BattleJobQueue:
+    """
+    A bounded queue of battle and tournament jobs processed by a pool of worker threads.
+
+    Submitting never blocks: when `max_depth` jobs are already waiting the job
+    is rejected, so callers can shed load instead of piling up requests. Each
+    worker uses its own pooled SQLite connection. Finished jobs are kept for
+    status lookups until `retention` newer jobs have finished.
+
+    Jobs live in this process's memory, so with several server processes a
+    job's status is only known to the process that accepted it.
+
+    Attributes:
+        workers (int): The number of worker threads
+        max_depth (int): The maximum number of queued jobs
+        rejected (int): The number of jobs turned away because the queue was full
+    """
+
+    def __init__(self, workers: int = BATTLE_WORKERS, max_depth: int = BATTLE_QUEUE_DEPTH,
+                 retention: int = BATTLE_JOB_RETENTION):
+        self.workers = workers
+        self.max_depth = max_depth
+        self.retention = retention
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_depth)
+        self._jobs: dict[str, BattleJob] = {}
+        self._finished: deque = deque()  # IDs of finished jobs, oldest first
+        self._lock = threading.Lock()
+        self._threads: list = []
+        self._running = 0
+
+    def submit(self, kind: str, meal_ids: list, fmt: Optional[str] = None) -> BattleJob:
+        """
+        Queues a battle between two meals or a tournament between many.
+
+        Args:
+            kind (str): 'battle' or 'tournament'
+            meal_ids (list): The IDs of the meals taking part
+            fmt (str, optional): The tournament format; see run_tournament
+
+        Returns:
+            BattleJob: The queued job
+
+        Raises:
+            ValueError: If the kind is invalid
+            RuntimeError: If the queue is full
+        """
+        if kind == "battle":
+            run = lambda: _battle(meal_ids)
+        elif kind == "tournament":
+            run = lambda: run_tournament(meal_ids, fmt or "single_elimination")
+        else:
+            raise ValueError(f"Invalid job kind: {kind}. Must be 'battle' or 'tournament'.")
+        return self.submit_callable(kind, run)
+
+    def submit_callable(self, kind: str, run: Callable[[], Any]) -> BattleJob:
+        """
+        Queues an arbitrary callable as a job.
+
+        Raises:
+            RuntimeError: If the queue is full
+        """
+        job = BattleJob(kind, run)
+        self._ensure_started()
+        with self._lock:
+            # Registered first so a worker can never finish a job that is not yet tracked
+            self._jobs[job.id] = job
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                del self._jobs[job.id]
+                self.rejected += 1
+                logger.warning("Battle job queue is full (%d jobs); rejecting %s job.", self.max_depth, kind)
+                raise RuntimeError("Battle job queue is full.")
+        logger.info("Queued %s job %s", kind, job.id)
+        return job
+
+    def get(self, job_id: str) -> Optional[BattleJob]:
+        """
+        Returns the job with the given ID, or None if it is unknown or has been pruned.
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns the queue depth, busy workers and job counters.
+        """
+        with self._lock:
+            return {
+                "workers": len(self._threads),
+                "queued": self._queue.qsize(),
+                "running": self._running,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+            }
+
+    def join(self) -> None:
+        """
+        Blocks until every job queued so far has finished.
+        """
+        self._queue.join()
+
+    def close(self, timeout: float = 30) -> None:
+        """
+        Stops the workers after the jobs already queued have been processed.
+        """
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join(timeout=timeout)
+
+    def _ensure_started(self) -> None:
+        if self._threads:
+            return
+        with self._lock:
+            if not self._threads:
+                self._threads = [threading.Thread(target=self._work, name=f"battle-worker-{i}", daemon=True)
+                                 for i in range(self.workers)]
+                for thread in self._threads:
+                    thread.start()
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                self._queue.task_done()
+                return
+            with self._lock:
+                self._running += 1
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                job.result = job._run()
+                job.status = "done"
+            except Exception as e:
+                logger.error("Battle job %s failed: %s", job.id, str(e))
+                job.error = str(e)
+                job.status = "failed"
+            job.finished_at = time.time()
+            job._run = None
+            with self._lock:
+                self._running -= 1
+                if job.status == "done":
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                self._finish(job)
+            self._queue.task_done()
+
+    def _finish(self, job: BattleJob) -> None:
+        # Called with the lock held
+        self._finished.append(job.id)
+        while len(self._finished) > self.retention:
+            self._jobs.pop(self._finished.popleft(), None)
+
+
+battle_jobs = BattleJobQueue()
+atexit.register(battle_jobs.close)
@@ -1,9 +1,10 @@
 import logging
+import threading
 from typing import List
 
-from meal_max.models.kitchen_model import Meal, update_meal_stats
+from meal_max.models.kitchen_model import Meal, record_battle_result
 from meal_max.utils.logger import configure_logger
-from meal_max.utils.random_utils import get_random
+from meal_max.utils.random_utils import next_random
 
 
 logger = logging.getLogger(__name__)
@@ -14,6 +15,10 @@ class BattleModel:
     """
     A class to represent a battle between two meals
 
+    The same model may serve several requests at once, so the combatants
+    list is only changed under the model's lock, and a battle holds it from
+    reading the combatants to removing the loser.
+
     Attributes:
         combatants (List[Meal]): A list of Meal objects representing the combatants in the battle
 
@@ -24,6 +29,7 @@ class BattleModel:
         Initializes the BattleModel with an empty list of combatants.
         """
         self.combatants: List[Meal] = []
+        self._lock = threading.RLock()
 
     def battle(self) -> str:
         """
@@ -35,7 +41,11 @@ class BattleModel:
         Raises:
             ValueError: If there are not enough combatants to start a battle
         """
-        logger.info("Two meals enter, one meal leaves!")
+        with self._lock:
+            return self._battle()
+
+    def _battle(self) -> str:
+        logger.debug("Two meals enter, one meal leaves!")
 
         if len(self.combatants) < 2:
             logger.error("Not enough combatants to start a battle.")
@@ -52,20 +62,20 @@ class BattleModel:
         score_2 = self.get_battle_score(combatant_2)
 
         # Log the scores for both combatants
-        logger.info("Score for %s: %.3f", combatant_1.meal, score_1)
-        logger.info("Score for %s: %.3f", combatant_2.meal, score_2)
+        logger.debug("Score for %s: %.3f", combatant_1.meal, score_1)
+        logger.debug("Score for %s: %.3f", combatant_2.meal, score_2)
 
         # Compute the delta and normalize between 0 and 1
         delta = abs(score_1 - score_2) / 100
 
         # Log the delta and normalized delta
-        logger.info("Delta between scores: %.3f", delta)
+        logger.debug("Delta between scores: %.3f", delta)
 
-        # Get random number from random.org
-        random_number = get_random()
+        # Get a random number from the configured random source (buffered random.org numbers by default)
+        random_number = next_random()
 
         # Log the random number
-        logger.info("Random number from random.org: %.3f", random_number)
+        logger.debug("Random number: %.3f", random_number)
 
         # Determine the winner based on the normalized delta
         if delta > random_number:
@@ -78,9 +88,8 @@ class BattleModel:
         # Log the winner
         logger.info("The winner is: %s", winner.meal)
 
-        # Update stats for both combatants
-        update_meal_stats(winner.id, 'win')
-        update_meal_stats(loser.id, 'loss')
+        # Update stats for both combatants in one transaction
+        record_battle_result(winner.id, loser.id)
 
         # Remove the losing combatant from combatants
         self.combatants.remove(loser)
@@ -92,31 +101,23 @@ class BattleModel:
         Clears the list of combatants
         """
         logger.info("Clearing the combatants list.")
-        self.combatants.clear()
+        with self._lock:
+            self.combatants.clear()
 
     def get_battle_score(self, combatant: Meal) -> float:
         """
-        Calculates the battle score for a given combatant and logs the calculation process
+        Returns the battle score for a given combatant
+
+        The score, price * len(cuisine) minus the difficulty modifier, is
+        computed once when the Meal is created.
 
         Args:
             combatant (Meal): A Meal object representing the combatant
 
         Returns:
-            float: The calculated battle score for the combatant
+            float: The battle score for the combatant
         """
-        difficulty_modifier = {"HIGH": 1, "MED": 2, "LOW": 3}
-
-        # Log the calculation process
-        logger.info("Calculating battle score for %s: price=%.3f, cuisine=%s, difficulty=%s",
-                    combatant.meal, combatant.price, combatant.cuisine, combatant.difficulty)
-
-        # Calculate score
-        score = (combatant.price * len(combatant.cuisine)) - difficulty_modifier[combatant.difficulty]
-
-        # Log the calculated score
-        logger.info("Battle score for %s: %.3f", combatant.meal, score)
-
-        return score
+        return combatant.battle_score
 
     def get_combatants(self) -> List[Meal]:
         """
@@ -125,8 +126,9 @@ class BattleModel:
         Returns:
             List[Meal]: A list of Meal objects representing the combatants
         """
-        logger.info("Retrieving current list of combatants.")
-        return self.combatants
+        logger.debug("Retrieving current list of combatants.")
+        with self._lock:
+            return list(self.combatants)
 
     def prep_combatant(self, combatant_data: Meal):
         """
@@ -138,14 +140,15 @@ class BattleModel:
         Raises:
             ValueError: If the combatants list is full
         """
-        if len(self.combatants) >= 2:
-            logger.error("Attempted to add combatant '%s' but combatants list is full", combatant_data.meal)
-            raise ValueError("Combatant list is full, cannot add more combatants.")
+        with self._lock:
+            if len(self.combatants) >= 2:
+                logger.error("Attempted to add combatant '%s' but combatants list is full", combatant_data.meal)
+                raise ValueError("Combatant list is full, cannot add more combatants.")
 
-        # Log the addition of the combatant
-        logger.info("Adding combatant '%s' to combatants list", combatant_data.meal)
+            # Log the addition of the combatant
+            logger.info("Adding combatant '%s' to combatants list", combatant_data.meal)
 
-        self.combatants.append(combatant_data)
+            self.combatants.append(combatant_data)
 
         # Log the current state of combatants
-        logger.info("Current combatants list: %s", [combatant.meal for combatant in self.combatants])
+        logger.debug("Current combatants list: %s", [combatant.meal for combatant in self.combatants])
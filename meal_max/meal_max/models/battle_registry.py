@@ -0,0 +1,211 @@
+from collections import OrderedDict
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Callable, Optional
+
+from meal_max.models.battle_model import BattleModel
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+BATTLE_REGISTRY_CAPACITY = int(os.getenv("BATTLE_REGISTRY_CAPACITY", 10000))
+BATTLE_REGISTRY_IDLE_TIMEOUT = float(os.getenv("BATTLE_REGISTRY_IDLE_TIMEOUT", 1800))
+BATTLE_REGISTRY_SHARDS = int(os.getenv("BATTLE_REGISTRY_SHARDS", 16))
+BATTLE_REGISTRY_SWEEP_INTERVAL = float(os.getenv("BATTLE_REGISTRY_SWEEP_INTERVAL", 60))
+# Models used this recently are never evicted, since a request may still be preparing or battling with them
+BATTLE_REGISTRY_EVICTION_GRACE = float(os.getenv("BATTLE_REGISTRY_EVICTION_GRACE", 5))
+
+
+class _Shard:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries: OrderedDict[int, list] = OrderedDict()  # user_id -> [BattleModel, last_used]
+
+
+class BattleModelRegistry:
+    """
+    A registry of per-user BattleModel instances.
+
+    Users are spread over independently locked shards so concurrent requests for
+    different users rarely contend. Each shard is kept in least-recently-used
+    order; models beyond the shard's share of `capacity`, or idle for longer than
+    `idle_timeout`, are evicted and handed to `flush` so their combatants can be
+    saved to the session store. A background thread, started on first use,
+    sweeps every shard for idle models every `sweep_interval` seconds, so
+    models in quiet shards are saved too. Models used within the last
+    `eviction_grace` seconds are kept even over capacity, so a model is not
+    flushed and cleared while a request is still using it.
+
+    Attributes:
+        capacity (int): The maximum number of models kept in memory
+        idle_timeout (float): Seconds of inactivity after which a model is evicted
+        sweep_interval (float): Seconds between background sweeps for idle models
+        eviction_grace (float): Seconds after its last use during which a model is never evicted
+        evictions (int): The number of models evicted so far
+    """
+
+    def __init__(self, capacity: int = BATTLE_REGISTRY_CAPACITY, idle_timeout: float = BATTLE_REGISTRY_IDLE_TIMEOUT,
+                 shards: int = BATTLE_REGISTRY_SHARDS, flush: Optional[Callable[[int, BattleModel], None]] = None,
+                 sweep_interval: float = BATTLE_REGISTRY_SWEEP_INTERVAL,
+                 eviction_grace: float = BATTLE_REGISTRY_EVICTION_GRACE):
+        self.capacity = capacity
+        self.idle_timeout = idle_timeout
+        self.sweep_interval = sweep_interval
+        self.eviction_grace = eviction_grace
+        self.evictions = 0
+        self._evictions_lock = threading.Lock()
+        self._flush = flush
+        self._shards = [_Shard() for _ in range(shards)]
+        self._shard_capacity = max(1, capacity // shards)
+        self._thread_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def _shard(self, user_id: int) -> _Shard:
+        return self._shards[hash(user_id) % len(self._shards)]
+
+    def get(self, user_id: int) -> BattleModel:
+        """
+        Returns the user's BattleModel, creating an empty one if needed.
+
+        Args:
+            user_id (int): The ID of the user
+
+        Returns:
+            BattleModel: The user's BattleModel
+        """
+        now = time.monotonic()
+        shard = self._shard(user_id)
+        with shard.lock:
+            entry = shard.entries.get(user_id)
+            if entry is None:
+                entry = shard.entries[user_id] = [BattleModel(), now]
+            else:
+                shard.entries.move_to_end(user_id)
+                entry[1] = now
+            evicted = self._collect_evictions(shard, now)
+
+        self._flush_all(evicted)
+        self._ensure_started()
+        return entry[0]
+
+    def pop(self, user_id: int) -> Optional[BattleModel]:
+        """
+        Removes and returns the user's BattleModel without flushing it.
+
+        Args:
+            user_id (int): The ID of the user
+
+        Returns:
+            Optional[BattleModel]: The user's BattleModel, or None if it is not in memory
+        """
+        shard = self._shard(user_id)
+        with shard.lock:
+            entry = shard.entries.pop(user_id, None)
+        return entry[0] if entry else None
+
+    def evict_idle(self) -> int:
+        """
+        Evicts and flushes every model that has been idle longer than `idle_timeout`.
+
+        Returns:
+            int: The number of models evicted
+        """
+        now = time.monotonic()
+        evicted = []
+        for shard in self._shards:
+            with shard.lock:
+                evicted.extend(self._collect_evictions(shard, now))
+        self._flush_all(evicted)
+        return len(evicted)
+
+    def flush_all(self) -> None:
+        """
+        Evicts and flushes every model, e.g. on shutdown.
+        """
+        evicted = []
+        for shard in self._shards:
+            with shard.lock:
+                evicted.extend((user_id, entry[0]) for user_id, entry in shard.entries.items())
+                shard.entries.clear()
+        self._flush_all(evicted)
+
+    def close(self) -> None:
+        """
+        Stops the background sweep and flushes every model, e.g. on shutdown.
+        """
+        self._stopped = True
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self.flush_all()
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns the number of models and combatants held, with an approximate memory footprint.
+
+        Returns:
+            dict: 'models', 'combatants', 'approx_bytes' and 'evictions'
+        """
+        models = combatants = approx_bytes = 0
+        for shard in self._shards:
+            with shard.lock:
+                for model, _ in shard.entries.values():
+                    models += 1
+                    combatants += len(model.combatants)
+                    approx_bytes += (sys.getsizeof(model) + sys.getsizeof(model.combatants)
+                                     + sum(sys.getsizeof(combatant) for combatant in model.combatants))
+        return {"models": models, "combatants": combatants, "approx_bytes": approx_bytes, "evictions": self.evictions}
+
+    def _collect_evictions(self, shard: _Shard, now: float) -> list:
+        # Entries are in LRU order, so idle and over-capacity entries are at the front, and once
+        # one is inside the grace window so is everything after it.
+        # Called with the shard lock held; flushing happens after it is released.
+        evicted = []
+        while shard.entries:
+            user_id, (model, last_used) = next(iter(shard.entries.items()))
+            if now - last_used < self.eviction_grace:
+                break
+            if len(shard.entries) <= self._shard_capacity and now - last_used < self.idle_timeout:
+                break
+            del shard.entries[user_id]
+            evicted.append((user_id, model))
+        if evicted:
+            with self._evictions_lock:
+                self.evictions += len(evicted)
+        return evicted
+
+    def _ensure_started(self) -> None:
+        if self._stopped or (self._thread is not None and self._thread.is_alive()):
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="battle-registry-sweeper", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wakeup.wait(self.sweep_interval)
+            if self._stopped:
+                return
+            try:
+                self.evict_idle()
+            except Exception:
+                logger.exception("Sweeping idle BattleModels failed")
+
+    def _flush_all(self, evicted: list) -> None:
+        for user_id, model in evicted:
+            logger.info("Evicting BattleModel for user ID %d.", user_id)
+            if self._flush is None:
+                continue
+            try:
+                self._flush(user_id, model)
+            except Exception as e:
+                logger.error("Failed to flush BattleModel for user ID %d: %s", user_id, str(e))
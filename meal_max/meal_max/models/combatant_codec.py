@@ -0,0 +1,62 @@
+import logging
+from typing import Any, List
+
+from meal_max.models.kitchen_model import Meal, get_meals_by_ids
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+def encode_combatants(combatants: List[Meal]) -> List[int]:
+    """
+    Encodes combatants for storage in a session as a list of meal IDs.
+
+    The meals table is the source of truth for everything else about a meal,
+    so the ID is all a session needs to keep.
+
+    Args:
+        combatants (List[Meal]): The combatants to encode
+
+    Returns:
+        List[int]: The meal IDs, in combatant order
+    """
+    return [combatant.id for combatant in combatants]
+
+
+def _meal_id(stored: Any) -> int:
+    # Sessions written before this codec hold dicts ({"meal_id": ...} or a full Meal as a dict)
+    if isinstance(stored, dict):
+        return int(stored.get("meal_id", stored.get("id")))
+    return int(stored)
+
+
+def decode_combatants(stored: List[Any]) -> List[Meal]:
+    """
+    Rehydrates stored combatants into Meal objects with one batched lookup.
+
+    Meals that have been deleted since the session was saved are dropped.
+
+    Args:
+        stored (List[Any]): Meal IDs as written by `encode_combatants`, or legacy dicts
+
+    Returns:
+        List[Meal]: The combatants, in stored order
+
+    Raises:
+        ValueError: If a stored combatant has no meal ID
+    """
+    try:
+        meal_ids = [_meal_id(item) for item in stored]
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid stored combatants: {stored}")
+
+    meals = get_meals_by_ids(meal_ids)
+    combatants = []
+    for meal_id in meal_ids:
+        if meal_id in meals:
+            combatants.append(meals[meal_id])
+        else:
+            logger.warning("Stored combatant with meal ID %s no longer exists; skipping it.", meal_id)
+    return combatants
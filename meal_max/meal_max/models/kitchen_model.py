@@ -1,9 +1,17 @@
+from array import array
+import base64
 from dataclasses import dataclass
+import json
 import logging
+import math
 import os
 import sqlite3
-from typing import Any
+import threading
+from typing import Any, Iterable, Iterator, Optional
 
+from meal_max.models.leaderboard import leaderboard
+from meal_max.models.meal_cache import meal_cache
+from meal_max.utils.import_utils import batched
 from meal_max.utils.sql_utils import get_db_connection
 from meal_max.utils.logger import configure_logger
 
@@ -12,8 +20,75 @@ logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
-@dataclass
+MEAL_IMPORT_BATCH_SIZE = int(os.getenv("MEAL_IMPORT_BATCH_SIZE", 500))
+LEADERBOARD_PAGE_SIZE = int(os.getenv("LEADERBOARD_PAGE_SIZE", 50))
+LEADERBOARD_MAX_PAGE_SIZE = int(os.getenv("LEADERBOARD_MAX_PAGE_SIZE", 500))
+
+# The expressions leaderboard pages are ordered by. The win_pct expression must match
+# meals_leaderboard_win_pct exactly for SQLite to use the index.
+LEADERBOARD_SORT_EXPRESSIONS = {"wins": "wins", "win_pct": "(wins * 1.0 / battles)"}
+
+# Indexes in leaderboard order, ties broken by ID. The two unfiltered ones cover every
+# column a leaderboard row needs, so pages are read from the index alone.
+LEADERBOARD_INDEXES_SQL = """
+    CREATE INDEX IF NOT EXISTS meals_leaderboard_wins
+        ON meals (deleted, wins DESC, id DESC, battles, meal, cuisine, price, difficulty);
+    CREATE INDEX IF NOT EXISTS meals_leaderboard_win_pct
+        ON meals (deleted, (wins * 1.0 / battles) DESC, id DESC, battles, wins, meal, cuisine, price, difficulty);
+    CREATE INDEX IF NOT EXISTS meals_cuisine_wins ON meals (cuisine, deleted, wins DESC, id DESC);
+    CREATE INDEX IF NOT EXISTS meals_cuisine_win_pct ON meals (cuisine, deleted, (wins * 1.0 / battles) DESC, id DESC);
+"""
+
+_leaderboard_indexes_ready = False
+_leaderboard_indexes_lock = threading.Lock()
+
+# 'sync' updates both meals' stats as each battle is recorded; 'async' only appends the
+# battle to battle_results and leaves the stats to aggregate_battle_results
+BATTLE_STATS_MODE = os.getenv("BATTLE_STATS_MODE", "sync")
+BATTLE_AGGREGATE_BATCH_SIZE = int(os.getenv("BATTLE_AGGREGATE_BATCH_SIZE", 1000))
+
+# An append-only log of every battle. Rows recorded in 'sync' mode are already counted in
+# the meals' stats; the aggregator folds in the others, remembering how far it got in
+# battle_results_watermark so each battle is counted exactly once.
+BATTLE_RESULTS_SQL = """
+    CREATE TABLE IF NOT EXISTS battle_results (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        winner_id INTEGER NOT NULL,
+        loser_id INTEGER NOT NULL,
+        applied BOOLEAN NOT NULL DEFAULT FALSE,
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS battle_results_winner ON battle_results (winner_id);
+    CREATE INDEX IF NOT EXISTS battle_results_loser ON battle_results (loser_id);
+    CREATE TABLE IF NOT EXISTS battle_results_watermark (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        last_id INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO battle_results_watermark (id, last_id) VALUES (1, 0);
+"""
+
+_battle_results_ready = False
+_battle_results_lock = threading.Lock()
+
+# Every change to a meal's stats bumps its version, so the materialized
+# leaderboard can tell which of two updates of a meal is newer
+_meal_versions_ready = False
+_meal_versions_lock = threading.Lock()
+
+
+# Subtracted from a meal's battle score; harder meals are penalized less
+DIFFICULTY_MODIFIER = {"HIGH": 1, "MED": 2, "LOW": 3}
+
+
+@dataclass(frozen=True)
 class Meal:
+    """
+    An immutable meal. Its battle score, which depends only on the meal
+    itself, is computed once at construction.
+    """
+    # Declared by hand rather than with slots=True, which needs Python 3.10
+    __slots__ = ("id", "meal", "cuisine", "price", "difficulty", "battle_score")
+
     id: int
     meal: str
     cuisine: str
@@ -25,6 +100,49 @@ class Meal:
             raise ValueError("Price must be a positive value.")
         if self.difficulty not in ['LOW', 'MED', 'HIGH']:
             raise ValueError("Difficulty must be 'LOW', 'MED', or 'HIGH'.")
+        # Not a dataclass field, so it stays out of __init__, __eq__ and __repr__
+        object.__setattr__(self, "battle_score",
+                           (self.price * len(self.cuisine)) - DIFFICULTY_MODIFIER[self.difficulty])
+
+    def __reduce__(self):
+        # Frozen slotted instances cannot be unpickled attribute by attribute; rebuild them instead
+        return (Meal, (self.id, self.meal, self.cuisine, self.price, self.difficulty))
+
+
+class MealBatch:
+    """
+    Many meals stored column-wise, for scoring battles between them by position.
+
+    IDs and battle scores live in contiguous typed arrays, so a tournament or
+    simulation indexes them without touching the Meal objects, and NumPy can
+    wrap `scores` without copying (numpy.frombuffer).
+
+    Attributes:
+        ids (array): The meal IDs, as 64-bit integers
+        scores (array): The battle scores, as doubles
+    """
+    __slots__ = ("meals", "ids", "scores", "_positions")
+
+    def __init__(self, meals: Iterable[Meal]):
+        self.meals = tuple(meals)
+        self.ids = array("q", (meal.id for meal in self.meals))
+        self.scores = array("d", (meal.battle_score for meal in self.meals))
+        self._positions = {meal_id: position for position, meal_id in enumerate(self.ids)}
+
+    def __len__(self) -> int:
+        return len(self.meals)
+
+    def __getitem__(self, position: int) -> Meal:
+        return self.meals[position]
+
+    def position(self, meal_id: int) -> int:
+        """
+        Returns the position of the meal with the given ID.
+
+        Raises:
+            KeyError: If the meal is not in the batch
+        """
+        return self._positions[meal_id]
 
 
 def create_meal(meal: str, cuisine: str, price: float, difficulty: str) -> None:
@@ -42,7 +160,7 @@ def create_meal(meal: str, cuisine: str, price: float, difficulty: str) -> None:
         sqlite3.InegrityError: if the meal name already exists in the database
         sqlite3.Error: For any other database errors
     """
-    if not isinstance(price, (int, float)) or price <= 0:
+    if not isinstance(price, (int, float)) or not math.isfinite(price) or price <= 0:
         raise ValueError(f"Invalid price: {price}. Price must be a positive number.")
     if difficulty not in ['LOW', 'MED', 'HIGH']:
         raise ValueError(f"Invalid difficulty level: {difficulty}. Must be 'LOW', 'MED', or 'HIGH'.")
@@ -66,6 +184,104 @@ def create_meal(meal: str, cuisine: str, price: float, difficulty: str) -> None:
         logger.error("Database error: %s", str(e))
         raise e
 
+def _parse_meal_row(row: dict[str, Any]) -> tuple:
+    # Applies create_meal's validation to an imported record, whose values may be CSV strings
+    meal = str(row.get("meal") or "").strip()
+    cuisine = str(row.get("cuisine") or "").strip()
+    difficulty = str(row.get("difficulty") or "").strip()
+    if not meal or not cuisine:
+        raise ValueError("meal and cuisine are required")
+    try:
+        price = float(row.get("price"))
+    except (TypeError, ValueError):
+        price = None
+    if price is None or not math.isfinite(price) or price <= 0:
+        raise ValueError(f"Invalid price: {row.get('price')}. Price must be a positive number.")
+    if difficulty not in ['LOW', 'MED', 'HIGH']:
+        raise ValueError(f"Invalid difficulty level: {difficulty}. Must be 'LOW', 'MED', or 'HIGH'.")
+    return meal, cuisine, price, difficulty
+
+
+def bulk_create_meals(rows: Iterable[dict[str, Any]], batch_size: Optional[int]=None) -> dict[str, Any]:
+    """
+    Creates many meals at once, inserting them in batches.
+
+    Rows are validated as they are consumed, so `rows` can stream from a large
+    file. Each batch is checked against existing meal names with a single query
+    and inserted with one executemany and one commit. Duplicate and invalid
+    rows are reported rather than aborting the import.
+
+    Args:
+        rows (Iterable[dict]): Records with 'meal', 'cuisine', 'price' and 'difficulty' keys
+        batch_size (int, optional): Rows per transaction. Defaults to MEAL_IMPORT_BATCH_SIZE.
+
+    Returns:
+        dict[str, Any]: The number of meals created and the rejected 'duplicates' and 'invalid' rows
+
+    Raises:
+        sqlite3.Error: For any database errors other than duplicate names
+    """
+    summary = {"created": 0, "duplicates": [], "invalid": []}
+    seen = set()
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            for batch in batched(enumerate(rows, start=1), batch_size or MEAL_IMPORT_BATCH_SIZE):
+                pending = []
+                for row_number, row in batch:
+                    try:
+                        values = _parse_meal_row(row)
+                    except (AttributeError, ValueError) as e:
+                        summary["invalid"].append({"row": row_number, "error": str(e)})
+                        continue
+                    if values[0] in seen:
+                        summary["duplicates"].append(values[0])
+                    else:
+                        seen.add(values[0])
+                        pending.append(values)
+                if not pending:
+                    continue
+
+                placeholders = ", ".join("?" for _ in pending)
+                cursor.execute(f"SELECT meal FROM meals WHERE meal IN ({placeholders})", [values[0] for values in pending])
+                existing = {meal for (meal,) in cursor.fetchall()}
+                summary["duplicates"].extend(values[0] for values in pending if values[0] in existing)
+                pending = [values for values in pending if values[0] not in existing]
+                if not pending:
+                    continue
+
+                try:
+                    cursor.executemany("""
+                        INSERT INTO meals (meal, cuisine, price, difficulty)
+                        VALUES (?, ?, ?, ?)
+                    """, pending)
+                    conn.commit()
+                    summary["created"] += len(pending)
+                except sqlite3.IntegrityError:
+                    # Another writer inserted one of these names since the check; fall back to row by row
+                    conn.rollback()
+                    logger.warning("Bulk insert conflicted, retrying %d meals one at a time", len(pending))
+                    for values in pending:
+                        try:
+                            cursor.execute("""
+                                INSERT INTO meals (meal, cuisine, price, difficulty)
+                                VALUES (?, ?, ?, ?)
+                            """, values)
+                            conn.commit()
+                            summary["created"] += 1
+                        except sqlite3.IntegrityError:
+                            conn.rollback()
+                            summary["duplicates"].append(values[0])
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+    logger.info("Bulk meal import finished: %d created, %d duplicates, %d invalid",
+                summary["created"], len(summary["duplicates"]), len(summary["invalid"]))
+    return summary
+
 def clear_meals() -> None:
     """
     Recreates the meals table, effectively deleting all meals.
@@ -78,8 +294,16 @@ def clear_meals() -> None:
             create_table_script = fh.read()
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.executescript(create_table_script)
+            # Recreating the table drops its indexes; the ';' ends a script without a trailing semicolon.
+            # The battle log refers to the old meal IDs, so it starts over too.
+            cursor.executescript(create_table_script + "\n;" + LEADERBOARD_INDEXES_SQL
+                                 + "DROP TABLE IF EXISTS battle_results; DROP TABLE IF EXISTS battle_results_watermark;"
+                                 + BATTLE_RESULTS_SQL)
             conn.commit()
+            global _meal_versions_ready
+            _meal_versions_ready = False
+            leaderboard.invalidate()
+            meal_cache.clear()
 
             logger.info("Meals cleared successfully.")
 
@@ -113,6 +337,8 @@ def delete_meal(meal_id: int) -> None:
 
             cursor.execute("UPDATE meals SET deleted = TRUE WHERE id = ?", (meal_id,))
             conn.commit()
+            leaderboard.remove(meal_id)
+            meal_cache.invalidate(meal_id)
 
             logger.info("Meal with ID %s marked as deleted.", meal_id)
 
@@ -120,41 +346,59 @@ def delete_meal(meal_id: int) -> None:
         logger.error("Database error: %s", str(e))
         raise e
 
-def get_leaderboard(sort_by: str="wins") -> dict[str, Any]:
+def get_leaderboard(sort_by: str="wins", limit: Optional[int]=None) -> dict[str, Any]:
     """
     Retrieves the leaderboard of meals based on the specified sort order.
 
+    Reads are served from the materialized leaderboard, which is only loaded
+    from the database when it is first used or due for a refresh.
+
     Args:
         sort_by (str, optional): The field to sort the leaderboard by. Can be 'wins' or 'win_pct'. Defaults to 'wins'.
+        limit (int, optional): The number of meals to return. Defaults to all of them.
 
     Returns:
         dict[str, Any]: A list of meals with their corresponding stats
 
     Raises:
-        ValueError: If the sort_by parameter is not 'wins' or 'win_pct'
+        ValueError: If the sort_by parameter is not 'wins' or 'win_pct', or limit is negative
         sqlite3.Error: For any other database errors
     """
     query = """
-        SELECT id, meal, cuisine, price, difficulty, battles, wins, (wins * 1.0 / battles) AS win_pct
+        SELECT id, meal, cuisine, price, difficulty, battles, wins, version, (wins * 1.0 / battles) AS win_pct
         FROM meals WHERE deleted = false AND battles > 0
     """
 
+    # Ties are broken by ID, as in the materialized leaderboard and the paginated reads
     if sort_by == "win_pct":
-        query += " ORDER BY win_pct DESC"
+        query += " ORDER BY win_pct DESC, id DESC"
     elif sort_by == "wins":
-        query += " ORDER BY wins DESC"
+        query += " ORDER BY wins DESC, id DESC"
     else:
         logger.error("Invalid sort_by parameter: %s", sort_by)
         raise ValueError("Invalid sort_by parameter: %s" % sort_by)
 
+    if limit is not None and limit < 0:
+        raise ValueError(f"Invalid limit: {limit}. Must be a non-negative integer.")
+
+    cached = leaderboard.top(sort_by, limit)
+    if cached is not None:
+        return cached
+
+    ensure_meal_version_column()
     try:
+        token = leaderboard.begin_load()
         with get_db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(query)
             rows = cursor.fetchall()
 
-        leaderboard = []
-        for row in rows:
+        if leaderboard.enabled and leaderboard.load(rows, token):
+            logger.debug("Leaderboard retrieved successfully")
+            return leaderboard.top(sort_by, limit)
+
+        leaderboard_rows = []
+        for row in rows[:limit]:
             meal = {
                 'id': row[0],
                 'meal': row[1],
@@ -163,20 +407,253 @@ def get_leaderboard(sort_by: str="wins") -> dict[str, Any]:
                 'difficulty': row[4],
                 'battles': row[5],
                 'wins': row[6],
-                'win_pct': round(row[7] * 100, 1)  # Convert to percentage
+                'win_pct': round(row[8] * 100, 1)  # Convert to percentage
             }
-            leaderboard.append(meal)
+            leaderboard_rows.append(meal)
 
-        logger.info("Leaderboard retrieved successfully")
-        return leaderboard
+        logger.debug("Leaderboard retrieved successfully")
+        return leaderboard_rows
 
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
         raise e
 
+def ensure_leaderboard_indexes() -> None:
+    """
+    Creates the leaderboard indexes if they do not exist yet. Runs once per process.
+
+    Raises:
+        sqlite3.Error: For any database errors
+    """
+    global _leaderboard_indexes_ready
+    if _leaderboard_indexes_ready:
+        return
+    with _leaderboard_indexes_lock:
+        if _leaderboard_indexes_ready:
+            return
+        try:
+            with get_db_connection() as conn:
+                conn.cursor().executescript(LEADERBOARD_INDEXES_SQL)
+                conn.commit()
+            _leaderboard_indexes_ready = True
+            logger.info("Leaderboard indexes are in place.")
+
+        except sqlite3.Error as e:
+            logger.error("Database error while creating leaderboard indexes: %s", str(e))
+            raise e
+
+
+def ensure_battle_results_table() -> None:
+    """
+    Creates the battle_results log and its watermark if they do not exist yet. Runs once per process.
+
+    Raises:
+        sqlite3.Error: For any database errors
+    """
+    global _battle_results_ready
+    if _battle_results_ready:
+        return
+    with _battle_results_lock:
+        if _battle_results_ready:
+            return
+        try:
+            with get_db_connection() as conn:
+                conn.cursor().executescript(BATTLE_RESULTS_SQL)
+                conn.commit()
+            _battle_results_ready = True
+            logger.info("Battle results table is in place.")
+
+        except sqlite3.Error as e:
+            logger.error("Database error while creating the battle results table: %s", str(e))
+            raise e
+
+
+def ensure_meal_version_column() -> None:
+    """
+    Adds the version column to the meals table if it does not have one yet. Runs once per process.
+
+    Raises:
+        sqlite3.Error: For any database errors
+    """
+    global _meal_versions_ready
+    if _meal_versions_ready:
+        return
+    with _meal_versions_lock:
+        if _meal_versions_ready:
+            return
+        try:
+            with get_db_connection() as conn:
+                # Checked first so a migrated database does not go through a failing ALTER on every start
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(meals)")}
+                if "version" not in columns:
+                    conn.execute("ALTER TABLE meals ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+                    logger.info("Added the version column to the meals table.")
+        except sqlite3.OperationalError as e:
+            # Another process may add the column between the check and the ALTER
+            if "duplicate column name" not in str(e):
+                logger.error("Database error while adding the meals version column: %s", str(e))
+                raise e
+        _meal_versions_ready = True
+
+
+def _leaderboard_row(cursor: sqlite3.Cursor, row: tuple) -> dict[str, Any]:
+    # Row factory that builds the leaderboard entry straight from the SQLite row
+    return {
+        'id': row[0],
+        'meal': row[1],
+        'cuisine': row[2],
+        'price': row[3],
+        'difficulty': row[4],
+        'battles': row[5],
+        'wins': row[6],
+        'win_pct': round(row[7] * 100, 1)  # Convert to percentage
+    }
+
+
+def _encode_leaderboard_cursor(sort_by: str, meal: dict[str, Any]) -> str:
+    # wins / battles in Python is the same double SQLite computes for wins * 1.0 / battles
+    value = meal['wins'] if sort_by == "wins" else meal['wins'] / meal['battles']
+    return base64.urlsafe_b64encode(json.dumps([sort_by, value, meal['id']]).encode()).decode()
+
+
+def _decode_leaderboard_cursor(sort_by: str, cursor: str) -> tuple:
+    try:
+        cursor_sort_by, value, meal_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if cursor_sort_by != sort_by:
+            raise ValueError
+        return float(value), int(meal_id)
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError(f"Invalid leaderboard cursor: {cursor}")
+
+
+def _leaderboard_query(sort_by: str, cuisine: Optional[str], difficulty: Optional[str],
+                       after: Optional[tuple]) -> tuple:
+    if sort_by not in LEADERBOARD_SORT_EXPRESSIONS:
+        logger.error("Invalid sort_by parameter: %s", sort_by)
+        raise ValueError("Invalid sort_by parameter: %s" % sort_by)
+    if difficulty is not None and difficulty not in ['LOW', 'MED', 'HIGH']:
+        raise ValueError(f"Invalid difficulty level: {difficulty}. Must be 'LOW', 'MED', or 'HIGH'.")
+
+    order = LEADERBOARD_SORT_EXPRESSIONS[sort_by]
+    query = """
+        SELECT id, meal, cuisine, price, difficulty, battles, wins, (wins * 1.0 / battles) AS win_pct
+        FROM meals WHERE deleted = false AND battles > 0
+    """
+    params: list = []
+    if cuisine is not None:
+        query += " AND cuisine = ?"
+        params.append(cuisine)
+    if difficulty is not None:
+        query += " AND difficulty = ?"
+        params.append(difficulty)
+    if after is not None:
+        # Equivalent to (order, id) < (value, id), but written so SQLite seeks the index to the cursor
+        query += f" AND {order} <= ? AND ({order} < ? OR id < ?)"
+        params.extend([after[0], after[0], after[1]])
+    query += f" ORDER BY {order} DESC, id DESC"
+    return query, params
+
+
+def get_leaderboard_page(sort_by: str="wins", cuisine: Optional[str]=None, difficulty: Optional[str]=None,
+                         limit: int=LEADERBOARD_PAGE_SIZE, cursor: Optional[str]=None) -> dict[str, Any]:
+    """
+    Retrieves one page of the leaderboard, optionally filtered by cuisine and difficulty.
+
+    Pages are keyset-paginated: instead of an offset, each page returns a
+    cursor marking its last meal, and the next page is read from the index
+    starting right after it. Fetching page N costs the same as fetching page 1.
+    The unfiltered first page, by far the most requested, is served from the
+    materialized leaderboard; both use the same order, so its cursor carries
+    on into the indexed reads.
+
+    Args:
+        sort_by (str, optional): 'wins' or 'win_pct'. Defaults to 'wins'.
+        cuisine (str, optional): Only include meals of this cuisine
+        difficulty (str, optional): Only include meals of this difficulty (LOW, MED, HIGH)
+        limit (int, optional): The page size, at most LEADERBOARD_MAX_PAGE_SIZE. Defaults to LEADERBOARD_PAGE_SIZE.
+        cursor (str, optional): The `next_cursor` of the previous page. Defaults to the first page.
+
+    Returns:
+        dict[str, Any]: 'meals', the page of leaderboard entries, and 'next_cursor', or None on the last page
+
+    Raises:
+        ValueError: If sort_by, difficulty, limit or cursor is invalid
+        sqlite3.Error: For any other database errors
+    """
+    if not isinstance(limit, int) or not 0 < limit <= LEADERBOARD_MAX_PAGE_SIZE:
+        raise ValueError(f"Invalid limit: {limit}. Must be between 1 and {LEADERBOARD_MAX_PAGE_SIZE}.")
+    after = _decode_leaderboard_cursor(sort_by, cursor) if cursor is not None else None
+    query, params = _leaderboard_query(sort_by, cuisine, difficulty, after)
+    query += " LIMIT ?"
+    params.append(limit + 1)  # One extra row tells us whether there is a next page
+
+    ensure_leaderboard_indexes()
+    try:
+        if leaderboard.enabled and after is None and cuisine is None and difficulty is None:
+            meals = get_leaderboard(sort_by, limit + 1)
+        else:
+            with get_db_connection() as conn:
+                db_cursor = conn.cursor()
+                db_cursor.row_factory = _leaderboard_row
+                db_cursor.execute(query, params)
+                meals = db_cursor.fetchall()
+
+        next_cursor = None
+        if len(meals) > limit:
+            meals = meals[:limit]
+            next_cursor = _encode_leaderboard_cursor(sort_by, meals[-1])
+
+        logger.debug("Leaderboard page retrieved successfully")
+        return {'meals': meals, 'next_cursor': next_cursor}
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
+def iter_leaderboard(sort_by: str="wins", cuisine: Optional[str]=None,
+                     difficulty: Optional[str]=None) -> Iterator[dict[str, Any]]:
+    """
+    Streams the whole leaderboard, one meal at a time, in index order.
+
+    Rows are turned into leaderboard entries by a row factory as SQLite steps
+    through them, so memory use does not grow with the number of meals. The
+    calling thread's connection is held until the iterator is exhausted or closed.
+
+    Args:
+        sort_by (str, optional): 'wins' or 'win_pct'. Defaults to 'wins'.
+        cuisine (str, optional): Only include meals of this cuisine
+        difficulty (str, optional): Only include meals of this difficulty (LOW, MED, HIGH)
+
+    Yields:
+        dict[str, Any]: Leaderboard entries, best first
+
+    Raises:
+        ValueError: If sort_by or difficulty is invalid
+        sqlite3.Error: For any other database errors
+    """
+    # Validate before the generator starts, so bad arguments fail at the call
+    query, params = _leaderboard_query(sort_by, cuisine, difficulty, None)
+    ensure_leaderboard_indexes()
+    return _stream_leaderboard(query, params)
+
+
+def _stream_leaderboard(query: str, params: list) -> Iterator[dict[str, Any]]:
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = _leaderboard_row
+            cursor.execute(query, params)
+            yield from cursor
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
 def get_meal_by_id(meal_id: int) -> Meal:
     """
-    Retrieves a meal from the database based on the meal ID
+    Retrieves a meal based on the meal ID, from the meal cache when possible
 
     Args:
         meal_id (int): The ID of the meal to retrieve
@@ -188,7 +665,12 @@ def get_meal_by_id(meal_id: int) -> Meal:
         ValueError: If the meal with the given ID does not exist or has already been marked as deleted
         sqlite3.Error: For any other database errors
     """
+    cached = meal_cache.get(meal_id)
+    if cached is not None:
+        return cached
+
     try:
+        token = meal_cache.begin_read()
         with get_db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT id, meal, cuisine, price, difficulty, deleted FROM meals WHERE id = ?", (meal_id,))
@@ -198,7 +680,9 @@ def get_meal_by_id(meal_id: int) -> Meal:
                 if row[5]:
                     logger.info("Meal with ID %s has been deleted", meal_id)
                     raise ValueError(f"Meal with ID {meal_id} has been deleted")
-                return Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4])
+                meal = Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4])
+                meal_cache.put(meal, token)
+                return meal
             else:
                 logger.info("Meal with ID %s not found", meal_id)
                 raise ValueError(f"Meal with ID {meal_id} not found")
@@ -208,9 +692,54 @@ def get_meal_by_id(meal_id: int) -> Meal:
         raise e
 
 
+def get_meals_by_ids(meal_ids: Iterable[int]) -> dict[int, Meal]:
+    """
+    Retrieves many meals, querying the database once for those not in the meal cache
+
+    Args:
+        meal_ids (Iterable[int]): The IDs of the meals to retrieve
+
+    Returns:
+        dict[int, Meal]: The non-deleted meals found, keyed by ID. Missing and deleted IDs are left out.
+
+    Raises:
+        sqlite3.Error: For any database errors
+    """
+    meals = {}
+    missing = []
+    for meal_id in dict.fromkeys(meal_ids):
+        cached = meal_cache.get(meal_id)
+        if cached is not None:
+            meals[meal_id] = cached
+        else:
+            missing.append(meal_id)
+    if not missing:
+        return meals
+
+    placeholders = ", ".join("?" for _ in missing)
+    try:
+        token = meal_cache.begin_read()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT id, meal, cuisine, price, difficulty FROM meals
+                WHERE id IN ({placeholders}) AND deleted = false
+            """, missing)
+            rows = cursor.fetchall()
+
+        for row in rows:
+            meal = meals[row[0]] = Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4])
+            meal_cache.put(meal, token)
+        return meals
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
 def get_meal_by_name(meal_name: str) -> Meal:
     """
-    Retrieves a meal from the database based on the meal name
+    Retrieves a meal based on the meal name, from the meal cache when possible
 
     Args:
         meal_name (str): The name of the meal to retrieve
@@ -222,7 +751,12 @@ def get_meal_by_name(meal_name: str) -> Meal:
         ValueError: If the meal with the given name does not exist or has already been marked as deleted
         sqlite3.Error: For any other database errors
     """
+    cached = meal_cache.get_by_name(meal_name)
+    if cached is not None:
+        return cached
+
     try:
+        token = meal_cache.begin_read()
         with get_db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT id, meal, cuisine, price, difficulty, deleted FROM meals WHERE meal = ?", (meal_name,))
@@ -232,7 +766,9 @@ def get_meal_by_name(meal_name: str) -> Meal:
                 if row[5]:
                     logger.info("Meal with name %s has been deleted", meal_name)
                     raise ValueError(f"Meal with name {meal_name} has been deleted")
-                return Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4])
+                meal = Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4])
+                meal_cache.put(meal, token)
+                return meal
             else:
                 logger.info("Meal with name %s not found", meal_name)
                 raise ValueError(f"Meal with name {meal_name} not found")
@@ -242,10 +778,188 @@ def get_meal_by_name(meal_name: str) -> Meal:
         raise e
 
 
+def record_battle_result(winner_id: int, loser_id: int) -> None:
+    """
+    Records the outcome of a battle for both meals in a single transaction
+
+    Every battle is appended to the battle_results log. In 'sync' mode both
+    meal rows are also updated by one conditional UPDATE that skips deleted
+    meals, and the updated rows it returns are moved to their new places on
+    the materialized leaderboard. In 'async' mode the meal rows are only read
+    to check both meals exist, so hot meals are not write-locked per battle;
+    their stats catch up when aggregate_battle_results next runs.
+
+    Args:
+        winner_id (int): The ID of the winning meal
+        loser_id (int): The ID of the losing meal
+
+    Raises:
+        ValueError: If either meal does not exist or has been marked as deleted, in which case nothing is recorded
+        sqlite3.Error: For any other database errors
+    """
+    ensure_battle_results_table()
+    ensure_meal_version_column()
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            if BATTLE_STATS_MODE == "async":
+                rows = None
+                cursor.execute("""
+                    INSERT INTO battle_results (winner_id, loser_id)
+                    SELECT ?, ? WHERE (SELECT COUNT(*) FROM meals WHERE id IN (?, ?) AND deleted = false) = 2
+                """, (winner_id, loser_id, winner_id, loser_id))
+                recorded = cursor.rowcount == 1
+            else:
+                cursor.execute("""
+                    UPDATE meals SET battles = battles + 1, wins = wins + (id = ?), version = version + 1
+                    WHERE id IN (?, ?) AND deleted = false
+                    RETURNING id, meal, cuisine, price, difficulty, battles, wins, version
+                """, (winner_id, winner_id, loser_id))
+                rows = cursor.fetchall()
+                recorded = len(rows) == 2
+
+            if not recorded:
+                conn.rollback()
+                # Only on failure: find out which meal was the problem
+                cursor.execute("SELECT id, deleted FROM meals WHERE id IN (?, ?)", (winner_id, loser_id))
+                found = dict(cursor.fetchall())
+                for meal_id in (winner_id, loser_id):
+                    if meal_id not in found:
+                        logger.info("Meal with ID %s not found", meal_id)
+                        raise ValueError(f"Meal with ID {meal_id} not found")
+                    if found[meal_id]:
+                        logger.info("Meal with ID %s has been deleted", meal_id)
+                        raise ValueError(f"Meal with ID {meal_id} has been deleted")
+                raise ValueError(f"A meal cannot battle itself (ID {winner_id})")
+
+            if rows is not None:
+                cursor.execute("INSERT INTO battle_results (winner_id, loser_id, applied) VALUES (?, ?, true)",
+                               (winner_id, loser_id))
+            conn.commit()
+            if rows is not None:
+                leaderboard.update(rows)
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
+def aggregate_battle_results(batch_size: Optional[int]=None) -> int:
+    """
+    Folds battles logged in 'async' mode into the meals' stats
+
+    Reads up to `batch_size` battles past the watermark, tallies them per
+    meal and updates each meal once, advancing the watermark in the same
+    transaction. The transaction takes SQLite's write lock before reading, so
+    aggregators in several processes never count a battle twice. Battles of
+    meals deleted since are dropped.
+
+    Args:
+        batch_size (int, optional): The maximum number of battles to fold. Defaults to BATTLE_AGGREGATE_BATCH_SIZE.
+
+    Returns:
+        int: The number of battles read past the watermark; fewer than `batch_size` means the log is drained
+
+    Raises:
+        sqlite3.Error: For any database errors
+    """
+    ensure_battle_results_table()
+    ensure_meal_version_column()
+    batch_size = batch_size or BATTLE_AGGREGATE_BATCH_SIZE
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("SELECT last_id FROM battle_results_watermark WHERE id = 1")
+            (last_id,) = cursor.fetchone()
+            cursor.execute("""
+                SELECT id, winner_id, loser_id, applied FROM battle_results
+                WHERE id > ? ORDER BY id LIMIT ?
+            """, (last_id, batch_size))
+            events = cursor.fetchall()
+            if not events:
+                conn.rollback()
+                return 0
+
+            tallies: dict[int, list] = {}
+            for _, winner_id, loser_id, applied in events:
+                if applied:
+                    continue
+                tallies.setdefault(winner_id, [0, 0])
+                tallies.setdefault(loser_id, [0, 0])
+                tallies[winner_id][0] += 1
+                tallies[winner_id][1] += 1
+                tallies[loser_id][0] += 1
+
+            rows = []
+            for meal_id, (battles, wins) in tallies.items():
+                cursor.execute("""
+                    UPDATE meals SET battles = battles + ?, wins = wins + ?, version = version + 1
+                    WHERE id = ? AND deleted = false
+                    RETURNING id, meal, cuisine, price, difficulty, battles, wins, version
+                """, (battles, wins, meal_id))
+                rows.extend(cursor.fetchall())
+            cursor.execute("UPDATE battle_results_watermark SET last_id = ? WHERE id = 1", (events[-1][0],))
+            conn.commit()
+            leaderboard.update(rows)
+
+            logger.info("Aggregated %d battles into the stats of %d meals", len(events), len(rows))
+            return len(events)
+
+    except sqlite3.Error as e:
+        logger.error("Database error while aggregating battle results: %s", str(e))
+        raise e
+
+
+def record_tournament_results(results: dict[int, tuple]) -> None:
+    """
+    Records the outcome of many battles, e.g. a whole tournament, in a single transaction
+
+    Results are tallied per meal by the caller, so each meal is updated once
+    however many battles it fought.
+
+    Args:
+        results (dict[int, tuple]): (battles, wins) to add, keyed by meal ID
+
+    Raises:
+        ValueError: If any meal does not exist or has been marked as deleted, in which case none are updated
+        sqlite3.Error: For any other database errors
+    """
+    if not results:
+        return
+
+    ensure_meal_version_column()
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                UPDATE meals SET battles = battles + ?, wins = wins + ?, version = version + 1
+                WHERE id = ? AND deleted = false
+            """, [(battles, wins, meal_id) for meal_id, (battles, wins) in results.items()])
+
+            if cursor.rowcount != len(results):
+                conn.rollback()
+                logger.info("Tournament results not recorded: %d of %d meals are missing or deleted",
+                            len(results) - cursor.rowcount, len(results))
+                raise ValueError("Tournament results not recorded: a meal was not found or has been deleted")
+
+            conn.commit()
+            # Many meals moved at once; a reload is cheaper than repositioning each one
+            leaderboard.invalidate()
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
 def update_meal_stats(meal_id: int, result: str) -> None:
     """
     Updates the battle stats for a meal based on the result of a battle
 
+    The stats are incremented by one conditional UPDATE that skips deleted
+    meals, so concurrent updates of the same meal cannot lose each other's
+    increments and no read-modify-write retry is needed.
+
     Args:
         meal_id (int): The ID of the meal to update
         result (str): The result of the battle ('win' or 'loss')
@@ -255,27 +969,32 @@ def update_meal_stats(meal_id: int, result: str) -> None:
         ValueError: If the result is not 'win' or 'loss'
         sqlite3.Error: For any other database errors
     """
+    if result not in ('win', 'loss'):
+        raise ValueError(f"Invalid result: {result}. Expected 'win' or 'loss'.")
+
+    ensure_meal_version_column()
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT deleted FROM meals WHERE id = ?", (meal_id,))
-            try:
-                deleted = cursor.fetchone()[0]
-                if deleted:
-                    logger.info("Meal with ID %s has been deleted", meal_id)
-                    raise ValueError(f"Meal with ID {meal_id} has been deleted")
-            except TypeError:
-                logger.info("Meal with ID %s not found", meal_id)
-                raise ValueError(f"Meal with ID {meal_id} not found")
+            cursor.execute("""
+                UPDATE meals SET battles = battles + 1, wins = wins + ?, version = version + 1
+                WHERE id = ? AND deleted = false
+                RETURNING id, meal, cuisine, price, difficulty, battles, wins, version
+            """, (1 if result == 'win' else 0, meal_id))
+            rows = cursor.fetchall()
 
-            if result == 'win':
-                cursor.execute("UPDATE meals SET battles = battles + 1, wins = wins + 1 WHERE id = ?", (meal_id,))
-            elif result == 'loss':
-                cursor.execute("UPDATE meals SET battles = battles + 1 WHERE id = ?", (meal_id,))
-            else:
-                raise ValueError(f"Invalid result: {result}. Expected 'win' or 'loss'.")
+            if not rows:
+                conn.rollback()
+                # Only on failure: find out whether the meal is missing or deleted
+                cursor.execute("SELECT deleted FROM meals WHERE id = ?", (meal_id,))
+                if cursor.fetchone() is None:
+                    logger.info("Meal with ID %s not found", meal_id)
+                    raise ValueError(f"Meal with ID {meal_id} not found")
+                logger.info("Meal with ID %s has been deleted", meal_id)
+                raise ValueError(f"Meal with ID {meal_id} has been deleted")
 
             conn.commit()
+            leaderboard.update(rows)
 
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
@@ -0,0 +1,208 @@
+from bisect import bisect_left, insort
+import logging
+import os
+import threading
+import time
+from typing import Any, Iterable, List, Optional, Sequence
+
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Seconds before the materialized leaderboard is rebuilt from SQLite, which bounds how long
+# battles recorded by other processes can go unseen. 0 disables the materialized leaderboard.
+LEADERBOARD_REFRESH_SECONDS = float(os.getenv("LEADERBOARD_REFRESH_SECONDS", 30))
+
+SORT_FIELDS = ("wins", "win_pct")
+
+
+def _sort_key(sort_by: str, meal_id: int, battles: int, wins: int) -> tuple:
+    # Ascending order of the key is descending order of (field, ID), matching the SQL leaderboard
+    if sort_by == "wins":
+        return (-wins, -meal_id)
+    return (-(wins / battles), -meal_id)
+
+
+class MaterializedLeaderboard:
+    """
+    An in-memory leaderboard kept sorted by wins and by win percentage.
+
+    The leaderboard is loaded from the meals table once and then maintained
+    incrementally: recording a battle updates the two meals' positions, and
+    deleting a meal removes it, so a read never scans or sorts the table.
+    The longest top-K page rendered per sort order is cached until the next
+    change, and shorter pages are sliced from it.
+
+    Rows carry the meal's version, which every stats change bumps, so an
+    update that reaches the leaderboard after a newer one is ignored.
+
+    Each process keeps its own copy, rebuilt every `refresh_interval` seconds so
+    battles recorded by other processes show up eventually.
+
+    Attributes:
+        refresh_interval (float): Seconds after which the leaderboard must be reloaded
+        hits (int): The number of reads served from memory
+        misses (int): The number of reads that needed a reload
+    """
+
+    def __init__(self, refresh_interval: float = LEADERBOARD_REFRESH_SECONDS):
+        self.refresh_interval = refresh_interval
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: dict[int, tuple] = {}  # meal_id -> (id, meal, cuisine, price, difficulty, battles, wins)
+        self._orders: dict[str, List[tuple]] = {sort_by: [] for sort_by in SORT_FIELDS}
+        self._versions: dict[int, float] = {}  # meal_id -> version of the stats held
+        self._pages: dict[str, List[dict[str, Any]]] = {}  # sort_by -> longest rendered page
+        self._loaded_at: Optional[float] = None
+        self._version = 0  # bumped on every change, so a load cannot overwrite a newer update
+
+    @property
+    def enabled(self) -> bool:
+        return self.refresh_interval > 0
+
+    def top(self, sort_by: str, limit: Optional[int] = None) -> Optional[List[dict[str, Any]]]:
+        """
+        Returns the top `limit` meals, or None if the leaderboard has to be reloaded first.
+
+        Args:
+            sort_by (str): 'wins' or 'win_pct'
+            limit (Optional[int]): The number of meals to return. Defaults to all of them.
+
+        Returns:
+            Optional[List[dict]]: The leaderboard entries, best first
+        """
+        with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_interval:
+                self.misses += 1
+                return None
+            self.hits += 1
+            order = self._orders[sort_by]
+            count = len(order) if limit is None else min(limit, len(order))
+            page = self._pages.get(sort_by)
+            if page is None or len(page) < count:
+                page = self._pages[sort_by] = [_render(self._entries[-key[1]]) for key in order[:count]]
+        return [dict(entry) for entry in page[:count]]
+
+    def begin_load(self) -> int:
+        """
+        Returns a token to pass to `load`, taken before the leaderboard is read from the database.
+        """
+        with self._lock:
+            return self._version
+
+    def load(self, rows: Iterable[Sequence[Any]], token: int) -> bool:
+        """
+        Replaces the leaderboard with freshly queried rows.
+
+        The rows are discarded if the leaderboard changed since `token` was
+        taken, since they may predate that change.
+
+        Args:
+            rows (Iterable[Sequence]): Rows of (id, meal, cuisine, price, difficulty, battles, wins, version, ...)
+            token (int): The token returned by `begin_load` before the rows were queried
+
+        Returns:
+            bool: True if the rows were loaded
+        """
+        rows = list(rows)
+        versions = {row[0]: row[7] for row in rows}
+        entries = {row[0]: tuple(row[:7]) for row in rows if row[5] > 0}
+        orders = {sort_by: sorted(_sort_key(sort_by, row[0], row[5], row[6]) for row in entries.values())
+                  for sort_by in SORT_FIELDS}
+        with self._lock:
+            if token != self._version:
+                return False
+            self._entries, self._orders, self._versions, self._pages = entries, orders, versions, {}
+            self._loaded_at = time.monotonic()
+        logger.info("Loaded leaderboard with %d meals.", len(entries))
+        return True
+
+    def update(self, rows: Iterable[Sequence[Any]]) -> None:
+        """
+        Moves meals to their new positions after their battle stats changed.
+
+        Updates are applied after the database commit, so two of them can
+        arrive out of order; a row no newer than the stats already held for
+        its meal is skipped.
+
+        Args:
+            rows (Iterable[Sequence]): The meals' current (id, meal, cuisine, price, difficulty, battles, wins, version)
+        """
+        with self._lock:
+            self._version += 1
+            if self._loaded_at is None:
+                return
+            for row in rows:
+                if row[7] <= self._versions.get(row[0], -1):
+                    continue
+                self._versions[row[0]] = row[7]
+                self._discard(row[0])
+                if row[5] > 0:
+                    self._entries[row[0]] = tuple(row[:7])
+                    for sort_by in SORT_FIELDS:
+                        insort(self._orders[sort_by], _sort_key(sort_by, row[0], row[5], row[6]))
+            self._pages.clear()
+
+    def remove(self, meal_id: int) -> None:
+        """
+        Removes a meal, e.g. after it has been deleted.
+
+        Args:
+            meal_id (int): The ID of the meal
+        """
+        with self._lock:
+            self._version += 1
+            # Deleted meals never come back, so a late update from before the delete must not re-add it
+            self._versions[meal_id] = float("inf")
+            if self._discard(meal_id):
+                self._pages.clear()
+
+    def invalidate(self) -> None:
+        """
+        Drops the leaderboard so the next read reloads it from the database.
+        """
+        with self._lock:
+            self._version += 1
+            self._entries = {}
+            self._orders = {sort_by: [] for sort_by in SORT_FIELDS}
+            self._versions = {}
+            self._pages = {}
+            self._loaded_at = None
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns the number of meals held and the read hit rate.
+        """
+        reads = self.hits + self.misses
+        return {"meals": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / reads if reads else 0.0}
+
+    def _discard(self, meal_id: int) -> bool:
+        # Called with the lock held
+        row = self._entries.pop(meal_id, None)
+        if row is None:
+            return False
+        for sort_by in SORT_FIELDS:
+            order = self._orders[sort_by]
+            del order[bisect_left(order, _sort_key(sort_by, meal_id, row[5], row[6]))]
+        return True
+
+
+def _render(row: tuple) -> dict[str, Any]:
+    return {
+        'id': row[0],
+        'meal': row[1],
+        'cuisine': row[2],
+        'price': row[3],
+        'difficulty': row[4],
+        'battles': row[5],
+        'wins': row[6],
+        'win_pct': round(row[6] / row[5] * 100, 1)  # Convert to percentage
+    }
+
+
+leaderboard = MaterializedLeaderboard()
@@ -0,0 +1,136 @@
+from collections import OrderedDict
+import logging
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Optional
+
+from meal_max.utils.logger import configure_logger
+
+if TYPE_CHECKING:
+    from meal_max.models.kitchen_model import Meal
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+MEAL_CACHE_SIZE = int(os.getenv("MEAL_CACHE_SIZE", 10000))  # 0 disables the cache
+MEAL_CACHE_TTL = float(os.getenv("MEAL_CACHE_TTL", 60))
+
+
+class MealCache:
+    """
+    An LRU cache of Meal objects, looked up by ID or by name.
+
+    Meals are immutable, so cached objects are shared rather than copied. A
+    deleted meal is dropped as soon as it is deleted in this process; entries
+    expire after `ttl` seconds so deletions made by other processes are picked
+    up too. A meal read while a deletion was in progress is not cached, since
+    the read may predate it.
+
+    Attributes:
+        max_size (int): The maximum number of meals kept
+        ttl (float): Seconds a meal is served from the cache
+        hits (int): The number of lookups served from the cache
+        misses (int): The number of lookups that went to the database
+    """
+
+    def __init__(self, max_size: int = MEAL_CACHE_SIZE, ttl: float = MEAL_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._by_id: OrderedDict[int, tuple] = OrderedDict()  # meal_id -> (Meal, expires)
+        self._ids_by_name: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._generation = 0  # bumped on every invalidation, so a fill cannot cache a dropped meal
+
+    def get(self, meal_id: int) -> Optional["Meal"]:
+        """
+        Returns the cached meal with the given ID, or None on a miss.
+        """
+        with self._lock:
+            return self._lookup(meal_id)
+
+    def get_by_name(self, meal_name: str) -> Optional["Meal"]:
+        """
+        Returns the cached meal with the given name, or None on a miss.
+        """
+        with self._lock:
+            return self._lookup(self._ids_by_name.get(meal_name))
+
+    def begin_read(self) -> int:
+        """
+        Returns a token to pass to `put`, taken before the meal is read from the database.
+        """
+        with self._lock:
+            return self._generation
+
+    def put(self, meal: "Meal", token: int) -> None:
+        """
+        Caches a meal that was just read from the database.
+
+        The meal is not cached if any meal was invalidated since `token` was
+        taken, since it may have been read before being deleted.
+
+        Args:
+            meal (Meal): The meal read
+            token (int): The token returned by `begin_read` before the meal was read
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            if token != self._generation:
+                return
+            self._by_id[meal.id] = (meal, time.monotonic() + self.ttl)
+            self._by_id.move_to_end(meal.id)
+            self._ids_by_name[meal.meal] = meal.id
+            while len(self._by_id) > self.max_size:
+                _, (evicted, _) = self._by_id.popitem(last=False)
+                self._ids_by_name.pop(evicted.meal, None)
+
+    def invalidate(self, meal_id: int) -> None:
+        """
+        Drops a meal, e.g. after it has been deleted.
+        """
+        with self._lock:
+            self._generation += 1
+            self._drop(meal_id)
+
+    def clear(self) -> None:
+        """
+        Drops every meal, e.g. after the meals table has been recreated.
+        """
+        with self._lock:
+            self._generation += 1
+            self._by_id.clear()
+            self._ids_by_name.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns the cache size and hit rate.
+        """
+        lookups = self.hits + self.misses
+        return {"size": len(self._by_id), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
+    def _lookup(self, meal_id: Optional[int]) -> Optional["Meal"]:
+        # Called with the lock held
+        entry = self._by_id.get(meal_id) if meal_id is not None else None
+        if entry is None or entry[1] <= time.monotonic():
+            if entry is not None:
+                self._drop(meal_id)
+            self.misses += 1
+            return None
+        self._by_id.move_to_end(meal_id)
+        self.hits += 1
+        return entry[0]
+
+    def _drop(self, meal_id: int) -> None:
+        entry = self._by_id.pop(meal_id, None)
+        if entry is not None:
+            self._ids_by_name.pop(entry[0].meal, None)
+
+
+meal_cache = MealCache()
@@ -1,7 +1,10 @@
 import logging
 from typing import Any, List
 
-from meal_max.clients.mongo_client import sessions_collection
+from meal_max.models import session_write_behind
+from meal_max.models.combatant_codec import decode_combatants, encode_combatants
+from meal_max.models.session_store import get_session_store
+from meal_max.models.session_write_behind import session_writer
 from meal_max.utils.logger import configure_logger
 
 
@@ -11,14 +14,18 @@ configure_logger(logger)
 
 def login_user(user_id: int, battle_model) -> None:
     """
-    Load the user's combatants from MongoDB into the BattleModel's combatants list.
+    Load the user's combatants from the session store into the BattleModel's combatants list.
 
-    Checks if a session document exists for the given `user_id` in MongoDB.
-    If it exists, clears any current combatants in `battle_model` and loads
-    the stored combatants from MongoDB into `battle_model`.
+    Checks if a session exists for the given `user_id` in the session store
+    (MongoDB unless SESSION_STORE selects another backend). If it exists, clears
+    any current combatants in `battle_model` and loads the stored combatants
+    into `battle_model`, rehydrating them from the meals table in one query.
 
-    If no session is found, it creates a new session document for the user
-    with an empty combatants list in MongoDB.
+    If no session is found, it creates a new session for the user with an
+    empty combatants list.
+
+    Combatants saved by a logout that is still queued for write-behind are
+    loaded from the queue, so a quick re-login never sees stale data.
 
     Args:
         user_id (int): The ID of the user whose session is to be loaded.
@@ -26,50 +33,60 @@ def login_user(user_id: int, battle_model) -> None:
                                     will be loaded.
     """
     logger.info("Attempting to log in user with ID %d.", user_id)
-    session = sessions_collection.find_one({"user_id": user_id})
+    queued, combatants = session_writer.get_pending(user_id)
+    if queued:
+        session = {"user_id": user_id, "combatants": combatants}
+    else:
+        session = get_session_store().find(user_id)
 
     if session:
         logger.info("Session found for user ID %d. Loading combatants into BattleModel.", user_id)
         battle_model.clear_combatants()
-        for combatant in session.get("combatants", []):
+        for combatant in decode_combatants(session.get("combatants", [])):
             logger.debug("Preparing combatant: %s", combatant)
             battle_model.prep_combatant(combatant)
         logger.info("Combatants successfully loaded for user ID %d.", user_id)
     else:
         logger.info("No session found for user ID %d. Creating a new session with empty combatants list.", user_id)
-        sessions_collection.insert_one({"user_id": user_id, "combatants": []})
+        get_session_store().create(user_id)
         logger.info("New session created for user ID %d.", user_id)
 
 def logout_user(user_id: int, battle_model) -> None:
     """
-    Store the current combatants from the BattleModel back into MongoDB.
+    Store the current combatants from the BattleModel back into the session store.
 
     Retrieves the current combatants from `battle_model` and attempts to store them in
-    the MongoDB session document associated with the given `user_id`. If no session
-    document exists for the user, raises a `ValueError`.
+    the session associated with the given `user_id`. If no session exists for the
+    user, raises a `ValueError`.
+
+    Combatants are stored compactly as their meal IDs.
 
-    After saving the combatants to MongoDB, the combatants list in `battle_model` is
+    After saving the combatants, the combatants list in `battle_model` is
     cleared to ensure a fresh state for the next login.
 
+    When SESSION_WRITE_BEHIND is enabled, the update is queued and written in a
+    later batch instead, so a missing session document is only logged at flush time.
+
     Args:
         user_id (int): The ID of the user whose session data is to be saved.
         battle_model (BattleModel): An instance of `BattleModel` from which the user's
                                     current combatants are retrieved.
 
     Raises:
-        ValueError: If no session document is found for the user in MongoDB.
+        ValueError: If no session is found for the user in the session store
+                    (only when write-behind is disabled).
     """
     logger.info("Attempting to log out user with ID %d.", user_id)
-    combatants_data = battle_model.get_combatants()
+    combatants_data = encode_combatants(battle_model.get_combatants())
     logger.debug("Current combatants for user ID %d: %s", user_id, combatants_data)
 
-    result = sessions_collection.update_one(
-        {"user_id": user_id},
-        {"$set": {"combatants": combatants_data}},
-        upsert=False  # Prevents creating a new document if not found
-    )
+    if session_write_behind.SESSION_WRITE_BEHIND:
+        session_writer.enqueue(user_id, combatants_data)
+        logger.info("Combatants queued for saving for user ID %d. Clearing BattleModel combatants.", user_id)
+        battle_model.clear_combatants()
+        return
 
-    if result.matched_count == 0:
+    if not get_session_store().save(user_id, combatants_data):
         logger.error("No session found for user ID %d. Logout failed.", user_id)
         raise ValueError(f"User with ID {user_id} not found for logout.")
 
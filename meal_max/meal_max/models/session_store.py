@@ -0,0 +1,430 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import copy
+from datetime import datetime, timezone
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, List, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
+
+from meal_max.clients import mongo_client
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+SESSION_STORE = os.getenv("SESSION_STORE", "mongo")  # 'mongo', 'sqlite' or 'memory'
+SESSION_SQLITE_PATH = os.getenv("SESSION_SQLITE_PATH", "/app/db/sessions.db")
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", 30 * 24 * 3600))  # expire sessions idle this long
+# Size of the per-process read-through cache. Off by default: with several worker processes, a
+# login served by one process can read combatants another process has since saved over.
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", 0))
+SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", 300))
+
+INDEX_OPTIONS_CONFLICT = 85  # MongoDB error code for an existing index with different options
+
+
+class SessionStore(ABC):
+    """
+    Interface for persisting each user's session (their saved combatants).
+
+    Session documents have the shape {"user_id": int, "combatants": list}.
+    Finding, creating or saving a session marks it active; sessions left
+    inactive for longer than SESSION_TTL_SECONDS expire.
+    """
+
+    @abstractmethod
+    def find(self, user_id: int) -> Optional[dict[str, Any]]:
+        """
+        Retrieves the user's session and marks it active.
+
+        Args:
+            user_id (int): The ID of the user
+
+        Returns:
+            Optional[dict]: The session document, or None if the user has no session
+        """
+
+    @abstractmethod
+    def create(self, user_id: int) -> None:
+        """
+        Creates an empty session for the user.
+
+        Args:
+            user_id (int): The ID of the user
+        """
+
+    @abstractmethod
+    def save(self, user_id: int, combatants: List[Any]) -> bool:
+        """
+        Replaces the combatants of an existing session.
+
+        Args:
+            user_id (int): The ID of the user
+            combatants (List[Any]): The combatants to save
+
+        Returns:
+            bool: True if the user had a session, False if nothing was saved
+        """
+
+    def save_many(self, updates: dict[int, List[Any]]) -> int:
+        """
+        Replaces the combatants of many existing sessions in one batch.
+
+        Args:
+            updates (dict[int, List[Any]]): Combatants keyed by user ID
+
+        Returns:
+            int: The number of users that had a session
+        """
+        return sum(self.save(user_id, combatants) for user_id, combatants in updates.items())
+
+
+class MongoSessionStore(SessionStore):
+    """
+    Session store backed by the MongoDB `sessions` collection.
+
+    Documents carry a `last_active` timestamp with a TTL index on it, so MongoDB
+    deletes idle sessions itself. The index is created on first write.
+    """
+
+    def __init__(self, ttl_seconds: int = SESSION_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._index_ready = False
+
+    def _ensure_ttl_index(self) -> None:
+        if self._index_ready:
+            return
+        # Attempted once per store: sessions still work without the index, they just do not expire
+        self._index_ready = True
+        collection = mongo_client.sessions_collection
+        try:
+            collection.create_index("last_active", expireAfterSeconds=self.ttl_seconds)
+        except OperationFailure as e:
+            if e.code != INDEX_OPTIONS_CONFLICT:
+                logger.error("Failed to create TTL index on sessions: %s", str(e))
+                return
+            # The index exists with another TTL, e.g. after SESSION_TTL_SECONDS changed
+            try:
+                collection.database.command("collMod", collection.name, index={
+                    "keyPattern": {"last_active": 1}, "expireAfterSeconds": self.ttl_seconds
+                })
+                logger.info("Updated the TTL index on sessions to %d seconds", self.ttl_seconds)
+            except Exception as e:
+                logger.error("Failed to update TTL index on sessions: %s", str(e))
+        except Exception as e:
+            logger.error("Failed to create TTL index on sessions: %s", str(e))
+
+    def find(self, user_id: int) -> Optional[dict[str, Any]]:
+        return mongo_client.sessions_collection.find_one_and_update(
+            {"user_id": user_id}, {"$set": {"last_active": datetime.now(timezone.utc)}}
+        )
+
+    def create(self, user_id: int) -> None:
+        self._ensure_ttl_index()
+        mongo_client.sessions_collection.insert_one(
+            {"user_id": user_id, "combatants": [], "last_active": datetime.now(timezone.utc)}
+        )
+
+    def save(self, user_id: int, combatants: List[Any]) -> bool:
+        self._ensure_ttl_index()
+        result = mongo_client.sessions_collection.update_one(
+            {"user_id": user_id},
+            {"$set": {"combatants": combatants, "last_active": datetime.now(timezone.utc)}},
+            upsert=False  # Prevents creating a new document if not found
+        )
+        return result.matched_count > 0
+
+    def save_many(self, updates: dict[int, List[Any]]) -> int:
+        if not updates:
+            return 0
+        self._ensure_ttl_index()
+        now = datetime.now(timezone.utc)
+        operations = [
+            UpdateOne({"user_id": user_id}, {"$set": {"combatants": combatants, "last_active": now}}, upsert=False)
+            for user_id, combatants in updates.items()
+        ]
+        return mongo_client.sessions_collection.bulk_write(operations, ordered=False).matched_count
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Session store backed by a SQLite table, with combatants stored as JSON.
+
+    Uses a single connection guarded by a lock, which is plenty for local
+    development and single-process deployments. Expired sessions are ignored
+    on read and purged whenever a session is created.
+    """
+
+    def __init__(self, path: str = SESSION_SQLITE_PATH, ttl_seconds: int = SESSION_TTL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    user_id INTEGER PRIMARY KEY,
+                    combatants TEXT NOT NULL,
+                    last_active REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_last_active ON sessions (last_active)")
+            self._conn.commit()
+
+    def find(self, user_id: int) -> Optional[dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "UPDATE sessions SET last_active = ? WHERE user_id = ? AND last_active >= ? RETURNING combatants",
+                (now, user_id, now - self.ttl_seconds)
+            ).fetchone()
+            self._conn.commit()
+        if row is None:
+            return None
+        return {"user_id": user_id, "combatants": json.loads(row[0])}
+
+    def create(self, user_id: int) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE last_active < ?", (now - self.ttl_seconds,))
+            # Two first logins for the same user can race here; the second one keeps the first's session
+            self._conn.execute("INSERT INTO sessions (user_id, combatants, last_active) VALUES (?, '[]', ?) "
+                               "ON CONFLICT(user_id) DO NOTHING", (user_id, now))
+            self._conn.commit()
+
+    def save(self, user_id: int, combatants: List[Any]) -> bool:
+        return self.save_many({user_id: combatants}) > 0
+
+    def save_many(self, updates: dict[int, List[Any]]) -> int:
+        now = time.time()
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "UPDATE sessions SET combatants = ?, last_active = ? WHERE user_id = ? AND last_active >= ?",
+                [(json.dumps(combatants), now, user_id, now - self.ttl_seconds)
+                 for user_id, combatants in updates.items()]
+            )
+            self._conn.commit()
+            return self._conn.total_changes - before
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Session store kept in a process-local dict. Sessions are lost on restart.
+    """
+
+    def __init__(self, ttl_seconds: int = SESSION_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._sessions: dict[int, tuple[List[Any], float]] = {}  # user_id -> (combatants, last_active)
+        self._lock = threading.Lock()
+
+    def _live(self, user_id: int, now: float) -> bool:
+        entry = self._sessions.get(user_id)
+        if entry is not None and entry[1] < now - self.ttl_seconds:
+            del self._sessions[user_id]
+            return False
+        return entry is not None
+
+    def find(self, user_id: int) -> Optional[dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            if not self._live(user_id, now):
+                return None
+            combatants = self._sessions[user_id][0]
+            self._sessions[user_id] = (combatants, now)
+            return {"user_id": user_id, "combatants": copy.deepcopy(combatants)}
+
+    def create(self, user_id: int) -> None:
+        now = time.time()
+        with self._lock:
+            if not self._live(user_id, now):
+                self._sessions[user_id] = ([], now)
+
+    def save(self, user_id: int, combatants: List[Any]) -> bool:
+        now = time.time()
+        with self._lock:
+            if not self._live(user_id, now):
+                return False
+            self._sessions[user_id] = (copy.deepcopy(combatants), now)
+            return True
+
+
+class CachedSessionStore(SessionStore):
+    """
+    A read-through LRU cache in front of another session store.
+
+    Recently used sessions are served from process memory for up to `ttl`
+    seconds. Writes go through to the backing store and then refresh the
+    cache. A find that reads the backing store while a write is in progress
+    does not cache what it read, so it cannot pin the old document.
+    With several processes, a session saved elsewhere can be served stale for
+    up to `ttl` seconds, and a logout would then write the stale combatants
+    back, so the cache is opt-in (SESSION_CACHE_SIZE) and meant for
+    single-process deployments. Cache hits do not mark the backing session
+    active, which shifts its expiry by at most `ttl`.
+
+    Attributes:
+        hits (int): The number of finds served from the cache
+        misses (int): The number of finds that went to the backing store
+    """
+
+    def __init__(self, store: SessionStore, max_size: int = SESSION_CACHE_SIZE, ttl: float = SESSION_CACHE_TTL):
+        self.store = store
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict[int, tuple[List[Any], float]] = OrderedDict()  # user_id -> (combatants, expires)
+        self._lock = threading.Lock()
+        # Bumped by every write; finds only cache what they read if no write started or ended meanwhile
+        self._generation = 0
+        self._writes_in_progress = 0
+
+    def _put(self, user_id: int, combatants: List[Any], generation: Optional[int] = None) -> None:
+        with self._lock:
+            if generation is not None and (generation != self._generation or self._writes_in_progress):
+                return
+            self._cache[user_id] = (copy.deepcopy(combatants), time.monotonic() + self.ttl)
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+    def _invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._cache.pop(user_id, None)
+
+    def _begin_write(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._writes_in_progress += 1
+
+    def _end_write(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._writes_in_progress -= 1
+
+    def find(self, user_id: int) -> Optional[dict[str, Any]]:
+        with self._lock:
+            entry = self._cache.get(user_id)
+            if entry is not None and entry[1] > time.monotonic():
+                self._cache.move_to_end(user_id)
+                self.hits += 1
+                return {"user_id": user_id, "combatants": copy.deepcopy(entry[0])}
+            self.misses += 1
+            generation = self._generation
+
+        session = self.store.find(user_id)
+        if session is not None:
+            self._put(user_id, session.get("combatants", []), generation)
+        return session
+
+    def create(self, user_id: int) -> None:
+        # A racing login may already have created the session, so the next find reads whichever won
+        self._begin_write()
+        try:
+            self.store.create(user_id)
+        finally:
+            self._invalidate(user_id)
+            self._end_write()
+
+    def save(self, user_id: int, combatants: List[Any]) -> bool:
+        self._begin_write()
+        try:
+            saved = self.store.save(user_id, combatants)
+        finally:
+            self._invalidate(user_id)
+            self._end_write()
+        if saved:
+            self._put(user_id, combatants)
+        return saved
+
+    def save_many(self, updates: dict[int, List[Any]]) -> int:
+        # The backing store only reports a count, so drop rather than refresh the entries.
+        # Dropping them only once the write is done keeps a concurrent find from caching the old document.
+        self._begin_write()
+        try:
+            return self.store.save_many(updates)
+        finally:
+            for user_id in updates:
+                self._invalidate(user_id)
+            self._end_write()
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns the cache size and hit rate.
+        """
+        lookups = self.hits + self.misses
+        return {"size": len(self._cache), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
+
+_session_store: Optional[SessionStore] = None
+_session_store_lock = threading.Lock()
+
+
+def create_session_store(backend: str) -> SessionStore:
+    """
+    Creates a session store for the named backend.
+
+    Args:
+        backend (str): 'mongo', 'sqlite' or 'memory'
+
+    Returns:
+        SessionStore: The session store
+
+    Raises:
+        ValueError: If the backend is not supported
+    """
+    if backend == "mongo":
+        return MongoSessionStore()
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+    if backend == "memory":
+        return InMemorySessionStore()
+    raise ValueError(f"Invalid session store backend: {backend}. Must be 'mongo', 'sqlite' or 'memory'.")
+
+
+def get_session_store() -> SessionStore:
+    """
+    Returns the session store selected by SESSION_STORE, creating it on first use.
+
+    Unless SESSION_CACHE_SIZE is 0, the store is wrapped in a read-through cache.
+
+    Returns:
+        SessionStore: The session store
+    """
+    global _session_store
+    if _session_store is None:
+        with _session_store_lock:
+            if _session_store is None:
+                logger.info("Using '%s' session store.", SESSION_STORE)
+                store = create_session_store(SESSION_STORE)
+                if SESSION_CACHE_SIZE > 0:
+                    store = CachedSessionStore(store, SESSION_CACHE_SIZE)
+                _session_store = store
+    return _session_store
+
+
+def set_session_store(store: Optional[SessionStore]) -> None:
+    """
+    Replaces the session store, e.g. to use an in-memory store in tests.
+
+    Args:
+        store (Optional[SessionStore]): The store to use, or None to recreate it from SESSION_STORE
+    """
+    global _session_store
+    with _session_store_lock:
+        _session_store = store
@@ -0,0 +1,142 @@
+import atexit
+import logging
+import os
+import threading
+from typing import Any, List, Optional, Tuple
+
+from meal_max.models.session_store import get_session_store
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+SESSION_WRITE_BEHIND = os.getenv("SESSION_WRITE_BEHIND", "false").lower() == "true"
+SESSION_FLUSH_INTERVAL = float(os.getenv("SESSION_FLUSH_INTERVAL", 1.0))
+SESSION_FLUSH_BATCH_SIZE = int(os.getenv("SESSION_FLUSH_BATCH_SIZE", 500))
+
+
+class SessionWriteBehind:
+    """
+    A write-behind queue for session combatant updates.
+
+    Updates are coalesced per user (only the latest combatants list is kept) and
+    written with one batched save (a single `bulk_write` on MongoDB) when the
+    flush interval elapses or the batch size is reached. Pending updates are
+    flushed on shutdown.
+
+    Attributes:
+        flush_interval (float): Seconds between background flushes
+        batch_size (int): Number of pending users that triggers an early flush
+    """
+
+    def __init__(self, flush_interval: float = SESSION_FLUSH_INTERVAL, batch_size: int = SESSION_FLUSH_BATCH_SIZE):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending: dict[int, List[Any]] = {}
+        # The batch being written by flush(); still visible to get_pending until the write returns
+        self._inflight: dict[int, List[Any]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def enqueue(self, user_id: int, combatants: List[Any]) -> None:
+        """
+        Queues the user's combatants to be saved, replacing any update already queued for them.
+
+        Args:
+            user_id (int): The ID of the user
+            combatants (List[Any]): The combatants to save. The list is copied.
+        """
+        with self._lock:
+            self._pending[user_id] = list(combatants)
+            pending = len(self._pending)
+        self._ensure_started()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def get_pending(self, user_id: int) -> Tuple[bool, Optional[List[Any]]]:
+        """
+        Returns the user's queued combatants, so reads see writes that have not been flushed yet.
+
+        Args:
+            user_id (int): The ID of the user
+
+        Returns:
+            tuple: (True, combatants) if an update is queued, otherwise (False, None)
+        """
+        with self._lock:
+            if user_id in self._pending:
+                return True, list(self._pending[user_id])
+            if user_id in self._inflight:
+                return True, list(self._inflight[user_id])
+        return False, None
+
+    def flush(self) -> int:
+        """
+        Writes all queued updates to the session store in one batch.
+
+        Until the write returns, the batch stays visible to `get_pending`, so
+        a read during the flush never falls back to the store's older copy.
+        Updates that fail to be written are requeued unless a newer update for
+        the same user has arrived in the meantime.
+
+        Returns:
+            int: The number of sessions written
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+            if not batch:
+                return 0
+
+            try:
+                matched = get_session_store().save_many(batch)
+            except Exception as e:
+                logger.error("Failed to flush %d session updates: %s", len(batch), str(e))
+                with self._lock:
+                    for user_id, combatants in batch.items():
+                        self._pending.setdefault(user_id, combatants)
+                    self._inflight = {}
+                return 0
+            with self._lock:
+                self._inflight = {}
+
+            if matched < len(batch):
+                logger.warning("%d of %d flushed session updates had no session.",
+                               len(batch) - matched, len(batch))
+            logger.info("Flushed %d session updates.", len(batch))
+            return len(batch)
+
+    def close(self) -> None:
+        """
+        Stops the background flusher and durably flushes everything still queued.
+        """
+        self._stopped = True
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped = False
+                self._thread = threading.Thread(target=self._run, name="session-write-behind", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+session_writer = SessionWriteBehind()
+atexit.register(session_writer.close)
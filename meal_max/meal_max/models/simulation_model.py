@@ -0,0 +1,139 @@
+import logging
+import os
+import random
+from typing import Any, List, Optional
+
+from meal_max.models.kitchen_model import Meal, MealBatch, get_meals_by_ids
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+SIMULATION_DEFAULT_RUNS = int(os.getenv("SIMULATION_DEFAULT_RUNS", 10000))
+SIMULATION_MAX_RUNS = int(os.getenv("SIMULATION_MAX_RUNS", 100000))
+SIMULATION_MAX_MEALS = int(os.getenv("SIMULATION_MAX_MEALS", 200))
+SIMULATION_CHUNK_SIZE = int(os.getenv("SIMULATION_CHUNK_SIZE", 1 << 22))  # random draws held in memory at once
+# Battles the pure-Python fallback may simulate per request, about a quarter of a second's work
+SIMULATION_PYTHON_MAX_BATTLES = int(os.getenv("SIMULATION_PYTHON_MAX_BATTLES", 2000000))
+
+
+def _numpy():
+    # NumPy is optional; without it simulations run on the slower pure-Python path
+    try:
+        import numpy
+        return numpy
+    except ImportError:
+        return None
+
+
+def battle_scores(meals: List[Meal]):
+    """
+    Returns the battle scores of many meals as one array.
+
+    Args:
+        meals (List[Meal]): The meals to score
+
+    Returns:
+        numpy.ndarray or array: The scores, in meal order. A stdlib array of doubles if NumPy is not installed.
+    """
+    scores = MealBatch(meals).scores
+    np = _numpy()
+    # The batch's array is contiguous doubles, so NumPy wraps it without copying
+    return np.frombuffer(scores, dtype=np.float64) if np is not None else scores
+
+
+def simulate_win_probabilities(meal_ids: List[int], simulations: int = SIMULATION_DEFAULT_RUNS,
+                               seed: Optional[int] = None) -> dict[str, Any]:
+    """
+    Estimates how likely each meal is to beat each other meal by simulating battles.
+
+    Every pair of meals battles `simulations` times under the rule in
+    BattleModel.battle: the first combatant wins when the normalized score
+    difference exceeds a uniform random number. With NumPy, all pairs are
+    simulated together in vectorized chunks of at most SIMULATION_CHUNK_SIZE
+    draws. Nothing is written to the database.
+
+    Because the rule favours whichever meal is prepped first, entry [i][j] of
+    the matrix is the probability that meal i beats meal j when meal i is the
+    first combatant; meal j then wins with probability 1 - [i][j].
+
+    Args:
+        meal_ids (List[int]): The IDs of the meals to compare
+        simulations (int, optional): Battles simulated per pair. Defaults to SIMULATION_DEFAULT_RUNS.
+        seed (int, optional): Seed for reproducible results
+
+    Returns:
+        dict[str, Any]: The 'meal_ids', the number of 'simulations' per pair and the
+            'win_probability' matrix, with None on the diagonal
+
+    Raises:
+        ValueError: If fewer than two or more than SIMULATION_MAX_MEALS distinct meals are given,
+            a meal does not exist or has been deleted, simulations is out of range or seed is
+            not a non-negative integer. Without
+            NumPy, also if more than SIMULATION_PYTHON_MAX_BATTLES battles would be simulated.
+        sqlite3.Error: For any database errors
+    """
+    meal_ids = list(dict.fromkeys(meal_ids))
+    if not 2 <= len(meal_ids) <= SIMULATION_MAX_MEALS:
+        raise ValueError(f"A simulation needs between 2 and {SIMULATION_MAX_MEALS} meals, got {len(meal_ids)}.")
+    # type() rather than isinstance, which would let True and False through as 1 and 0
+    if type(simulations) is not int or not 0 < simulations <= SIMULATION_MAX_RUNS:
+        raise ValueError(f"Invalid simulations: {simulations}. Must be between 1 and {SIMULATION_MAX_RUNS}.")
+    if seed is not None and (type(seed) is not int or seed < 0):
+        raise ValueError(f"Invalid seed: {seed}. Must be a non-negative integer.")
+
+    battles = simulations * len(meal_ids) * (len(meal_ids) - 1) // 2
+    np = _numpy()
+    if np is None and battles > SIMULATION_PYTHON_MAX_BATTLES:
+        raise ValueError(f"Simulation too large: {battles} battles. Without NumPy at most "
+                         f"{SIMULATION_PYTHON_MAX_BATTLES} can be simulated; use fewer meals or simulations.")
+
+    meals = get_meals_by_ids(meal_ids)
+    for meal_id in meal_ids:
+        if meal_id not in meals:
+            raise ValueError(f"Meal with ID {meal_id} not found or has been deleted")
+
+    scores = battle_scores([meals[meal_id] for meal_id in meal_ids])
+    if np is None:
+        logger.warning("NumPy is not installed; simulating %d battles per pair in pure Python", simulations)
+        matrix = _simulate_python(scores, simulations, seed)
+    else:
+        matrix = _simulate_numpy(np, scores, simulations, seed)
+
+    logger.info("Simulated %d battles between %d meals", battles, len(meal_ids))
+    return {"meal_ids": meal_ids, "simulations": simulations, "win_probability": matrix}
+
+
+def _simulate_numpy(np, scores, simulations: int, seed: Optional[int]) -> List[list]:
+    count = len(scores)
+    rng = np.random.default_rng(seed)
+    first, second = np.triu_indices(count, k=1)
+    deltas = np.abs(scores[first] - scores[second]) / 100
+
+    # The rule is the same for either seating, so each unordered pair is simulated once
+    wins = np.zeros(len(deltas), dtype=np.int64)
+    chunk = max(1, SIMULATION_CHUNK_SIZE // len(deltas))
+    for start in range(0, simulations, chunk):
+        draws = rng.random((min(chunk, simulations - start), len(deltas)))
+        wins += (deltas > draws).sum(axis=0)
+
+    matrix = np.zeros((count, count))
+    matrix[first, second] = matrix[second, first] = wins / simulations
+    result = matrix.tolist()
+    for i in range(count):
+        result[i][i] = None
+    return result
+
+
+def _simulate_python(scores, simulations: int, seed: Optional[int]) -> List[list]:
+    count = len(scores)
+    rng = random.Random(seed)
+    result = [[None] * count for _ in range(count)]
+    for i in range(count):
+        for j in range(i + 1, count):
+            delta = abs(scores[i] - scores[j]) / 100
+            wins = sum(delta > rng.random() for _ in range(simulations))
+            result[i][j] = result[j][i] = wins / simulations
+    return result
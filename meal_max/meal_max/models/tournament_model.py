@@ -0,0 +1,136 @@
+import logging
+import os
+from typing import Any, List
+
+from meal_max.models.kitchen_model import Meal, MealBatch, get_meals_by_ids, record_tournament_results
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.random_utils import next_randoms
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+TOURNAMENT_MAX_MEALS = int(os.getenv("TOURNAMENT_MAX_MEALS", 1024))
+
+TOURNAMENT_FORMATS = ("single_elimination", "round_robin")
+
+
+def _first_wins(score_1: float, score_2: float, random_number: float) -> bool:
+    # The same rule as BattleModel.battle
+    return abs(score_1 - score_2) / 100 > random_number
+
+
+def run_tournament(meal_ids: List[int], fmt: str = "single_elimination", record: bool = True) -> dict[str, Any]:
+    """
+    Runs a whole tournament between many meals in one call.
+
+    Meals are loaded with one query into a MealBatch, and battles read the
+    precomputed scores from its array by position. All random numbers are
+    drawn in one batch, and every meal's battle and win totals are recorded in
+    a single transaction. Each battle is decided exactly as in BattleModel.battle.
+
+    In a single-elimination bracket, meals are paired in the order given and
+    the last meal of an odd-sized round gets a bye. In a round robin, every
+    meal battles every other meal once.
+
+    Args:
+        meal_ids (List[int]): The IDs of the meals entering, in seeding order
+        fmt (str, optional): 'single_elimination' or 'round_robin'. Defaults to 'single_elimination'.
+        record (bool, optional): Whether to add the results to the meals' stats. Defaults to True.
+
+    Returns:
+        dict[str, Any]: The 'champion', the number of 'battles', the 'standings' (best first)
+            and, for single elimination, the 'rounds' of (winner, loser) ID pairs
+
+    Raises:
+        ValueError: If the format is invalid, fewer than two or more than TOURNAMENT_MAX_MEALS
+            meals are entered, a meal is entered twice, or a meal does not exist or has been deleted
+        sqlite3.Error: For any other database errors
+    """
+    if fmt not in TOURNAMENT_FORMATS:
+        raise ValueError(f"Invalid tournament format: {fmt}. Must be 'single_elimination' or 'round_robin'.")
+    if not 2 <= len(meal_ids) <= TOURNAMENT_MAX_MEALS:
+        raise ValueError(f"A tournament needs between 2 and {TOURNAMENT_MAX_MEALS} meals, got {len(meal_ids)}.")
+    if len(set(meal_ids)) != len(meal_ids):
+        raise ValueError("A meal cannot enter a tournament twice.")
+
+    meals = get_meals_by_ids(meal_ids)
+    for meal_id in meal_ids:
+        if meal_id not in meals:
+            raise ValueError(f"Meal with ID {meal_id} not found or has been deleted")
+
+    # Everything below works on positions in the batch rather than on Meal objects
+    batch = MealBatch(meals[meal_id] for meal_id in meal_ids)
+    battles = [0] * len(batch)
+    wins = [0] * len(batch)
+
+    logger.info("Starting %s tournament with %d meals", fmt, len(batch))
+    if fmt == "single_elimination":
+        rounds = _single_elimination(batch, battles, wins)
+    else:
+        rounds = None
+        _round_robin(batch, battles, wins)
+
+    if record:
+        record_tournament_results({meal_id: (battles[position], wins[position])
+                                   for position, meal_id in enumerate(batch.ids)})
+
+    standings = sorted(range(len(batch)), key=lambda position: -wins[position])  # stable, so ties keep seeding order
+    champion = batch[batch.position(rounds[-1][0][0])] if rounds else batch[standings[0]]
+    logger.info("Tournament won by %s after %d battles", champion.meal, sum(battles) // 2)
+
+    result = {
+        "format": fmt,
+        "champion": _summary(champion),
+        "battles": sum(battles) // 2,
+        "standings": [dict(_summary(batch[position]), battles=battles[position], wins=wins[position])
+                      for position in standings],
+    }
+    if rounds is not None:
+        result["rounds"] = rounds
+    return result
+
+
+def _summary(meal: Meal) -> dict[str, Any]:
+    return {"id": meal.id, "meal": meal.meal}
+
+
+def _single_elimination(batch: MealBatch, battles: List[int], wins: List[int]) -> List[list]:
+    # A bracket of n meals always has n - 1 battles, so every random number is drawn up front
+    random_numbers = iter(next_randoms(len(batch) - 1))
+    scores, ids = batch.scores, batch.ids
+    rounds = []
+    remaining = list(range(len(batch)))
+    while len(remaining) > 1:
+        results = []
+        advancing = []
+        for first, second in zip(remaining[0::2], remaining[1::2]):
+            if _first_wins(scores[first], scores[second], next(random_numbers)):
+                winner, loser = first, second
+            else:
+                winner, loser = second, first
+            battles[winner] += 1
+            battles[loser] += 1
+            wins[winner] += 1
+            results.append((ids[winner], ids[loser]))
+            advancing.append(winner)
+        if len(remaining) % 2:
+            advancing.append(remaining[-1])  # bye
+        rounds.append(results)
+        remaining = advancing
+    return rounds
+
+
+def _round_robin(batch: MealBatch, battles: List[int], wins: List[int]) -> None:
+    count = len(batch)
+    scores = batch.scores
+    random_numbers = iter(next_randoms(count * (count - 1) // 2))
+    for first in range(count):
+        battles[first] += count - 1
+        first_score = scores[first]
+        for second in range(first + 1, count):
+            if _first_wins(first_score, scores[second], next(random_numbers)):
+                wins[first] += 1
+            else:
+                wins[second] += 1
@@ -1,10 +1,13 @@
-import hashlib
 import logging
 import os
+from typing import Any, Iterable
 
+from sqlalchemy import inspect, text
 from sqlalchemy.exc import IntegrityError
 
 from meal_max.db import db
+from meal_max.utils.hash_utils import hash_password, hash_passwords, needs_rehash, verify_password
+from meal_max.utils.import_utils import batched
 from meal_max.utils.logger import configure_logger
 
 
@@ -12,31 +15,68 @@ logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
+BULK_INSERT_BATCH_SIZE = int(os.getenv("BULK_INSERT_BATCH_SIZE", 500))
+
+
+def _parse_user_row(row: Any) -> tuple[str, str]:
+    # Applies the signup checks to an imported record, which may hold any JSON value
+    if not isinstance(row, dict):
+        raise ValueError("each row must be an object with username and password")
+    username, password = row.get("username"), row.get("password")
+    if not isinstance(username, str) or not isinstance(password, str):
+        raise ValueError("username and password must be strings")
+    username = username.strip()
+    if not username or not password:
+        raise ValueError("both username and password are required")
+    return username, password
+
+
 class Users(db.Model):
     __tablename__ = 'users'
 
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     salt = db.Column(db.String(32), nullable=False)  # 16-byte salt in hex
-    password = db.Column(db.String(64), nullable=False)  # SHA-256 hash in hex
+    password = db.Column(db.String(64), nullable=False)  # 32-byte KDF output in hex
+    kdf_params = db.Column(db.String(64), nullable=True)  # e.g. 'scrypt:n=16384,r=8,p=1', NULL for legacy SHA-256
     
     watchlist = db.relationship('Watchlist', back_populates='user', cascade='all, delete-orphan')
 
+    @classmethod
+    def ensure_kdf_params_column(cls) -> bool:
+        """
+        Adds the kdf_params column to a users table created before it existed.
+
+        db.create_all() never alters existing tables, so without this every
+        query on a legacy SHA-256 users table fails. Existing rows get NULL,
+        which marks them as legacy hashes to upgrade on their next login.
+
+        Returns:
+            bool: True if the column was added, False if it already existed.
+        """
+        columns = {column["name"] for column in inspect(db.engine).get_columns(cls.__tablename__)}
+        if "kdf_params" in columns:
+            return False
+        with db.engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {cls.__tablename__} ADD COLUMN kdf_params VARCHAR(64)"))
+        logger.info("Added kdf_params column to the %s table", cls.__tablename__)
+        return True
 
     @classmethod
-    def _generate_hashed_password(cls, password: str) -> tuple[str, str]:
+    def _generate_hashed_password(cls, password: str) -> tuple[str, str, str]:
         """
-        Generates a salted, hashed password.
+        Generates a salted, hashed password using the configured KDF.
+
+        The hash is computed in the bounded hashing pool so that bursts of
+        signups or logins cannot tie up every request thread.
 
         Args:
             password (str): The password to hash.
 
         Returns:
-            tuple: A tuple containing the salt and hashed password.
+            tuple: A tuple containing the salt, hashed password and KDF parameters.
         """
-        salt = os.urandom(16).hex()
-        hashed_password = hashlib.sha256((password + salt).encode()).hexdigest()
-        return salt, hashed_password
+        return hash_password(password)
 
     @classmethod
     def create_user(cls, username: str, password: str) -> None:
@@ -50,8 +90,8 @@ class Users(db.Model):
         Raises:
             ValueError: If a user with the username already exists.
         """
-        salt, hashed_password = cls._generate_hashed_password(password)
-        new_user = cls(username=username, salt=salt, password=hashed_password)
+        salt, hashed_password, kdf_params = cls._generate_hashed_password(password)
+        new_user = cls(username=username, salt=salt, password=hashed_password, kdf_params=kdf_params)
         try:
             db.session.add(new_user)
             db.session.commit()
@@ -59,17 +99,94 @@ class Users(db.Model):
         except IntegrityError:
             db.session.rollback()
             logger.error("Duplicate username: %s", username)
-            raise ValueError(f"User '{username}' already exists")
+            raise ValueError(f"User with username '{username}' already exists")
         except Exception as e:
             db.session.rollback()
             logger.error("Database error: %s", str(e))
             raise
 
+    @classmethod
+    def bulk_create_users(cls, rows: Iterable[dict[str, Any]], batch_size: int = None) -> dict[str, Any]:
+        """
+        Create many users at once, hashing passwords in parallel and inserting in batches.
+
+        Rows are consumed lazily, so `rows` can stream from a large file. Each batch
+        is checked against existing usernames with a single query, hashed across the
+        hashing pool and inserted with one bulk insert and one commit. Duplicate and
+        invalid rows are reported rather than aborting the import.
+
+        Args:
+            rows (Iterable[dict]): Records with 'username' and 'password' keys.
+            batch_size (int, optional): Rows per insert. Defaults to BULK_INSERT_BATCH_SIZE.
+
+        Returns:
+            dict: The number of users created and the rejected 'duplicates' and 'invalid' rows.
+        """
+        summary = {"created": 0, "duplicates": [], "invalid": []}
+        seen = set()
+
+        for batch in batched(enumerate(rows, start=1), batch_size or BULK_INSERT_BATCH_SIZE):
+            pending = []
+            for row_number, row in batch:
+                try:
+                    username, password = _parse_user_row(row)
+                except ValueError as e:
+                    summary["invalid"].append({"row": row_number, "error": str(e)})
+                    continue
+                if username in seen:
+                    summary["duplicates"].append(username)
+                else:
+                    seen.add(username)
+                    pending.append((username, password))
+
+            usernames = [username for username, _ in pending]
+            existing = {
+                username for (username,) in
+                db.session.query(cls.username).filter(cls.username.in_(usernames))
+            }
+            summary["duplicates"].extend(username for username in usernames if username in existing)
+            pending = [(username, password) for username, password in pending if username not in existing]
+            if not pending:
+                continue
+
+            hashes = hash_passwords(password for _, password in pending)
+            mappings = [
+                {"username": username, "salt": salt, "password": hashed_password, "kdf_params": kdf_params}
+                for (username, _), (salt, hashed_password, kdf_params) in zip(pending, hashes)
+            ]
+            try:
+                db.session.bulk_insert_mappings(cls, mappings)
+                db.session.commit()
+                summary["created"] += len(mappings)
+            except IntegrityError:
+                # Another writer inserted one of these names since the check; fall back to row by row
+                db.session.rollback()
+                logger.warning("Bulk insert conflicted, retrying %d users one at a time", len(mappings))
+                for mapping in mappings:
+                    try:
+                        db.session.add(cls(**mapping))
+                        db.session.commit()
+                        summary["created"] += 1
+                    except IntegrityError:
+                        db.session.rollback()
+                        summary["duplicates"].append(mapping["username"])
+            except Exception as e:
+                db.session.rollback()
+                logger.error("Database error: %s", str(e))
+                raise
+
+        logger.info("Bulk user import finished: %d created, %d duplicates, %d invalid",
+                    summary["created"], len(summary["duplicates"]), len(summary["invalid"]))
+        return summary
+
     @classmethod
     def check_password(cls, username: str, password: str) -> bool:
         """
         Check if a given password matches the stored password for a user.
 
+        If the password matches but was hashed with legacy SHA-256 or with
+        outdated KDF parameters, it is transparently rehashed with the current ones.
+
         Args:
             username (str): The username of the user.
             password (str): The password to check.
@@ -84,8 +201,19 @@ class Users(db.Model):
         if not user:
             logger.info("User %s not found", username)
             raise ValueError(f"User {username} not found")
-        hashed_password = hashlib.sha256((password + user.salt).encode()).hexdigest()
-        return hashed_password == user.password
+        if not verify_password(password, user.salt, user.password, user.kdf_params):
+            return False
+
+        if needs_rehash(user.kdf_params):
+            logger.info("Rehashing password for user %s with current KDF parameters", username)
+            try:
+                user.salt, user.password, user.kdf_params = cls._generate_hashed_password(password)
+                db.session.commit()
+            except Exception as e:
+                # The login itself succeeded; the upgrade is retried on the next login
+                db.session.rollback()
+                logger.error("Failed to rehash password for user %s: %s", username, str(e))
+        return True
 
     @classmethod
     def delete_user(cls, username: str) -> None:
@@ -143,8 +271,6 @@ class Users(db.Model):
             logger.info("User %s not found", username)
             raise ValueError(f"User {username} not found")
 
-        salt, hashed_password = cls._generate_hashed_password(new_password)
-        user.salt = salt
-        user.password = hashed_password
+        user.salt, user.password, user.kdf_params = cls._generate_hashed_password(new_password)
         db.session.commit()
         logger.info("Password updated successfully for user: %s", username)
\ No newline at end of file
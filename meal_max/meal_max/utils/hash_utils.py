@@ -0,0 +1,246 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+import atexit
+import hashlib
+import hmac
+import logging
+import os
+import threading
+from typing import Iterable, Optional
+
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# KDF settings, read from the environment with sensible defaults
+PASSWORD_KDF = os.getenv("PASSWORD_KDF", "scrypt")
+SCRYPT_N = int(os.getenv("SCRYPT_N", 2 ** 14))
+SCRYPT_R = int(os.getenv("SCRYPT_R", 8))
+SCRYPT_P = int(os.getenv("SCRYPT_P", 1))
+PBKDF2_ITERATIONS = int(os.getenv("PBKDF2_ITERATIONS", 600000))
+
+# Worker pool settings
+HASH_POOL_SIZE = int(os.getenv("HASH_POOL_SIZE", min(4, os.cpu_count() or 1)))
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", HASH_POOL_SIZE * 4))
+HASH_TIMEOUT = float(os.getenv("HASH_TIMEOUT", 5))
+# Bulk imports may hold at most this many of the pending slots, leaving the rest for logins
+HASH_BULK_MAX_PENDING = int(os.getenv("HASH_BULK_MAX_PENDING", max(1, HASH_MAX_PENDING // 2)))
+
+LEGACY_KDF = "sha256"
+DERIVED_KEY_LENGTH = 32  # 64 hex characters, same width as the legacy SHA-256 digest
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = threading.BoundedSemaphore(HASH_MAX_PENDING)
+_bulk_pending = threading.BoundedSemaphore(HASH_BULK_MAX_PENDING)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                logger.info("Starting password hashing pool with %d workers", HASH_POOL_SIZE)
+                _executor = ThreadPoolExecutor(max_workers=HASH_POOL_SIZE, thread_name_prefix="hash")
+    return _executor
+
+
+def shutdown_pool() -> None:
+    """
+    Shuts down the hashing pool, waiting for in-flight hashes to finish.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+atexit.register(shutdown_pool)
+
+
+def current_params() -> str:
+    """
+    Returns the encoded KDF parameters that new hashes are created with.
+
+    Returns:
+        str: The parameters, e.g. 'scrypt:n=16384,r=8,p=1' or 'pbkdf2_sha256:i=600000'
+
+    Raises:
+        ValueError: If PASSWORD_KDF is not a supported KDF
+    """
+    if PASSWORD_KDF == "scrypt":
+        return f"scrypt:n={SCRYPT_N},r={SCRYPT_R},p={SCRYPT_P}"
+    if PASSWORD_KDF == "pbkdf2_sha256":
+        return f"pbkdf2_sha256:i={PBKDF2_ITERATIONS}"
+    raise ValueError(f"Unsupported password KDF: {PASSWORD_KDF}")
+
+
+def parse_params(params: Optional[str]) -> tuple[str, dict[str, int]]:
+    """
+    Decodes KDF parameters stored alongside a password hash.
+
+    Args:
+        params (Optional[str]): The encoded parameters. None means a legacy SHA-256 hash.
+
+    Returns:
+        tuple: The KDF name and a dict of its integer settings.
+    """
+    if not params:
+        return LEGACY_KDF, {}
+    name, _, settings = params.partition(":")
+    values = {}
+    for item in filter(None, settings.split(",")):
+        key, _, value = item.partition("=")
+        values[key] = int(value)
+    return name, values
+
+
+def needs_rehash(params: Optional[str]) -> bool:
+    """
+    Checks whether a stored hash was created with different parameters than the current ones.
+
+    Args:
+        params (Optional[str]): The stored KDF parameters.
+
+    Returns:
+        bool: True if the password should be rehashed on the next successful login.
+    """
+    return params != current_params()
+
+
+def derive_key(password: str, salt: str, params: Optional[str]) -> str:
+    """
+    Derives a password hash synchronously in the calling thread.
+
+    Args:
+        password (str): The password to hash.
+        salt (str): The hex encoded salt.
+        params (Optional[str]): The encoded KDF parameters. None means legacy SHA-256.
+
+    Returns:
+        str: The hex encoded hash.
+
+    Raises:
+        ValueError: If the KDF is not supported.
+    """
+    name, values = parse_params(params)
+    if name == LEGACY_KDF:
+        return hashlib.sha256((password + salt).encode()).hexdigest()
+    if name == "scrypt":
+        n, r, p = values["n"], values["r"], values["p"]
+        return hashlib.scrypt(password.encode(), salt=bytes.fromhex(salt), n=n, r=r, p=p,
+                              maxmem=128 * n * r * p + 1024 * 1024, dklen=DERIVED_KEY_LENGTH).hex()
+    if name == "pbkdf2_sha256":
+        return hashlib.pbkdf2_hmac("sha256", password.encode(), bytes.fromhex(salt), values["i"],
+                                   dklen=DERIVED_KEY_LENGTH).hex()
+    raise ValueError(f"Unsupported password KDF: {name}")
+
+
+def _submit(fn, *args, timeout: Optional[float] = None) -> Future:
+    """
+    Submits a hashing function to the bounded pool.
+
+    By default a full pool is rejected at once, so request threads never wait
+    for a slot. Bulk callers pass a timeout to wait for one instead.
+
+    Raises:
+        RuntimeError: If the pool already has HASH_MAX_PENDING hashes queued or running.
+    """
+    acquired = _pending.acquire(blocking=False) if timeout is None else _pending.acquire(timeout=timeout)
+    if not acquired:
+        logger.error("Password hashing pool is saturated (%d pending).", HASH_MAX_PENDING)
+        raise RuntimeError("Password hashing pool is saturated.")
+    try:
+        future = _get_executor().submit(fn, *args)
+    except Exception:
+        _pending.release()
+        raise
+    future.add_done_callback(lambda _: _pending.release())
+    return future
+
+
+def _submit_bulk(fn, *args) -> Future:
+    """
+    Submits a bulk hashing function, waiting up to HASH_TIMEOUT for a slot.
+
+    Bulk work holds at most HASH_BULK_MAX_PENDING of the pool's slots, so a
+    large import cannot starve concurrent logins.
+
+    Raises:
+        RuntimeError: If no slot frees up within HASH_TIMEOUT.
+    """
+    if not _bulk_pending.acquire(timeout=HASH_TIMEOUT):
+        logger.error("Bulk password hashing is saturated (%d pending).", HASH_BULK_MAX_PENDING)
+        raise RuntimeError("Password hashing pool is saturated.")
+    try:
+        future = _submit(fn, *args, timeout=HASH_TIMEOUT)
+    except Exception:
+        _bulk_pending.release()
+        raise
+    future.add_done_callback(lambda _: _bulk_pending.release())
+    return future
+
+
+def _run_in_pool(fn, *args):
+    """
+    Runs a hashing function in the bounded pool and waits for its result.
+    """
+    return _submit(fn, *args).result()
+
+
+def hash_password(password: str) -> tuple[str, str, str]:
+    """
+    Generates a salt and hashes a password with the current KDF parameters.
+
+    Args:
+        password (str): The password to hash.
+
+    Returns:
+        tuple: The hex salt, the hex hash and the encoded KDF parameters.
+    """
+    salt = os.urandom(16).hex()
+    params = current_params()
+    return salt, _run_in_pool(derive_key, password, salt, params), params
+
+
+def hash_passwords(passwords: Iterable[str]) -> list[tuple[str, str, str]]:
+    """
+    Hashes many passwords in parallel across the hashing pool.
+
+    At most HASH_BULK_MAX_PENDING hashes are in flight at once; submission
+    waits up to HASH_TIMEOUT for a slot, so a large batch is throttled rather
+    than flooding the pool and starving logins.
+
+    Args:
+        passwords (Iterable[str]): The passwords to hash.
+
+    Returns:
+        list: One (salt, hash, KDF parameters) tuple per password, in input order.
+    """
+    params = current_params()
+    salts, futures = [], []
+    for password in passwords:
+        salt = os.urandom(16).hex()
+        salts.append(salt)
+        futures.append(_submit_bulk(derive_key, password, salt, params))
+    return [(salt, future.result(), params) for salt, future in zip(salts, futures)]
+
+
+def verify_password(password: str, salt: str, hashed_password: str, params: Optional[str]) -> bool:
+    """
+    Checks a password against a stored hash in constant time.
+
+    Args:
+        password (str): The password to check.
+        salt (str): The stored hex salt.
+        hashed_password (str): The stored hex hash.
+        params (Optional[str]): The stored KDF parameters. None means legacy SHA-256.
+
+    Returns:
+        bool: True if the password matches.
+    """
+    candidate = _run_in_pool(derive_key, password, salt, params)
+    return hmac.compare_digest(candidate, hashed_password)
@@ -0,0 +1,97 @@
+import codecs
+import csv
+import io
+from itertools import islice
+import json
+import logging
+from typing import IO, Any, Iterable, Iterator
+
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+SUPPORTED_FORMATS = ("csv", "json", "jsonl")
+
+
+def detect_format(filename: str) -> str:
+    """
+    Guesses the record format of an upload from its file name.
+
+    Args:
+        filename (str): The name of the uploaded file.
+
+    Returns:
+        str: One of 'csv', 'json' or 'jsonl'.
+
+    Raises:
+        ValueError: If the extension is not a supported format.
+    """
+    extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    if extension == "ndjson":
+        extension = "jsonl"
+    if extension not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported file format: '{filename}'. Expected one of {', '.join(SUPPORTED_FORMATS)}.")
+    return extension
+
+
+def iter_records(stream: IO, fmt: str) -> Iterator[dict[str, Any]]:
+    """
+    Streams records out of a CSV, JSON Lines or JSON array file.
+
+    CSV and JSON Lines are read one line at a time, so arbitrarily large files
+    can be imported in constant memory. A JSON array has to be parsed in one go.
+
+    Args:
+        stream (IO): A text or binary file object.
+        fmt (str): One of 'csv', 'json' or 'jsonl'.
+
+    Yields:
+        dict: One record per row / line / array element.
+
+    Raises:
+        ValueError: If the format is unsupported or a record cannot be parsed.
+    """
+    if fmt not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+    # Uploaded files are binary; decode them lazily rather than reading them into memory
+    if not isinstance(stream, io.TextIOBase):
+        stream = codecs.getreader("utf-8")(stream)
+
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+    elif fmt == "jsonl":
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on line {line_number}: {e}")
+    else:
+        try:
+            records = json.load(stream)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {e}")
+        if not isinstance(records, list):
+            raise ValueError("Expected a JSON array of records")
+        yield from records
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[list]:
+    """
+    Splits an iterable into lists of at most `size` items without materializing it.
+
+    Args:
+        iterable (Iterable): The items to split.
+        size (int): The maximum batch size.
+
+    Yields:
+        list: The next batch.
+    """
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
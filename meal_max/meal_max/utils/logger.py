@@ -1,26 +1,237 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import random
 import sys
+import threading
+import uuid
+from typing import Optional
 
-from flask import current_app, has_request_context
+from flask import Flask, g, has_request_context, request
+from flask.logging import default_handler
 
 
-def configure_logger(logger):
-    logger.setLevel(logging.DEBUG)  # Set the desired logging level here
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+# Per-logger overrides, e.g. "meal_max.utils.sql_utils=WARNING,meal_max.models=DEBUG".
+# The longest matching logger name prefix wins.
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # 'text' or 'json'
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))  # records beyond this are dropped rather than blocking
+# Share of DEBUG and INFO records kept from the loggers on the battle and kitchen hot paths.
+# Warnings and errors are always kept.
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", 1.0))
+LOG_SAMPLED_LOGGERS = os.getenv(
+    "LOG_SAMPLED_LOGGERS",
+    "meal_max.models.battle_model,meal_max.models.kitchen_model,meal_max.models.tournament_model"
+)
 
-    # Create a console handler that logs to stderr
-    handler = logging.StreamHandler(sys.stderr)
-    handler.setLevel(logging.DEBUG)
+# request_id is stamped on every record by RequestIdFilter, and is None outside a request
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] - %(message)s'
 
-    # Create a formatter with a timestamp
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
-    # Add the formatter to the handler
-    handler.setFormatter(formatter)
+def parse_levels(spec: str) -> dict[str, int]:
+    """
+    Parses a comma-separated list of logger=LEVEL overrides.
 
-    # Add the handler to the logger
-    logger.addHandler(handler)
+    Args:
+        spec (str): The overrides, e.g. "meal_max.utils.sql_utils=WARNING"
 
-    if has_request_context():
-        app_logger = current_app.logger
-        for handler in app_logger.handlers:
-            logger.addHandler(handler)
\ No newline at end of file
+    Returns:
+        dict[str, int]: The level for each logger name prefix
+
+    Raises:
+        ValueError: If an entry is malformed or names an unknown level
+    """
+    levels = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = entry.partition("=")
+        if not level or not isinstance(logging.getLevelName(level.strip().upper()), int):
+            raise ValueError(f"Invalid log level override: {entry}")
+        levels[name.strip()] = logging.getLevelName(level.strip().upper())
+    return levels
+
+
+def level_for(name: str, levels: dict[str, int], default: int) -> int:
+    """
+    Returns the level for a logger: the override with the longest matching prefix, or the default.
+    """
+    matches = [prefix for prefix in levels if name == prefix or name.startswith(prefix + ".")]
+    return levels[max(matches, key=len)] if matches else default
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Stamps each record with the ID of the request being handled, or None outside a request.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = g.get("request_id") if has_request_context() else None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a random `rate` share of DEBUG and INFO records, and every warning and error.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats each record as one JSON object per line.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "thread": record.threadName,
+        }
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the listener thread without ever blocking the caller.
+
+    Only the message arguments are merged in the calling thread; timestamps,
+    formatting and the write to stderr happen on the listener thread. When
+    the queue is full the record is dropped and counted.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Arguments may be mutable objects that change once the caller moves on, so merge them now
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+_levels: dict[str, int] = {}
+_sampled: frozenset = frozenset()
+_setup_lock = threading.Lock()
+
+
+def _setup() -> NonBlockingQueueHandler:
+    # Builds the pipeline once per process: a queue handler shared by every logger,
+    # drained by one listener thread that writes to stderr
+    global _queue_handler, _listener, _levels, _sampled
+    if _queue_handler is not None:
+        return _queue_handler
+    with _setup_lock:
+        if _queue_handler is None:
+            _levels = parse_levels(LOG_LEVELS)
+            _sampled = frozenset(name.strip() for name in LOG_SAMPLED_LOGGERS.split(",") if name.strip())
+
+            stream_handler = logging.StreamHandler(sys.stderr)
+            stream_handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+
+            log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+            handler = NonBlockingQueueHandler(log_queue)
+            handler.addFilter(RequestIdFilter())
+            _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+            _listener.start()
+            atexit.register(stop_logging)
+            if hasattr(os, 'register_at_fork'):
+                os.register_at_fork(after_in_child=_restart_listener)
+            _queue_handler = handler
+    return _queue_handler
+
+
+def _restart_listener() -> None:
+    # A forked worker inherits the queue but not the listener thread draining it
+    global _listener
+    if _listener is not None:
+        handler = _queue_handler
+        handler.queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        _listener = logging.handlers.QueueListener(handler.queue, *_listener.handlers)
+        _listener.start()
+
+
+def stop_logging() -> None:
+    """
+    Writes out every queued record and stops the listener thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def configure_logger(logger: logging.Logger) -> None:
+    """
+    Routes a logger through the shared non-blocking pipeline. Safe to call more than once.
+
+    The logger's level comes from LOG_LEVELS, falling back to LOG_LEVEL, and
+    loggers named in LOG_SAMPLED_LOGGERS keep only LOG_SAMPLE_RATE of their
+    DEBUG and INFO records.
+
+    Args:
+        logger (logging.Logger): The logger to configure
+    """
+    handler = _setup()
+    logger.setLevel(level_for(logger.name, _levels, logging.getLevelName(LOG_LEVEL.upper())))
+
+    # Flask attaches its own synchronous stderr handler to the app logger
+    logger.removeHandler(default_handler)
+
+    if handler not in logger.handlers:
+        logger.addHandler(handler)
+    if LOG_SAMPLE_RATE < 1 and logger.name in _sampled and not any(
+            isinstance(existing, SamplingFilter) for existing in logger.filters):
+        logger.addFilter(SamplingFilter(LOG_SAMPLE_RATE))
+
+
+def log_stats() -> dict[str, int]:
+    """
+    Returns the number of log records waiting to be written and dropped because the queue was full.
+    """
+    handler = _setup()
+    return {"queued": handler.queue.qsize(), "dropped": handler.dropped}
+
+
+def init_request_ids(app: Flask) -> None:
+    """
+    Gives every request an ID for its log records, taken from the X-Request-ID header
+    if the client sent one, and echoes it back in the response.
+
+    Args:
+        app (Flask): The application
+    """
+    @app.before_request
+    def assign_request_id():
+        # Client-supplied IDs are truncated so they cannot bloat every log line
+        g.request_id = request.headers.get("X-Request-ID", "")[:64] or uuid.uuid4().hex
+
+    @app.after_request
+    def echo_request_id(response):
+        response.headers["X-Request-ID"] = g.get("request_id", "")
+        return response
@@ -1,4 +1,11 @@
+from abc import ABC, abstractmethod
+from collections import deque
 import logging
+import os
+import random
+import threading
+from typing import List, Optional
+
 import requests
 
 from meal_max.utils.logger import configure_logger
@@ -7,18 +14,29 @@ logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
-def get_random() -> float:
+RNG_MODE = os.getenv("RNG_MODE", "buffered")  # 'buffered', 'random_org', 'local' or 'deterministic'
+RNG_SEED = int(os.getenv("RNG_SEED", 0))  # Seed for 'deterministic' mode
+RNG_BUFFER_SIZE = int(os.getenv("RNG_BUFFER_SIZE", 1000))
+RNG_BATCH_SIZE = int(os.getenv("RNG_BATCH_SIZE", 500))  # random.org allows up to 10,000 per request
+RNG_LOW_WATERMARK = int(os.getenv("RNG_LOW_WATERMARK", 250))
+RNG_MAX_BACKOFF = float(os.getenv("RNG_MAX_BACKOFF", 60))
+
+
+def fetch_randoms(num: int) -> List[float]:
     """
-    Fetches a random float between 0 and 1 from random.org
+    Fetches `num` random floats between 0 and 1 from random.org in a single request
+
+    Args:
+        num (int): How many numbers to fetch
 
     Returns:
-        float: The random number fetched from random.org
+        List[float]: The random numbers fetched from random.org
 
     Raises:
         RuntimeError: If the request to random.org fails or returns an invalid response
-        ValueError: If the response from random.org is not a valid float
+        ValueError: If the response from random.org is not a list of valid floats
     """
-    url = "https://www.random.org/decimal-fractions/?num=1&dec=2&col=1&format=plain&rnd=new"
+    url = f"https://www.random.org/decimal-fractions/?num={num}&dec=2&col=1&format=plain&rnd=new"
 
     try:
         # Log the request to random.org
@@ -29,15 +47,17 @@ def get_random() -> float:
         # Check if the request was successful
         response.raise_for_status()
 
-        random_number_str = response.text.strip()
+        random_number_strs = response.text.split()
 
         try:
-            random_number = float(random_number_str)
+            random_numbers = [float(random_number_str) for random_number_str in random_number_strs]
         except ValueError:
-            raise ValueError("Invalid response from random.org: %s" % random_number_str)
+            raise ValueError("Invalid response from random.org: %s" % response.text.strip())
+        if len(random_numbers) != num:
+            raise ValueError("Invalid response from random.org: expected %d numbers, got %d"
+                             % (num, len(random_numbers)))
 
-        logger.info("Received random number: %.3f", random_number)
-        return random_number
+        return random_numbers
 
     except requests.exceptions.Timeout:
         logger.error("Request to random.org timed out.")
@@ -46,3 +66,285 @@ def get_random() -> float:
     except requests.exceptions.RequestException as e:
         logger.error("Request to random.org failed: %s", e)
         raise RuntimeError("Request to random.org failed: %s" % e)
+
+
+def get_random() -> float:
+    """
+    Fetches a random float between 0 and 1 from random.org
+
+    This makes a blocking request per call; battles should use `next_random`,
+    which is served from the configured random source.
+
+    Returns:
+        float: The random number fetched from random.org
+
+    Raises:
+        RuntimeError: If the request to random.org fails or returns an invalid response
+        ValueError: If the response from random.org is not a valid float
+    """
+    random_number = fetch_randoms(1)[0]
+    logger.info("Received random number: %.3f", random_number)
+    return random_number
+
+
+class RandomSource(ABC):
+    """
+    Interface for the source of the random numbers that decide battles.
+    """
+
+    @abstractmethod
+    def random(self) -> float:
+        """
+        Returns a random float between 0 and 1.
+        """
+
+    def randoms(self, num: int) -> List[float]:
+        """
+        Returns `num` random floats between 0 and 1.
+        """
+        return [self.random() for _ in range(num)]
+
+    def stats(self) -> dict:
+        return {}
+
+
+class RandomOrgSource(RandomSource):
+    """
+    Fetches every number from random.org as it is needed, blocking on the request.
+    """
+
+    def random(self) -> float:
+        return get_random()
+
+    def randoms(self, num: int) -> List[float]:
+        return fetch_randoms(num) if num > 0 else []
+
+
+class LocalRandomSource(RandomSource):
+    """
+    Draws numbers from a local PRNG. With a seed, the sequence is reproducible.
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self.seed = seed
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def random(self) -> float:
+        with self._lock:
+            return self._random.random()
+
+    def randoms(self, num: int) -> List[float]:
+        with self._lock:
+            return [self._random.random() for _ in range(num)]
+
+    def reseed(self) -> None:
+        """
+        Reseeds an unseeded PRNG from the OS, e.g. so forked workers do not share a sequence.
+        """
+        if self.seed is None:
+            with self._lock:
+                self._random.seed()
+
+
+class BufferedRandomSource(RandomSource):
+    """
+    Serves random.org numbers from a buffer kept full by a background prefetcher.
+
+    The prefetcher fetches `batch_size` numbers per request whenever the buffer
+    drops below `low_watermark`, so battles never wait on random.org. When the
+    buffer is empty, or random.org is down, numbers come from `fallback` instead
+    while the prefetcher retries with exponential backoff.
+
+    Attributes:
+        capacity (int): The maximum number of buffered numbers
+        batch_size (int): Numbers fetched per request
+        low_watermark (int): Buffer size below which the prefetcher refills it
+    """
+
+    def __init__(self, capacity: int = RNG_BUFFER_SIZE, batch_size: int = RNG_BATCH_SIZE,
+                 low_watermark: int = RNG_LOW_WATERMARK, fallback: Optional[RandomSource] = None,
+                 fetch=fetch_randoms, max_backoff: float = RNG_MAX_BACKOFF):
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.low_watermark = low_watermark
+        self.fallback = fallback or LocalRandomSource()
+        self.max_backoff = max_backoff
+        self._fetch = fetch
+        self._buffer: deque = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid = os.getpid()
+        self._stopped = False
+        self.served_buffered = 0
+        self.served_fallback = 0
+        self.fetches = 0
+        self.fetch_failures = 0
+
+    def random(self) -> float:
+        return self.randoms(1)[0]
+
+    def randoms(self, num: int) -> List[float]:
+        self._check_fork()
+        with self._lock:
+            taken = [self._buffer.popleft() for _ in range(min(num, len(self._buffer)))]
+            self.served_buffered += len(taken)
+            self.served_fallback += num - len(taken)
+            low = len(self._buffer) < self.low_watermark
+        if len(taken) < num:
+            taken.extend(self.fallback.randoms(num - len(taken)))
+        if low:
+            self._ensure_started()
+            self._wakeup.set()
+        return taken
+
+    def fill(self) -> int:
+        """
+        Fetches one batch into the buffer, if there is room for it.
+
+        Returns:
+            int: The number of numbers added
+
+        Raises:
+            RuntimeError, ValueError: If random.org cannot be reached or returns an invalid response
+        """
+        with self._lock:
+            room = self.capacity - len(self._buffer)
+        num = min(self.batch_size, room)
+        if num <= 0:
+            return 0
+        numbers = self._fetch(num)
+        with self._lock:
+            self._buffer.extend(numbers)
+            self.fetches += 1
+        return len(numbers)
+
+    def close(self) -> None:
+        """
+        Stops the prefetcher.
+        """
+        self._stopped = True
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=10)
+
+    def stats(self) -> dict:
+        with self._lock:
+            buffered = len(self._buffer)
+        return {
+            "buffered": buffered,
+            "served_buffered": self.served_buffered,
+            "served_fallback": self.served_fallback,
+            "fetches": self.fetches,
+            "fetch_failures": self.fetch_failures,
+        }
+
+    def _check_fork(self) -> None:
+        # A forked worker inherits a copy of the buffer and PRNG state but not the prefetcher;
+        # drop the copy so workers never hand out the same numbers.
+        pid = os.getpid()
+        if pid != self._pid:
+            self._pid = pid
+            self._lock = threading.Lock()
+            self._buffer = deque(maxlen=self.capacity)
+            self._thread = None
+            if isinstance(self.fallback, LocalRandomSource):
+                self.fallback.reseed()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped = False
+                self._thread = threading.Thread(target=self._run, name="random-prefetch", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        backoff = 0.0
+        while not self._stopped:
+            with self._lock:
+                needed = len(self._buffer) < self.low_watermark
+            if needed:
+                try:
+                    self.fill()
+                    backoff = 0.0
+                    continue
+                except (RuntimeError, ValueError) as e:
+                    self.fetch_failures += 1
+                    backoff = min(self.max_backoff, backoff * 2 or 1.0)
+                    logger.warning("Prefetching random numbers failed, retrying in %.0fs: %s", backoff, str(e))
+                    self._wakeup.wait(backoff)
+                    continue
+            self._wakeup.wait()
+            self._wakeup.clear()
+
+
+_random_source: Optional[RandomSource] = None
+_random_source_lock = threading.Lock()
+
+
+def create_random_source(mode: str) -> RandomSource:
+    """
+    Creates a random source for the named mode.
+
+    Args:
+        mode (str): 'buffered', 'random_org', 'local' or 'deterministic' (a local PRNG seeded with RNG_SEED)
+
+    Returns:
+        RandomSource: The random source
+
+    Raises:
+        ValueError: If the mode is not supported
+    """
+    if mode == "buffered":
+        return BufferedRandomSource()
+    if mode == "random_org":
+        return RandomOrgSource()
+    if mode == "local":
+        return LocalRandomSource()
+    if mode == "deterministic":
+        return LocalRandomSource(seed=RNG_SEED)
+    raise ValueError(f"Invalid RNG mode: {mode}. Must be 'buffered', 'random_org', 'local' or 'deterministic'.")
+
+
+def get_random_source() -> RandomSource:
+    """
+    Returns the random source selected by RNG_MODE, creating it on first use.
+    """
+    global _random_source
+    if _random_source is None:
+        with _random_source_lock:
+            if _random_source is None:
+                logger.info("Using '%s' random source.", RNG_MODE)
+                _random_source = create_random_source(RNG_MODE)
+    return _random_source
+
+
+def set_random_source(source: Optional[RandomSource]) -> None:
+    """
+    Replaces the random source, e.g. with a seeded one in tests and benchmarks.
+
+    Args:
+        source (Optional[RandomSource]): The source to use, or None to recreate it from RNG_MODE
+    """
+    global _random_source
+    with _random_source_lock:
+        previous, _random_source = _random_source, source
+    if isinstance(previous, BufferedRandomSource) and previous is not source:
+        previous.close()
+
+
+def next_random() -> float:
+    """
+    Returns a random float between 0 and 1 from the configured random source.
+    """
+    return get_random_source().random()
+
+
+def next_randoms(num: int) -> List[float]:
+    """
+    Returns `num` random floats between 0 and 1 from the configured random source.
+    """
+    return get_random_source().randoms(num)
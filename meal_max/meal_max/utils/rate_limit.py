@@ -0,0 +1,170 @@
+from collections import deque
+import logging
+import os
+import threading
+import time
+import uuid
+
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # 'memory' or 'redis'
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+LOGIN_RATE_WINDOW = float(os.getenv("LOGIN_RATE_WINDOW", 60))
+LOGIN_RATE_LIMIT_PER_USER = int(os.getenv("LOGIN_RATE_LIMIT_PER_USER", 5))
+LOGIN_RATE_LIMIT_PER_IP = int(os.getenv("LOGIN_RATE_LIMIT_PER_IP", 20))
+
+
+class SlidingWindowLimiter:
+    """
+    An in-process sliding-window rate limiter.
+
+    Each key keeps the timestamps of its accepted hits within the window; a hit is
+    rejected once `limit` of them are still inside it.
+
+    Attributes:
+        limit (int): The maximum number of hits per key within the window
+        window (float): The window length in seconds
+        allowed (int): The number of hits accepted so far
+        rejected (int): The number of hits rejected so far
+    """
+
+    def __init__(self, limit: int, window: float, name: str = "limiter"):
+        self.limit = limit
+        self.window = window
+        self.name = name
+        self.allowed = 0
+        self.rejected = 0
+        self._hits: dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def hit(self, key: str) -> bool:
+        """
+        Records a hit for a key if it is under the limit.
+
+        Args:
+            key (str): The key to rate limit, e.g. a username or client IP
+
+        Returns:
+            bool: True if the hit is allowed, False if the key is over the limit
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._sweep(now)
+            hits = self._hits.setdefault(key, deque())
+            while hits and hits[0] <= now - self.window:
+                hits.popleft()
+            if len(hits) >= self.limit:
+                self.rejected += 1
+                return False
+            hits.append(now)
+            self.allowed += 1
+            return True
+
+    def retry_after(self, key: str) -> float:
+        """
+        Returns how many seconds until the key can make another hit.
+
+        Args:
+            key (str): The rate limited key
+
+        Returns:
+            float: Seconds until the oldest hit leaves the window, 0 if a hit is allowed now
+        """
+        with self._lock:
+            hits = self._hits.get(key)
+            if not hits or len(hits) < self.limit:
+                return 0.0
+            return max(0.0, hits[0] + self.window - time.monotonic())
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns the accepted and rejected hit counters.
+        """
+        return {"allowed": self.allowed, "rejected": self.rejected, "tracked_keys": len(self._hits)}
+
+    def _sweep(self, now: float) -> None:
+        # Drop idle keys once per window so the table does not grow with every attacker IP
+        if now - self._last_sweep < self.window:
+            return
+        self._last_sweep = now
+        for key in [key for key, hits in self._hits.items() if not hits or hits[-1] <= now - self.window]:
+            del self._hits[key]
+
+
+class RedisSlidingWindowLimiter(SlidingWindowLimiter):
+    """
+    A sliding-window rate limiter backed by Redis sorted sets, shared across processes.
+
+    The window check and the insert run atomically in a Lua script. Counters in
+    `stats` are per process.
+    """
+
+    _SCRIPT = """
+        redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1] - ARGV[2])
+        if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+            return 0
+        end
+        redis.call('ZADD', KEYS[1], ARGV[1], ARGV[4])
+        redis.call('PEXPIRE', KEYS[1], math.ceil(ARGV[2] * 1000))
+        return 1
+    """
+
+    def __init__(self, limit: int, window: float, name: str = "limiter", client=None):
+        super().__init__(limit, window, name)
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(REDIS_URL)
+        self._client = client
+        self._script = client.register_script(self._SCRIPT)
+
+    def hit(self, key: str) -> bool:
+        allowed = bool(self._script(keys=[f"ratelimit:{self.name}:{key}"],
+                                    args=[time.time(), self.window, self.limit, uuid.uuid4().hex]))
+        with self._lock:
+            if allowed:
+                self.allowed += 1
+            else:
+                self.rejected += 1
+        return allowed
+
+    def retry_after(self, key: str) -> float:
+        oldest = self._client.zrange(f"ratelimit:{self.name}:{key}", 0, 0, withscores=True)
+        if not oldest:
+            return 0.0
+        return max(0.0, oldest[0][1] + self.window - time.time())
+
+    def stats(self) -> dict[str, int]:
+        return {"allowed": self.allowed, "rejected": self.rejected}
+
+
+def create_limiter(limit: int, window: float, name: str) -> SlidingWindowLimiter:
+    """
+    Creates a limiter using the backend selected by RATE_LIMIT_BACKEND.
+
+    Args:
+        limit (int): The maximum number of hits per key within the window
+        window (float): The window length in seconds
+        name (str): A name for the limiter, used to namespace Redis keys
+
+    Returns:
+        SlidingWindowLimiter: The limiter
+
+    Raises:
+        ValueError: If RATE_LIMIT_BACKEND is not 'memory' or 'redis'
+    """
+    if RATE_LIMIT_BACKEND == "memory":
+        return SlidingWindowLimiter(limit, window, name)
+    if RATE_LIMIT_BACKEND == "redis":
+        logger.info("Using Redis rate limiter '%s' at %s", name, REDIS_URL)
+        return RedisSlidingWindowLimiter(limit, window, name)
+    raise ValueError(f"Invalid RATE_LIMIT_BACKEND: {RATE_LIMIT_BACKEND}")
+
+
+login_user_limiter = create_limiter(LOGIN_RATE_LIMIT_PER_USER, LOGIN_RATE_WINDOW, "login_user")
+login_ip_limiter = create_limiter(LOGIN_RATE_LIMIT_PER_IP, LOGIN_RATE_WINDOW, "login_ip")
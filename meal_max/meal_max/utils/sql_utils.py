@@ -2,6 +2,7 @@ from contextlib import contextmanager
 import logging
 import os
 import sqlite3
+import threading
 
 from meal_max.utils.logger import configure_logger
 
@@ -13,6 +14,14 @@ configure_logger(logger)
 # load the db path from the environment with a default value
 DB_PATH = os.getenv("DB_PATH", "/app/sql/meal_max.db")
 
+# Connection tuning, applied once to each pooled connection
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", -16000))  # negative values are KiB, so ~16 MB
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+
+_local = threading.local()
+
 
 def check_database_connection():
     try:
@@ -37,22 +46,53 @@ def check_table_exists(tablename: str):
         logger.error(error_message)
         raise Exception(error_message) from e
 
-###################################################
-#
-# This one yields rather than returns.
-# What is the type of the yielded value?
-#
-###################################################
+def _open_connection() -> sqlite3.Connection:
+    conn = sqlite3.connect(DB_PATH, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+    conn.execute(f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}")
+    conn.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+    conn.execute(f"PRAGMA cache_size = {SQLITE_CACHE_SIZE}")
+    conn.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+    logger.info("Opened database connection to %s in thread %s.", DB_PATH, threading.current_thread().name)
+    return conn
+
+def _get_thread_connection() -> sqlite3.Connection:
+    # Reuse this thread's connection unless it was opened by a parent process
+    # before a fork or against a different DB_PATH.
+    key = (os.getpid(), DB_PATH)
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "key", None) != key:
+        conn = _local.conn = _open_connection()
+        _local.key = key
+    return conn
+
+def close_db_connection() -> None:
+    """
+    Closes the calling thread's pooled connection, if it has one.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is not None and getattr(_local, "key", (None,))[0] == os.getpid():
+        conn.close()
+    _local.conn = None
+    _local.key = None
+
 @contextmanager
 def get_db_connection():
+    """
+    Yields the calling thread's pooled sqlite3.Connection.
+
+    Each thread keeps one connection open for its lifetime, configured with
+    the SQLITE_* pragmas (WAL journaling, synchronous=NORMAL, cache size and
+    busy timeout). Callers commit their own writes. Anything left uncommitted
+    when the block exits, including after an error, is rolled back so the
+    connection goes back clean.
+    """
     conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = _get_thread_connection()
         yield conn
     except sqlite3.Error as e:
         logger.error("Database connection error: %s", str(e))
         raise e
     finally:
-        if conn:
-            conn.close()
-            logger.info("Database connection closed.")
+        if conn is not None and conn.in_transaction:
+            conn.rollback()
@@ -0,0 +1,128 @@
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Tokens are signed with this secret. Without one, a random per-process secret is
+# used, which means tokens do not survive restarts or work across processes.
+SESSION_TOKEN_SECRET = os.getenv("SESSION_TOKEN_SECRET")
+SESSION_TOKEN_TTL = int(os.getenv("SESSION_TOKEN_TTL", 3600))
+REVOCATION_CACHE_SIZE = int(os.getenv("REVOCATION_CACHE_SIZE", 10000))
+
+if not SESSION_TOKEN_SECRET:
+    logger.warning("SESSION_TOKEN_SECRET is not set; using a random per-process secret.")
+    _secret = os.urandom(32)
+else:
+    _secret = SESSION_TOKEN_SECRET.encode()
+
+# token id -> expiry timestamp of revoked tokens that have not expired yet
+_revoked: dict[str, float] = {}
+_revoked_lock = threading.Lock()
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: str) -> str:
+    return _b64encode(hmac.new(_secret, payload.encode(), hashlib.sha256).digest())
+
+
+def issue_token(user_id: int, ttl: int = None) -> str:
+    """
+    Issues a signed, expiring session token for a user.
+
+    Args:
+        user_id (int): The ID of the user the token identifies.
+        ttl (int, optional): Lifetime in seconds. Defaults to SESSION_TOKEN_TTL.
+
+    Returns:
+        str: The token, in the form '<payload>.<signature>'.
+    """
+    claims = {
+        "uid": user_id,
+        "exp": int(time.time()) + (ttl if ttl is not None else SESSION_TOKEN_TTL),
+        "jti": _b64encode(os.urandom(12)),
+    }
+    payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+    logger.info("Issued session token for user ID %d", user_id)
+    return f"{payload}.{_sign(payload)}"
+
+
+def _decode(token: str) -> dict:
+    try:
+        payload, signature = token.split(".")
+    except (AttributeError, ValueError):
+        raise ValueError("Malformed session token")
+
+    # compare_digest only accepts ASCII strings, and a forged token may contain anything
+    if not hmac.compare_digest(signature.encode(), _sign(payload).encode()):
+        raise ValueError("Invalid session token signature")
+
+    try:
+        return json.loads(_b64decode(payload))
+    except ValueError:
+        raise ValueError("Malformed session token")
+
+
+def verify_token(token: str) -> int:
+    """
+    Validates a session token locally, without any database lookup.
+
+    Args:
+        token (str): The token issued by `issue_token`.
+
+    Returns:
+        int: The ID of the user the token identifies.
+
+    Raises:
+        ValueError: If the token is malformed, tampered with, expired or revoked.
+    """
+    claims = _decode(token)
+    if claims["exp"] < time.time():
+        raise ValueError("Session token has expired")
+    with _revoked_lock:
+        if claims["jti"] in _revoked:
+            raise ValueError("Session token has been revoked")
+    return claims["uid"]
+
+
+def revoke_token(token: str) -> None:
+    """
+    Revokes a session token until it expires.
+
+    Revocations are kept in a bounded in-process cache; expired entries are
+    purged first, and if the cache is still full the entry closest to expiry
+    is dropped.
+
+    Args:
+        token (str): The token to revoke.
+
+    Raises:
+        ValueError: If the token is malformed or tampered with.
+    """
+    claims = _decode(token)
+    now = time.time()
+    with _revoked_lock:
+        if len(_revoked) >= REVOCATION_CACHE_SIZE:
+            for jti in [jti for jti, exp in _revoked.items() if exp < now]:
+                del _revoked[jti]
+            if len(_revoked) >= REVOCATION_CACHE_SIZE:
+                del _revoked[min(_revoked, key=_revoked.get)]
+        _revoked[claims["jti"]] = claims["exp"]
+    logger.info("Revoked session token for user ID %d", claims["uid"])
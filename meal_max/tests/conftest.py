@@ -0,0 +1,41 @@
+import pytest
+from flask import Flask
+
+from meal_max.db import db
+from meal_max.models import user_model, watchlist_model  # noqa: F401
+from meal_max.models.session_store import set_session_store
+from meal_max.utils.random_utils import LocalRandomSource, set_random_source
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def session(app):
+    return db.session
+
+
+@pytest.fixture(autouse=True)
+def reset_session_store(mocker):
+    """Give every test a fresh session store and keep it from creating Mongo indexes."""
+    mocker.patch("meal_max.clients.mongo_client.sessions_collection.create_index")
+    set_session_store(None)
+    yield
+    set_session_store(None)
+
+
+@pytest.fixture(autouse=True)
+def deterministic_random():
+    """Keep battles in tests off the network with a seeded random source."""
+    set_random_source(LocalRandomSource(seed=0))
+    yield
+    set_random_source(None)
@@ -0,0 +1,110 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import inspect
+
+from app import create_app
+from meal_max.db import db
+from meal_max.utils import sql_utils
+from meal_max.utils.rate_limit import SlidingWindowLimiter
+
+
+@pytest.fixture
+def flask_app(tmp_path):
+    """Fixture to provide an app backed by a scratch SQLite file."""
+    return create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'watchlist.db'}",
+        "TMDB_READ_ACCESS_TOKEN": "token",
+        "START_BATTLE_AGGREGATOR": False,
+    })
+
+
+def test_create_app_is_repeatable(flask_app):
+    """Test that several apps can be created in one process, e.g. one per test."""
+    other = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:", "START_BATTLE_AGGREGATOR": False})
+
+    for app in (flask_app, other):
+        response = app.test_client().get("/api/health")
+        assert response.get_json() == {"status": "healthy"}
+        assert response.headers["X-Request-ID"]
+
+def test_create_app_does_not_create_tables(flask_app):
+    """Test that creating the app leaves the schema to the init-db command."""
+    with flask_app.app_context():
+        assert inspect(db.engine).get_table_names() == []
+
+def test_init_db_command(flask_app, mocker, tmp_path):
+    """Test that init-db creates the tables and, once meals exist, the meal indexes and battle log."""
+    mocker.patch.object(sql_utils, "DB_PATH", str(tmp_path / "meal_max.db"))
+    runner = flask_app.test_cli_runner()
+
+    result = runner.invoke(args=["init-db"])
+
+    assert "Created the user and watchlist tables" in result.output
+    assert "No meals table yet" in result.output
+    with flask_app.app_context():
+        assert {"users", "watchlist"} <= set(inspect(db.engine).get_table_names())
+
+    ensure = [mocker.patch(f"app.kitchen_model.{name}") for name in
+              ("ensure_leaderboard_indexes", "ensure_battle_results_table", "ensure_meal_version_column")]
+    with sqlite3.connect(sql_utils.DB_PATH) as conn:
+        conn.execute("CREATE TABLE meals (id INTEGER PRIMARY KEY)")
+
+    result = runner.invoke(args=["init-db"])
+
+    assert "Created the meal indexes and battle log" in result.output
+    for mock in ensure:
+        mock.assert_called_once_with()
+
+def test_tmdb_token_from_config(flask_app, mocker):
+    """Test that TMDB requests use the token the app was configured with."""
+    mock_get = mocker.patch("app.tmdb_get")
+    mock_get.return_value.json.return_value = {"results": [{"title": "Heat", "release_date": "1995-12-15"}]}
+
+    response = flask_app.test_client().get("/api/search-movie/heat")
+
+    assert response.get_json()[0]["title"] == "Heat"
+    mock_get.assert_called_once()
+    assert mock_get.call_args[0][:2] == ("/search/movie", "token")
+
+def test_tmdb_token_missing(flask_app):
+    flask_app.config["TMDB_READ_ACCESS_TOKEN"] = None
+
+    response = flask_app.test_client().get("/api/search-movie/heat")
+
+    assert response.status_code == 500
+    assert response.get_json() == {"error": "TMDB read access token not configured"}
+
+def test_non_ascii_token_rejected(flask_app):
+    """Test that a non-ASCII bearer token is a 401, not a server error."""
+    response = flask_app.test_client().post("/api/logout", headers={"Authorization": "Bearer é.é"})
+
+    assert response.status_code == 401
+
+@pytest.mark.parametrize("payload", [{"username": ["a"], "password": "x"}, {"username": "a", "password": 1}, ["a", "x"]])
+def test_login_rejects_non_string_credentials(flask_app, payload):
+    """Test that malformed credentials are a 400 rather than a server error."""
+    response = flask_app.test_client().post("/api/login", json=payload)
+
+    assert response.status_code == 400
+
+def test_login_user_limit_does_not_charge_ip(flask_app, mocker):
+    """Test that attempts rejected by the per-user limit do not use up the client IP's budget."""
+    user_limiter = mocker.patch("app.login_user_limiter", SlidingWindowLimiter(1, 60, "login_user"))
+    ip_limiter = mocker.patch("app.login_ip_limiter", SlidingWindowLimiter(10, 60, "login_ip"))
+    mocker.patch("app.Users.check_password", return_value=False)
+    client = flask_app.test_client()
+
+    statuses = [client.post("/api/login", json={"username": "a", "password": "x"}).status_code for _ in range(3)]
+
+    assert statuses == [401, 429, 429]
+    assert user_limiter.stats()["rejected"] == 2
+    assert ip_limiter.stats()["allowed"] == 1
+
+@pytest.mark.parametrize("payload", [{"meal_ids": [1, 2], "seed": "abc"}, {"meal_ids": [1, 2], "simulations": True}])
+def test_simulate_rejects_invalid_options(flask_app, payload):
+    """Test that a malformed seed or run count is a 400 rather than a server error."""
+    response = flask_app.test_client().post("/api/simulate", json=payload)
+
+    assert response.status_code == 400
@@ -0,0 +1,37 @@
+import sqlite3
+
+import pytest
+
+from meal_max.models.battle_aggregator import BattleResultAggregator
+
+
+def test_run_once_drains_log(mocker):
+    """Test that batches are folded until one comes back short."""
+    mock_aggregate = mocker.patch("meal_max.models.battle_aggregator.aggregate_battle_results",
+                                  side_effect=[2, 2, 1])
+    aggregator = BattleResultAggregator(interval=3600, batch_size=2)
+
+    assert aggregator.run_once() == 5
+
+    assert mock_aggregate.call_count == 3
+    mock_aggregate.assert_called_with(2)
+    assert aggregator.stats() == {"running": False, "aggregated": 5, "failures": 0}
+
+@pytest.mark.parametrize("error", [sqlite3.OperationalError("database is locked"), KeyError("winner_id")])
+def test_background_failure_retries(mocker, error):
+    """Test that a failed run, database error or not, is counted and the thread keeps running."""
+    calls = []
+    def aggregate(batch_size):
+        calls.append(batch_size)
+        if len(calls) == 1:
+            raise error
+        aggregator._stopped = True
+        return 0
+    mocker.patch("meal_max.models.battle_aggregator.aggregate_battle_results", side_effect=aggregate)
+    aggregator = BattleResultAggregator(interval=0.01, batch_size=10)
+
+    aggregator.start()
+    aggregator._thread.join(timeout=5)
+
+    assert len(calls) == 2
+    assert aggregator.stats()["failures"] == 1
@@ -0,0 +1,90 @@
+import threading
+
+import pytest
+
+from meal_max.models.battle_jobs import BattleJobQueue
+from meal_max.models.kitchen_model import Meal
+
+
+@pytest.fixture
+def jobs():
+    queue = BattleJobQueue(workers=2, max_depth=8, retention=3)
+    yield queue
+    queue.close()
+
+@pytest.fixture
+def meals(mocker):
+    meals = {
+        1: Meal(id=1, meal="Meal 1", cuisine="Italian", price=7.0, difficulty="LOW"),
+        2: Meal(id=2, meal="Meal 2", cuisine="Mexican", price=5.5, difficulty="HIGH"),
+    }
+    mocker.patch("meal_max.models.battle_jobs.get_meals_by_ids",
+                 side_effect=lambda meal_ids: {meal_id: meals[meal_id] for meal_id in meal_ids if meal_id in meals})
+    return meals
+
+def test_battle_job(jobs, meals, mocker):
+    """Test that a battle job is processed by a worker and its winner stored."""
+    mock_record = mocker.patch("meal_max.models.battle_model.record_battle_result")
+
+    job = jobs.submit("battle", [1, 2])
+    jobs.join()
+
+    assert jobs.get(job.id) is job
+    assert job.status == "done"
+    assert job.result["winner"] in ("Meal 1", "Meal 2")
+    assert job.started_at is not None and job.finished_at >= job.started_at
+    mock_record.assert_called_once()
+    assert jobs.stats()["completed"] == 1
+
+def test_tournament_job(jobs, mocker):
+    """Test that a tournament job runs the tournament with the given format."""
+    mock_tournament = mocker.patch("meal_max.models.battle_jobs.run_tournament", return_value={"battles": 1})
+
+    job = jobs.submit("tournament", [1, 2], "round_robin")
+    jobs.join()
+
+    mock_tournament.assert_called_once_with([1, 2], "round_robin")
+    assert job.to_dict()["result"] == {"battles": 1}
+
+def test_failed_job(jobs, meals):
+    """Test that a job's error is recorded rather than lost."""
+    job = jobs.submit("battle", [1, 99])
+    jobs.join()
+
+    assert job.status == "failed"
+    assert job.error == "Meal with ID 99 not found or has been deleted"
+    assert jobs.stats()["failed"] == 1
+
+def test_invalid_kind(jobs):
+    """Test that an unknown job kind is rejected before it is queued."""
+    with pytest.raises(ValueError, match="Invalid job kind: duel"):
+        jobs.submit("duel", [1, 2])
+
+def test_queue_full(jobs):
+    """Test that submitting to a full queue fails fast instead of blocking."""
+    release = threading.Event()
+    for _ in range(jobs.workers):
+        jobs.submit_callable("battle", release.wait)
+    for _ in range(500):
+        if jobs.stats()["running"] == jobs.workers:
+            break
+        threading.Event().wait(0.01)
+    for _ in range(jobs.max_depth):
+        jobs.submit_callable("battle", release.wait)
+
+    with pytest.raises(RuntimeError, match="Battle job queue is full."):
+        jobs.submit_callable("battle", release.wait)
+
+    release.set()
+    jobs.join()
+    assert jobs.stats()["rejected"] == 1
+    assert jobs.stats()["completed"] == jobs.workers + jobs.max_depth
+
+def test_retention(jobs):
+    """Test that only the most recently finished jobs are kept for lookups."""
+    submitted = [jobs.submit_callable("battle", lambda: None) for _ in range(5)]
+    jobs.join()
+
+    kept = [job for job in submitted if jobs.get(job.id) is not None]
+    assert len(kept) == jobs.retention
+    assert jobs.get("unknown") is None
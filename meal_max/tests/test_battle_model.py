@@ -1,3 +1,6 @@
+import threading
+import time
+
 import pytest
 from unittest.mock import patch
 from meal_max.models.battle_model import BattleModel
@@ -9,9 +12,9 @@ def battle_model():
     return BattleModel()
 
 @pytest.fixture
-def mock_update_meal_stats(mocker):
-    """Fixture to provide a mock for the update_meal_stats function."""
-    return mocker.patch("meal_max.models.battle_model.update_meal_stats")
+def mock_record_battle_result(mocker):
+    """Fixture to provide a mock for the record_battle_result function."""
+    return mocker.patch("meal_max.models.battle_model.record_battle_result")
 
 @pytest.fixture
 def sample_meal1():
@@ -58,10 +61,10 @@ def test_get_battle_score(battle_model, sample_meal1, sample_meal2):
     assert score1 == (sample_meal1.price * len(sample_meal1.cuisine)) - 1, "Score calculation for meal1 is incorrect"
     assert score2 == (sample_meal2.price * len(sample_meal2.cuisine)) - 3, "Score calculation for meal2 is incorrect"
 
-@patch("meal_max.models.battle_model.get_random", return_value=0.5)
-@patch("meal_max.models.battle_model.update_meal_stats")
+@patch("meal_max.models.battle_model.next_random", return_value=0.5)
+@patch("meal_max.models.battle_model.record_battle_result")
 
-def test_battle(mock_update_meal_stats, mock_random, battle_model, sample_meal1, sample_meal2):
+def test_battle(mock_record_battle_result, mock_random, battle_model, sample_meal1, sample_meal2):
     """Test conducting a battle between two combatants."""
     battle_model.prep_combatant(sample_meal1)
     battle_model.prep_combatant(sample_meal2)
@@ -71,10 +74,9 @@ def test_battle(mock_update_meal_stats, mock_random, battle_model, sample_meal1,
     # Simulate a battle between the two combatants
     winner = battle_model.battle()
 
-    # Since the delta (20/100 = 0.2) is less than get_random (0.5), meal2 should win
+    # Since the delta (20/100 = 0.2) is less than next_random (0.5), meal2 should win
     assert winner == sample_meal2.meal, "meal2 should be the winner based on battle logic"
-    mock_update_meal_stats.assert_any_call(sample_meal2.id, 'win')
-    mock_update_meal_stats.assert_any_call(sample_meal1.id, 'loss')
+    mock_record_battle_result.assert_called_once_with(sample_meal2.id, sample_meal1.id)
 
     assert sample_meal1 not in battle_model.get_combatants(), "Losing combatant should be removed from combatants list"
     assert sample_meal2 in battle_model.get_combatants(), "Winning combatant should remain in combatants list"
@@ -95,3 +97,27 @@ def test_clear_combatants(battle_model, sample_meal1, sample_meal2):
     battle_model.clear_combatants()
     assert len(battle_model.get_combatants()) == 0, "Combatants list should be empty after clearing"
     assert battle_model.get_combatants() == [], "Combatants list should be empty after clearing"
+
+def test_concurrent_battles_on_shared_model(battle_model, sample_meal1, sample_meal2, mocker):
+    """Test that two requests battling the same model at once cannot both use the same combatants."""
+    mock_record = mocker.patch("meal_max.models.battle_model.record_battle_result",
+                               side_effect=lambda winner_id, loser_id: time.sleep(0.05))
+    battle_model.prep_combatant(sample_meal1)
+    battle_model.prep_combatant(sample_meal2)
+    errors = []
+
+    def battle():
+        try:
+            battle_model.battle()
+        except ValueError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=battle) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert mock_record.call_count == 1
+    assert errors == ["Two combatants must be prepped for a battle."]
+    assert len(battle_model.get_combatants()) == 1
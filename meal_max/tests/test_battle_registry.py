@@ -0,0 +1,130 @@
+import time
+
+import pytest
+
+from meal_max.models.battle_model import BattleModel
+from meal_max.models.battle_registry import BattleModelRegistry
+from meal_max.models.kitchen_model import Meal
+
+
+@pytest.fixture
+def clock(mocker):
+    """Fixture to control time.monotonic in the registry."""
+    now = [1000.0]
+    mocker.patch("meal_max.models.battle_registry.time.monotonic", side_effect=lambda: now[0])
+    return now
+
+@pytest.fixture
+def flush(mocker):
+    return mocker.Mock()
+
+@pytest.fixture
+def sample_meal():
+    return Meal(id=1, meal="Lasagna", cuisine="Italian", price=10.99, difficulty="HIGH")
+
+
+def test_get_returns_same_model_per_user(flush):
+    """Test that each user gets their own, stable BattleModel."""
+    registry = BattleModelRegistry(flush=flush)
+
+    model = registry.get(1)
+    assert isinstance(model, BattleModel)
+    assert registry.get(1) is model, "Same user should get the same model"
+    assert registry.get(2) is not model, "Different users should get different models"
+
+def test_pop_does_not_flush(flush):
+    """Test that popping a model removes it without flushing."""
+    registry = BattleModelRegistry(flush=flush)
+    model = registry.get(1)
+
+    assert registry.pop(1) is model
+    assert registry.pop(1) is None
+    flush.assert_not_called()
+
+def test_lru_eviction_flushes(flush, clock):
+    """Test that the least recently used model is evicted and flushed when over capacity."""
+    registry = BattleModelRegistry(capacity=2, shards=1, flush=flush, eviction_grace=5)
+    model_1 = registry.get(1)
+    registry.get(2)
+    clock[0] += 10
+    registry.get(1)  # user 2 is now least recently used, and out of its grace window
+    registry.get(3)
+
+    flush.assert_called_once()
+    assert flush.call_args.args[0] == 2
+    assert registry.get(1) is model_1
+    assert registry.stats()["evictions"] == 1
+
+def test_recently_used_model_not_evicted(flush, clock):
+    """Test that a model a request may still be using is kept even when the registry is over capacity."""
+    registry = BattleModelRegistry(capacity=1, shards=1, flush=flush, eviction_grace=5)
+    model = registry.get(1)
+    clock[0] += 1
+    registry.get(2)
+
+    flush.assert_not_called()
+    assert registry.get(1) is model
+
+    clock[0] += 10
+    registry.get(3)
+    assert [call.args[0] for call in flush.call_args_list] == [2, 1]
+
+def test_idle_eviction(flush, clock):
+    """Test that idle models are evicted and flushed."""
+    registry = BattleModelRegistry(idle_timeout=60, shards=1, flush=flush)
+    model = registry.get(1)
+    clock[0] += 30
+    registry.get(2)
+    clock[0] += 31
+
+    assert registry.evict_idle() == 1
+    flush.assert_called_once_with(1, model)
+
+def test_flush_errors_are_contained(flush, clock):
+    """Test that a failing flush does not break the caller."""
+    flush.side_effect = RuntimeError("mongo down")
+    registry = BattleModelRegistry(capacity=1, shards=1, flush=flush, eviction_grace=0)
+    registry.get(1)
+
+    registry.get(2)  # evicts user 1, flush fails
+    flush.assert_called_once()
+
+    assert registry.pop(2) is not None
+
+def test_stats(flush, sample_meal):
+    """Test memory accounting across shards."""
+    registry = BattleModelRegistry(shards=4, flush=flush)
+    registry.get(1).prep_combatant(sample_meal)
+    registry.get(2)
+
+    stats = registry.stats()
+    assert stats["models"] == 2
+    assert stats["combatants"] == 1
+    assert stats["approx_bytes"] > 0
+
+def test_flush_all(flush):
+    """Test flushing every model on shutdown."""
+    registry = BattleModelRegistry(flush=flush)
+    registry.get(1)
+    registry.get(2)
+
+    registry.flush_all()
+
+    assert sorted(call.args[0] for call in flush.call_args_list) == [1, 2]
+    assert registry.stats()["models"] == 0
+
+def test_background_sweep_evicts_idle_models(flush):
+    """Test that idle models are flushed by the background sweep without any further requests."""
+    registry = BattleModelRegistry(idle_timeout=0, shards=4, flush=flush, sweep_interval=0.01)
+    registry.get(1)  # evicted at once by its own shard, and starts the sweeper
+    flush.reset_mock()
+    registry._shard(2).entries[2] = [BattleModel(), 0.0]  # idle model in a quiet shard
+
+    deadline = time.monotonic() + 2
+    while not flush.called and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    flush.assert_called_once()
+    assert flush.call_args.args[0] == 2
+    registry.close()
+    assert not registry._thread.is_alive()
@@ -0,0 +1,74 @@
+import hashlib
+
+import pytest
+
+from meal_max.utils import hash_utils
+from meal_max.utils.hash_utils import (
+    current_params,
+    derive_key,
+    hash_password,
+    hash_passwords,
+    needs_rehash,
+    parse_params,
+    verify_password
+)
+
+
+def test_parse_params():
+    """Test decoding stored KDF parameters."""
+    assert parse_params("scrypt:n=16384,r=8,p=1") == ("scrypt", {"n": 16384, "r": 8, "p": 1})
+    assert parse_params("pbkdf2_sha256:i=1000") == ("pbkdf2_sha256", {"i": 1000})
+    assert parse_params(None) == ("sha256", {}), "Missing parameters should mean legacy SHA-256"
+
+def test_derive_key_legacy_matches_sha256():
+    """Test that the legacy KDF reproduces the original salted SHA-256 hash."""
+    expected = hashlib.sha256(("password" + "ab" * 16).encode()).hexdigest()
+    assert derive_key("password", "ab" * 16, None) == expected
+
+@pytest.mark.parametrize("params", ["scrypt:n=1024,r=8,p=1", "pbkdf2_sha256:i=1000"])
+def test_derive_key_length(params):
+    """Test that every KDF produces a 64-character hex hash."""
+    assert len(derive_key("password", "ab" * 16, params)) == 64
+
+def test_derive_key_unsupported():
+    """Test that an unknown KDF is rejected."""
+    with pytest.raises(ValueError, match="Unsupported password KDF: md5"):
+        derive_key("password", "ab" * 16, "md5:")
+
+def test_hash_and_verify_password():
+    """Test hashing a password in the pool and verifying it."""
+    salt, hashed, params = hash_password("password")
+    assert params == current_params()
+    assert verify_password("password", salt, hashed, params) is True
+    assert verify_password("wrong", salt, hashed, params) is False
+
+def test_needs_rehash():
+    """Test that only hashes with the current parameters are left alone."""
+    assert needs_rehash(None) is True
+    assert needs_rehash("pbkdf2_sha256:i=1") is True
+    assert needs_rehash(current_params()) is False
+
+def test_pool_saturated(mocker):
+    """Test that hashing fails fast when the pool is saturated."""
+    mocker.patch.object(hash_utils, "_pending", mocker.Mock(acquire=mocker.Mock(return_value=False)))
+
+    with pytest.raises(RuntimeError, match="Password hashing pool is saturated."):
+        hash_password("password")
+
+def test_pool_saturated_does_not_wait(mocker):
+    """Test that a login never waits for a slot, while bulk hashing waits up to HASH_TIMEOUT."""
+    pending = mocker.patch.object(hash_utils, "_pending")
+
+    hash_password("password")
+    hash_passwords(["password"])
+
+    assert pending.acquire.call_args_list == [mocker.call(blocking=False), mocker.call(timeout=hash_utils.HASH_TIMEOUT)]
+
+def test_bulk_hashing_capped(mocker):
+    """Test that bulk hashing gives up once its share of the pool is used, without touching the login slots."""
+    mocker.patch.object(hash_utils, "_bulk_pending", mocker.Mock(acquire=mocker.Mock(return_value=False)))
+    pending = mocker.patch.object(hash_utils, "_pending")
+
+    with pytest.raises(RuntimeError, match="Password hashing pool is saturated."):
+        hash_passwords(["password"])
+    pending.acquire.assert_not_called()
@@ -0,0 +1,35 @@
+import io
+
+import pytest
+
+from meal_max.utils.import_utils import batched, detect_format, iter_records
+
+
+def test_detect_format():
+    """Test guessing the format from the file name."""
+    assert detect_format("users.CSV") == "csv"
+    assert detect_format("users.ndjson") == "jsonl"
+    with pytest.raises(ValueError, match="Unsupported file format"):
+        detect_format("users.xml")
+
+def test_iter_records_csv_binary():
+    """Test streaming records from a binary CSV upload."""
+    stream = io.BytesIO(b"username,password\nalice,pw1\nbob,pw2\n")
+    assert list(iter_records(stream, "csv")) == [
+        {"username": "alice", "password": "pw1"},
+        {"username": "bob", "password": "pw2"},
+    ]
+
+def test_iter_records_jsonl_skips_blank_lines():
+    """Test streaming JSON Lines from a text stream."""
+    stream = io.StringIO('{"username": "alice"}\n\n{"username": "bob"}\n')
+    assert [r["username"] for r in iter_records(stream, "jsonl")] == ["alice", "bob"]
+
+def test_iter_records_json_requires_array():
+    """Test that a JSON document must be an array of records."""
+    with pytest.raises(ValueError, match="Expected a JSON array of records"):
+        list(iter_records(io.StringIO('{"username": "alice"}'), "json"))
+
+def test_batched():
+    """Test splitting an iterator into fixed-size batches."""
+    assert list(batched(iter(range(5)), 2)) == [[0, 1], [2, 3], [4]]
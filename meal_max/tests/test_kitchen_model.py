@@ -1,4 +1,8 @@
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
+import copy
+import logging
+import pickle
 import re
 import sqlite3
 
@@ -6,14 +10,28 @@ import pytest
 
 from meal_max.models.kitchen_model import (
     Meal,
+    MealBatch,
+    bulk_create_meals,
     create_meal,
     clear_meals,
     delete_meal,
+    ensure_meal_version_column,
     get_leaderboard,
+    get_leaderboard_page,
     get_meal_by_id,
     get_meal_by_name,
+    get_meals_by_ids,
+    iter_leaderboard,
+    record_battle_result,
+    record_tournament_results,
+    aggregate_battle_results,
     update_meal_stats
 )
+from meal_max.models import kitchen_model
+from meal_max.models.leaderboard import leaderboard
+from meal_max.models.meal_cache import meal_cache
+from meal_max.utils import sql_utils
+from meal_max.utils.sql_utils import close_db_connection, get_db_connection
 
 ######################################################
 #
@@ -42,6 +60,12 @@ def mock_cursor(mocker):
         yield mock_conn  # Yield the mocked connection object
 
     mocker.patch("meal_max.models.kitchen_model.get_db_connection", mock_get_db_connection)
+    # The mocked connection has no schema to migrate
+    mocker.patch.object(kitchen_model, "_meal_versions_ready", True)
+
+    # Start every test with an empty materialized leaderboard and meal cache
+    leaderboard.invalidate()
+    meal_cache.clear()
 
     return mock_cursor  # Return the mock cursor so we can set expectations per test
 
@@ -96,6 +120,10 @@ def test_create_meal_invalid_price(mock_cursor):
     with pytest.raises(ValueError, match="Invalid price: invalid. Price must be a positive number."):
         create_meal(meal="Lasagna", cuisine="Italian", price="invalid", difficulty="LOW")
 
+    # Call the function with a non-finite price
+    with pytest.raises(ValueError, match="Invalid price: nan. Price must be a positive number."):
+        create_meal(meal="Lasagna", cuisine="Italian", price=float("nan"), difficulty="LOW")
+
 def test_create_meal_invalid_difficulty(mock_cursor):
     """test create_meal with an invalid difficulty (should raise an error)"""
 
@@ -275,15 +303,44 @@ def test_get_meal_by_name_deleted(mock_cursor):
     with pytest.raises(ValueError, match="Meal with name Lasagna has been deleted"):
         get_meal_by_name("Lasagna")
 
+def test_get_meals_by_ids(mock_cursor):
+    """Test retrieving many meals with a single query."""
+    mock_cursor.fetchall.return_value = [
+        (1, "Lasagna", "Italian", 12.99, "MED"),
+        (2, "Burger", "American", 9.99, "LOW"),
+    ]
+
+    result = get_meals_by_ids([2, 1, 2, 3])
+
+    assert result == {1: Meal(1, "Lasagna", "Italian", 12.99, "MED"), 2: Meal(2, "Burger", "American", 9.99, "LOW")}
+    assert mock_cursor.execute.call_count == 1, "Meals should be loaded in one query"
+
+    expected_query = normalize_whitespace("""
+        SELECT id, meal, cuisine, price, difficulty FROM meals
+        WHERE id IN (?, ?, ?) AND deleted = false
+    """)
+    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
+    assert actual_query == expected_query, "The SQL query did not match the expected structure."
+    assert mock_cursor.execute.call_args[0][1] == [2, 1, 3], "Duplicate IDs should be queried once"
+
+def test_get_meals_by_ids_empty(mock_cursor):
+    """Test that no query is made for an empty list of IDs."""
+    assert get_meals_by_ids([]) == {}
+    assert mock_cursor.execute.call_count == 0
+
 def test_update_meal_stats(mock_cursor):
-    # Simulate that the meal exists
-    mock_cursor.fetchone.return_value = ([False])
+    # Simulate that the meal exists and is updated
+    mock_cursor.fetchall.return_value = [(1, "Burger", "American", 9.99, "LOW", 1, 1, 1)]
 
     # Call the function
     update_meal_stats(meal_id=1, result="win")
 
     # Set the SQL query we expect to be executed
-    expected_query = normalize_whitespace("UPDATE meals SET battles = battles + 1, wins = wins + 1 WHERE id = ?")
+    expected_query = normalize_whitespace("""
+        UPDATE meals SET battles = battles + 1, wins = wins + ?, version = version + 1
+        WHERE id = ? AND deleted = false
+        RETURNING id, meal, cuisine, price, difficulty, battles, wins, version
+    """)
 
     # Check that the cursor executed the query with the correct arguments
     actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
@@ -293,28 +350,19 @@ def test_update_meal_stats(mock_cursor):
     actual_arguments = mock_cursor.execute.call_args[0][1]
 
     # Check that the arguments match the expected values
-    expected_arguments = (1,)
+    expected_arguments = (1, 1)
     assert actual_arguments == expected_arguments, f"The SQL arguments did not match, expected: {expected_arguments}, actual: {actual_arguments}"
 
 def test_update_meal_stats_loss(mock_cursor):
-    # Simulate that the meal exists
-    mock_cursor.fetchone.return_value = ([False])
+    # Simulate that the meal exists and is updated
+    mock_cursor.fetchall.return_value = [(1, "Burger", "American", 9.99, "LOW", 1, 0, 1)]
 
     # Call the function
     update_meal_stats(meal_id=1, result="loss")
 
-    # Set the SQL query we expect to be executed
-    expected_query = normalize_whitespace("UPDATE meals SET battles = battles + 1 WHERE id = ?")
-
-    # Check that the cursor executed the query with the correct arguments
-    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
-    assert actual_query == expected_query, "The SQL query did not match the expected structure."
-
-    # Extract the arguments used in the SQL call (second element of call_args)
+    # A loss adds no wins
     actual_arguments = mock_cursor.execute.call_args[0][1]
-
-    # Check that the arguments match the expected values
-    expected_arguments = (1,)
+    expected_arguments = (0, 1)
     assert actual_arguments == expected_arguments, f"The SQL arguments did not match, expected: {expected_arguments}, actual: {actual_arguments}"
 
 def test_update_meal_stats_invalid_result(mock_cursor):
@@ -341,12 +389,48 @@ def test_update_meal_stats_deleted(mock_cursor):
     """Test error when trying to update stats for a meal that's already marked as deleted."""
 
     # Simulate that the meal exists but is already marked as deleted
-    mock_cursor.fetchone.return_value = ([True])
+    mock_cursor.fetchone.return_value = (True,)
 
     # Expect a ValueError when attempting to update stats for a meal that's already been deleted
     with pytest.raises(ValueError, match="Meal with ID 999 has been deleted"):
         update_meal_stats(999, "win")
 
+def test_record_battle_result(mock_cursor):
+    """Test recording a battle updates both meals with one statement and one commit."""
+    mock_cursor.fetchall.return_value = [
+        (1, "Burger", "American", 9.99, "LOW", 1, 1, 1),
+        (2, "Sushi", "Japanese", 15.99, "HIGH", 1, 0, 1)
+    ]
+
+    record_battle_result(winner_id=1, loser_id=2)
+
+    expected_query = normalize_whitespace("""
+        UPDATE meals SET battles = battles + 1, wins = wins + (id = ?), version = version + 1
+        WHERE id IN (?, ?) AND deleted = false
+        RETURNING id, meal, cuisine, price, difficulty, battles, wins, version
+    """)
+    update_call, log_call = mock_cursor.execute.call_args_list
+    actual_query = normalize_whitespace(update_call[0][0])
+    assert actual_query == expected_query, "The SQL query did not match the expected structure."
+    assert update_call[0][1] == (1, 1, 2)
+    assert normalize_whitespace(log_call[0][0]) == \
+        "INSERT INTO battle_results (winner_id, loser_id, applied) VALUES (?, ?, true)"
+    assert log_call[0][1] == (1, 2)
+
+def test_record_battle_result_not_found(mock_cursor):
+    """Test error when one of the meals does not exist."""
+    mock_cursor.fetchall.side_effect = [[(1, "Burger", "American", 9.99, "LOW", 1, 1, 1)], [(1, False)]]
+
+    with pytest.raises(ValueError, match="Meal with ID 2 not found"):
+        record_battle_result(1, 2)
+
+def test_record_battle_result_deleted(mock_cursor):
+    """Test error when one of the meals has been deleted."""
+    mock_cursor.fetchall.side_effect = [[(2, "Sushi", "Japanese", 15.99, "HIGH", 1, 0, 1)], [(1, True), (2, False)]]
+
+    with pytest.raises(ValueError, match="Meal with ID 1 has been deleted"):
+        record_battle_result(1, 2)
+
 ######################################################
 #
 #    Get Leaderboard
@@ -356,9 +440,9 @@ def test_update_meal_stats_deleted(mock_cursor):
 def test_get_leaderboard_wins(mock_cursor):
     # Simulate the leaderboard data
     mock_cursor.fetchall.return_value = [
-        (1, "Burger", "American", 9.99, "LOW", 10, 7, 0.7, False),
-        (2, "Sushi", "Japanese", 15.99, "HIGH", 8, 6, 0.75, False),
-        (3, "Lasagna", "Italian", 12.99, "MED", 5, 3, 0.6, False)
+        (1, "Burger", "American", 9.99, "LOW", 10, 7, 0, 0.7, False),
+        (2, "Sushi", "Japanese", 15.99, "HIGH", 8, 6, 0, 0.75, False),
+        (3, "Lasagna", "Italian", 12.99, "MED", 5, 3, 0, 0.6, False)
     ]
 
     # Call the function
@@ -375,7 +459,7 @@ def test_get_leaderboard_wins(mock_cursor):
     assert leaderboard == expected_leaderboard, f"Expected {expected_leaderboard}, got {leaderboard}"
 
     # Ensure the SQL query was executed correctly
-    expected_query = normalize_whitespace("SELECT id, meal, cuisine, price, difficulty, battles, wins, (wins * 1.0 / battles) AS win_pct FROM meals WHERE deleted = false AND battles > 0 ORDER BY wins DESC")
+    expected_query = normalize_whitespace("SELECT id, meal, cuisine, price, difficulty, battles, wins, version, (wins * 1.0 / battles) AS win_pct FROM meals WHERE deleted = false AND battles > 0 ORDER BY wins DESC, id DESC")
     actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
 
     # Assert that the SQL query was correct
@@ -384,9 +468,9 @@ def test_get_leaderboard_wins(mock_cursor):
 def test_get_leaderboard_win_pct(mock_cursor):
     # Simulate the leaderboard data
     mock_cursor.fetchall.return_value = [
-        (2, "Sushi", "Japanese", 15.99, "HIGH", 8, 6, 0.75),
-        (1, "Burger", "American", 9.99, "LOW", 10, 7, 0.7),
-        (3, "Lasagna", "Italian", 12.99, "MED", 5, 3, 0.6),
+        (2, "Sushi", "Japanese", 15.99, "HIGH", 8, 6, 0, 0.75),
+        (1, "Burger", "American", 9.99, "LOW", 10, 7, 0, 0.7),
+        (3, "Lasagna", "Italian", 12.99, "MED", 5, 3, 0, 0.6),
     ]
 
     # Call the function
@@ -403,7 +487,7 @@ def test_get_leaderboard_win_pct(mock_cursor):
     assert leaderboard == expected_leaderboard, f"Expected {expected_leaderboard}, got {leaderboard}"
 
     # Ensure the SQL query was executed correctly
-    expected_query = normalize_whitespace("SELECT id, meal, cuisine, price, difficulty, battles, wins, (wins * 1.0 / battles) AS win_pct FROM meals WHERE deleted = false AND battles > 0 ORDER BY win_pct DESC")
+    expected_query = normalize_whitespace("SELECT id, meal, cuisine, price, difficulty, battles, wins, version, (wins * 1.0 / battles) AS win_pct FROM meals WHERE deleted = false AND battles > 0 ORDER BY win_pct DESC, id DESC")
     actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
 
     # Assert that the SQL query was correct
@@ -412,9 +496,9 @@ def test_get_leaderboard_win_pct(mock_cursor):
 def test_get_leaderboard_default(mock_cursor):
     # Simulate the leaderboard data
     mock_cursor.fetchall.return_value = [
-        (1, "Burger", "American", 9.99, "LOW", 10, 7, 0.7),
-        (2, "Sushi", "Japanese", 15.99, "HIGH", 8, 6, 0.75),
-        (3, "Lasagna", "Italian", 12.99, "MED", 5, 3, 0.6),
+        (1, "Burger", "American", 9.99, "LOW", 10, 7, 0, 0.7),
+        (2, "Sushi", "Japanese", 15.99, "HIGH", 8, 6, 0, 0.75),
+        (3, "Lasagna", "Italian", 12.99, "MED", 5, 3, 0, 0.6),
     ]
 
     # Call the function without specifying a sort_by parameter
@@ -431,7 +515,7 @@ def test_get_leaderboard_default(mock_cursor):
     assert leaderboard == expected_leaderboard, f"Expected {expected_leaderboard}, got {leaderboard}"
 
     # Ensure the SQL query was executed correctly
-    expected_query = normalize_whitespace("SELECT id, meal, cuisine, price, difficulty, battles, wins, (wins * 1.0 / battles) AS win_pct FROM meals WHERE deleted = false AND battles > 0 ORDER BY wins DESC")
+    expected_query = normalize_whitespace("SELECT id, meal, cuisine, price, difficulty, battles, wins, version, (wins * 1.0 / battles) AS win_pct FROM meals WHERE deleted = false AND battles > 0 ORDER BY wins DESC, id DESC")
     actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
 
     # Assert that the SQL query was correct
@@ -443,4 +527,455 @@ def test_get_leaderboard_invalid_parameter(mock_cursor):
         get_leaderboard(sort_by="invalid")
 
     # Ensure no SQL query was executed when an invalid parameter is provided
-    assert mock_cursor.execute.call_count == 0, "No SQL query should be executed for an invalid sort_by parameter."
\ No newline at end of file
+    assert mock_cursor.execute.call_count == 0, "No SQL query should be executed for an invalid sort_by parameter."
+
+def test_get_leaderboard_served_from_memory(mock_cursor):
+    """Test that only the first read queries the database."""
+    mock_cursor.fetchall.return_value = [
+        (1, "Burger", "American", 9.99, "LOW", 10, 7, 0, 0.7),
+        (2, "Sushi", "Japanese", 15.99, "HIGH", 8, 6, 0, 0.75),
+    ]
+
+    get_leaderboard(sort_by="wins")
+    leaderboard_by_pct = get_leaderboard(sort_by="win_pct", limit=1)
+
+    assert [meal["meal"] for meal in leaderboard_by_pct] == ["Sushi"]
+    assert mock_cursor.execute.call_count == 1, "The second read should not query the database"
+
+def test_get_leaderboard_after_battle(mock_cursor):
+    """Test that recording a battle reorders the leaderboard without a reload."""
+    mock_cursor.fetchall.return_value = [
+        (1, "Burger", "American", 9.99, "LOW", 10, 7, 0, 0.7),
+        (2, "Sushi", "Japanese", 15.99, "HIGH", 8, 6, 0, 0.75),
+    ]
+    get_leaderboard()
+
+    mock_cursor.fetchall.return_value = [
+        (2, "Sushi", "Japanese", 15.99, "HIGH", 9, 7, 1),
+        (3, "Lasagna", "Italian", 12.99, "MED", 1, 0, 1),
+    ]
+    record_battle_result(winner_id=2, loser_id=3)
+    mock_cursor.execute.reset_mock()
+
+    assert [(meal["meal"], meal["wins"]) for meal in get_leaderboard()] == [("Sushi", 7), ("Burger", 7), ("Lasagna", 0)]
+    assert mock_cursor.execute.call_count == 0
+
+def test_get_leaderboard_after_delete(mock_cursor):
+    """Test that a deleted meal drops off the leaderboard."""
+    mock_cursor.fetchall.return_value = [
+        (1, "Burger", "American", 9.99, "LOW", 10, 7, 0, 0.7),
+        (2, "Sushi", "Japanese", 15.99, "HIGH", 8, 6, 0, 0.75),
+    ]
+    get_leaderboard()
+
+    mock_cursor.fetchone.return_value = ([False])
+    delete_meal(1)
+
+    assert [meal["meal"] for meal in get_leaderboard()] == ["Sushi"]
+
+def test_get_leaderboard_invalid_limit(mock_cursor):
+    with pytest.raises(ValueError, match="Invalid limit: -1"):
+        get_leaderboard(limit=-1)
+
+######################################################
+#
+#    Leaderboard pages
+#
+######################################################
+
+@pytest.fixture
+def meals_db(mocker, tmp_path):
+    """Fixture to run kitchen functions against a scratch SQLite database."""
+    mocker.patch.object(sql_utils, "DB_PATH", str(tmp_path / "meal_max.db"))
+    mocker.patch.object(kitchen_model, "_leaderboard_indexes_ready", False)
+    mocker.patch.object(kitchen_model, "_battle_results_ready", False)
+    mocker.patch.object(kitchen_model, "_meal_versions_ready", False)
+    leaderboard.invalidate()
+    meal_cache.clear()
+    with get_db_connection() as conn:
+        conn.execute("""
+            CREATE TABLE meals (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, meal TEXT NOT NULL UNIQUE, cuisine TEXT NOT NULL,
+                price REAL NOT NULL, difficulty TEXT, battles INTEGER DEFAULT 0, wins INTEGER DEFAULT 0,
+                deleted BOOLEAN DEFAULT FALSE
+            )
+        """)
+        conn.executemany(
+            "INSERT INTO meals (meal, cuisine, price, difficulty, battles, wins) VALUES (?, ?, ?, ?, ?, ?)",
+            [(f"Meal {i}", "Italian" if i % 2 else "Japanese", 10.0, "LOW" if i % 3 else "HIGH", 10, i % 7)
+             for i in range(1, 41)]
+        )
+        conn.commit()
+    yield
+    close_db_connection()
+
+def test_get_leaderboard_page_query(mock_cursor):
+    """Test the query for a filtered page after a cursor."""
+    mock_cursor.fetchall.return_value = [
+        {"id": 2, "meal": "Sushi", "cuisine": "Japanese", "price": 15.99, "difficulty": "HIGH", "battles": 8, "wins": 6, "win_pct": 75.0},
+        {"id": 5, "meal": "Ramen", "cuisine": "Japanese", "price": 11.99, "difficulty": "HIGH", "battles": 4, "wins": 2, "win_pct": 50.0},
+    ]
+    first = get_leaderboard_page("win_pct", cuisine="Japanese", difficulty="HIGH", limit=1)
+
+    assert first["meals"] == mock_cursor.fetchall.return_value[:1]
+    assert first["next_cursor"] is not None
+
+    get_leaderboard_page("win_pct", cuisine="Japanese", difficulty="HIGH", limit=1, cursor=first["next_cursor"])
+
+    expected_query = normalize_whitespace("""
+        SELECT id, meal, cuisine, price, difficulty, battles, wins, (wins * 1.0 / battles) AS win_pct
+        FROM meals WHERE deleted = false AND battles > 0 AND cuisine = ? AND difficulty = ?
+        AND (wins * 1.0 / battles) <= ? AND ((wins * 1.0 / battles) < ? OR id < ?)
+        ORDER BY (wins * 1.0 / battles) DESC, id DESC LIMIT ?
+    """)
+    assert normalize_whitespace(mock_cursor.execute.call_args[0][0]) == expected_query
+    assert mock_cursor.execute.call_args[0][1] == ["Japanese", "HIGH", 0.75, 0.75, 2, 2]
+
+def test_get_leaderboard_page_last_page(mock_cursor):
+    """Test that a short page has no next cursor."""
+    mock_cursor.fetchall.return_value = []
+
+    assert get_leaderboard_page() == {"meals": [], "next_cursor": None}
+
+@pytest.mark.parametrize("kwargs, message", [
+    ({"sort_by": "price"}, "Invalid sort_by parameter: price"),
+    ({"difficulty": "low"}, "Invalid difficulty level: low"),
+    ({"limit": 0}, "Invalid limit: 0"),
+    ({"cursor": "not-a-cursor"}, "Invalid leaderboard cursor"),
+])
+def test_get_leaderboard_page_invalid(mock_cursor, kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        get_leaderboard_page(**kwargs)
+
+    assert mock_cursor.execute.call_count == 0
+
+def test_get_leaderboard_page_cursor_for_other_sort(mock_cursor):
+    """Test that a cursor cannot be reused with a different sort order."""
+    mock_cursor.fetchall.return_value = [
+        (1, "Burger", "American", 9.99, "LOW", 10, 7, 0, 0.7),
+        (2, "Sushi", "Japanese", 15.99, "HIGH", 8, 6, 0, 0.75),
+    ]
+    cursor = get_leaderboard_page("wins", limit=1)["next_cursor"]
+
+    with pytest.raises(ValueError, match="Invalid leaderboard cursor"):
+        get_leaderboard_page("win_pct", cursor=cursor)
+
+@pytest.mark.parametrize("sort_by", ["wins", "win_pct"])
+def test_leaderboard_pages_match_stream(meals_db, sort_by):
+    """Test that walking every page yields the streamed leaderboard, in the same order as get_leaderboard."""
+    streamed = list(iter_leaderboard(sort_by))
+
+    paged, cursor = [], None
+    while True:
+        page = get_leaderboard_page(sort_by, limit=7, cursor=cursor)
+        paged.extend(page["meals"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(streamed) == 40
+    assert paged == streamed
+    assert get_leaderboard(sort_by) == streamed
+
+def test_leaderboard_first_page_served_from_memory(meals_db):
+    """Test that the unfiltered first page comes from the materialized leaderboard and its cursor carries on in SQL."""
+    streamed = list(iter_leaderboard("win_pct"))
+    leaderboard.invalidate()
+    hits = leaderboard.hits
+
+    first = get_leaderboard_page("win_pct", limit=7)
+    again = get_leaderboard_page("win_pct", limit=7)
+    second = get_leaderboard_page("win_pct", limit=7, cursor=first["next_cursor"])
+
+    assert leaderboard.hits == hits + 2, "Both first pages should be read from memory once loaded"
+    assert first == again
+    assert first["meals"] + second["meals"] == streamed[:14]
+
+def test_leaderboard_filters(meals_db):
+    """Test filtering the leaderboard by cuisine and difficulty."""
+    page = get_leaderboard_page("wins", cuisine="Italian", difficulty="HIGH", limit=50)
+    streamed = list(iter_leaderboard("wins", cuisine="Italian", difficulty="HIGH"))
+
+    assert page["meals"] == streamed
+    assert {(meal["cuisine"], meal["difficulty"]) for meal in streamed} == {("Italian", "HIGH")}
+    assert len(streamed) == 7
+
+def test_ensure_meal_version_column_on_migrated_db(meals_db, mocker, caplog):
+    """Test that a database that already has the version column is left alone, without logging errors."""
+    ensure_meal_version_column()
+    mocker.patch.object(kitchen_model, "_meal_versions_ready", False)
+
+    ensure_meal_version_column()
+
+    with get_db_connection() as conn:
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(meals)")]
+    assert columns.count("version") == 1
+    assert not [record for record in caplog.records if record.levelno >= logging.ERROR]
+
+def test_leaderboard_uses_index(meals_db):
+    """Test that leaderboard pages are read from the covering index."""
+    get_leaderboard_page("win_pct", limit=5)
+    query, params = kitchen_model._leaderboard_query("win_pct", None, None, (0.5, 10))
+
+    with get_db_connection() as conn:
+        plan = " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params))
+
+    assert "COVERING INDEX meals_leaderboard_win_pct" in plan
+
+######################################################
+#
+#    Bulk import
+#
+######################################################
+
+def test_bulk_create_meals(meals_db):
+    """Test that valid rows are inserted and duplicate and invalid rows are reported."""
+    rows = [
+        {"meal": "Tacos", "cuisine": "Mexican", "price": "8.50", "difficulty": "LOW"},
+        {"meal": "Meal 1", "cuisine": "Italian", "price": 10, "difficulty": "LOW"},  # already in the table
+        {"meal": "Tacos", "cuisine": "Mexican", "price": 9, "difficulty": "MED"},  # repeated in the import
+        {"meal": "Pho", "cuisine": "Vietnamese", "price": -1, "difficulty": "MED"},
+        {"meal": "Ramen", "cuisine": "Japanese", "price": "nan", "difficulty": "MED"},
+        {"meal": "Gyoza", "cuisine": "Japanese", "price": "inf", "difficulty": "LOW"},
+        {"meal": "Paella", "cuisine": "Spanish", "price": 14, "difficulty": "low"},
+        {"meal": "", "cuisine": "Spanish", "price": 14, "difficulty": "LOW"},
+        {"meal": "Curry", "cuisine": "Indian", "price": 11.25, "difficulty": "HIGH"},
+    ]
+
+    summary = bulk_create_meals(rows, batch_size=3)
+
+    assert summary["created"] == 2
+    assert sorted(summary["duplicates"]) == ["Meal 1", "Tacos"]
+    assert [invalid["row"] for invalid in summary["invalid"]] == [4, 5, 6, 7, 8]
+    assert "Invalid price: -1" in summary["invalid"][0]["error"]
+    assert "Invalid price: nan" in summary["invalid"][1]["error"]
+    assert "Invalid price: inf" in summary["invalid"][2]["error"]
+    assert get_meal_by_name("Tacos") == Meal(id=41, meal="Tacos", cuisine="Mexican", price=8.5, difficulty="LOW")
+    assert get_meal_by_name("Curry").price == 11.25
+
+def test_bulk_create_meals_batches(mock_cursor):
+    """Test that each batch is one executemany and one commit."""
+    rows = ({"meal": f"Meal {i}", "cuisine": "Italian", "price": 10, "difficulty": "LOW"} for i in range(5))
+
+    summary = bulk_create_meals(rows, batch_size=2)
+
+    assert summary == {"created": 5, "duplicates": [], "invalid": []}
+    assert mock_cursor.executemany.call_count == 3
+    assert [len(call.args[1]) for call in mock_cursor.executemany.call_args_list] == [2, 2, 1]
+
+def test_bulk_create_meals_conflict_falls_back(mock_cursor):
+    """Test that a conflicting batch is retried row by row."""
+    mock_cursor.executemany.side_effect = sqlite3.IntegrityError("UNIQUE constraint failed")
+    mock_cursor.execute.side_effect = [None, None, sqlite3.IntegrityError("UNIQUE constraint failed")]
+    rows = [{"meal": name, "cuisine": "Italian", "price": 10, "difficulty": "LOW"} for name in ("Pasta", "Pizza")]
+
+    summary = bulk_create_meals(rows)
+
+    assert summary == {"created": 1, "duplicates": ["Pizza"], "invalid": []}
+
+######################################################
+#
+#    Meal cache
+#
+######################################################
+
+def test_get_meal_by_id_cached(mock_cursor):
+    """Test that a meal is read from the database once and then served from the cache."""
+    mock_cursor.fetchone.return_value = (1, "Meal A", "Cuisine A", 10.0, "LOW", False)
+
+    first = get_meal_by_id(1)
+    second = get_meal_by_id(1)
+    by_name = get_meal_by_name("Meal A")
+    by_ids = get_meals_by_ids([1])
+
+    assert first is second is by_name is by_ids[1]
+    assert mock_cursor.execute.call_count == 1
+    assert meal_cache.stats()["hits"] == 3
+
+def test_get_meals_by_ids_queries_only_misses(mock_cursor):
+    """Test that only uncached meals are queried."""
+    mock_cursor.fetchone.return_value = (1, "Meal A", "Cuisine A", 10.0, "LOW", False)
+    get_meal_by_id(1)
+    mock_cursor.fetchall.return_value = [(2, "Meal B", "Cuisine B", 20.0, "HIGH")]
+
+    meals = get_meals_by_ids([1, 2])
+
+    assert set(meals) == {1, 2}
+    assert mock_cursor.execute.call_args[0][1] == [2]
+
+def test_delete_meal_invalidates_cache(mock_cursor):
+    """Test that a deleted meal is no longer served from the cache."""
+    mock_cursor.fetchone.return_value = (1, "Meal A", "Cuisine A", 10.0, "LOW", False)
+    get_meal_by_id(1)
+
+    mock_cursor.fetchone.return_value = ([False])
+    delete_meal(1)
+
+    mock_cursor.fetchone.return_value = (1, "Meal A", "Cuisine A", 10.0, "LOW", True)
+    with pytest.raises(ValueError, match="Meal with ID 1 has been deleted"):
+        get_meal_by_id(1)
+    with pytest.raises(ValueError, match="Meal with name Meal A has been deleted"):
+        get_meal_by_name("Meal A")
+
+def test_clear_meals_clears_cache(mock_cursor, mocker):
+    """Test that clearing the meals table empties the cache."""
+    mocker.patch("builtins.open", mocker.mock_open(read_data="CREATE TABLE meals ..."))
+    mock_cursor.fetchone.return_value = (1, "Meal A", "Cuisine A", 10.0, "LOW", False)
+    get_meal_by_id(1)
+
+    clear_meals()
+
+    assert meal_cache.stats()["size"] == 0
+
+def test_meal_is_immutable():
+    """Test that cached meals cannot be modified by callers."""
+    meal = Meal(id=1, meal="Meal A", cuisine="Cuisine A", price=10.0, difficulty="LOW")
+    with pytest.raises(AttributeError):
+        meal.price = 1.0
+
+######################################################
+#
+#    Tournament results
+#
+######################################################
+
+def test_record_tournament_results(meals_db):
+    """Test that all tallies are added in one transaction."""
+    record_tournament_results({1: (3, 2), 2: (3, 1)})
+
+    with get_db_connection() as conn:
+        rows = conn.execute("SELECT id, battles, wins FROM meals WHERE id IN (1, 2) ORDER BY id").fetchall()
+    assert rows == [(1, 13, 3), (2, 13, 3)]
+
+def test_record_tournament_results_deleted_meal(meals_db):
+    """Test that nothing is recorded if one of the meals has been deleted."""
+    delete_meal(2)
+
+    with pytest.raises(ValueError, match="Tournament results not recorded"):
+        record_tournament_results({1: (1, 1), 2: (1, 0)})
+
+    assert get_meal_by_id(1) is not None
+    with get_db_connection() as conn:
+        assert conn.execute("SELECT battles FROM meals WHERE id = 1").fetchone() == (10,)
+
+######################################################
+#
+#    Battle log
+#
+######################################################
+
+def meal_stats(*meal_ids):
+    with get_db_connection() as conn:
+        return [conn.execute("SELECT battles, wins FROM meals WHERE id = ?", (meal_id,)).fetchone()
+                for meal_id in meal_ids]
+
+def test_record_battle_result_logs_battle(meals_db):
+    """Test that a battle recorded in sync mode is logged as already counted."""
+    record_battle_result(winner_id=1, loser_id=2)
+
+    assert meal_stats(1, 2) == [(11, 2), (11, 2)]
+    with get_db_connection() as conn:
+        assert conn.execute("SELECT winner_id, loser_id, applied FROM battle_results").fetchall() == [(1, 2, 1)]
+    assert aggregate_battle_results() == 1, "The aggregator should step over the battle"
+    assert meal_stats(1, 2) == [(11, 2), (11, 2)]
+
+def test_async_battles_aggregated(meals_db, mocker):
+    """Test that async battles leave stats alone until the aggregator folds them in batches."""
+    mocker.patch.object(kitchen_model, "BATTLE_STATS_MODE", "async")
+    for _ in range(3):
+        record_battle_result(winner_id=1, loser_id=2)
+    record_battle_result(winner_id=2, loser_id=3)
+
+    assert meal_stats(1, 2, 3) == [(10, 1), (10, 2), (10, 3)]
+
+    assert aggregate_battle_results(batch_size=3) == 3
+    assert meal_stats(1, 2, 3) == [(13, 4), (13, 2), (10, 3)]
+    assert aggregate_battle_results(batch_size=3) == 1
+    assert meal_stats(1, 2, 3) == [(13, 4), (14, 3), (11, 3)]
+    assert aggregate_battle_results(batch_size=3) == 0
+
+def test_async_battle_deleted_meal(meals_db, mocker):
+    """Test that async mode still refuses battles with deleted meals."""
+    mocker.patch.object(kitchen_model, "BATTLE_STATS_MODE", "async")
+    delete_meal(2)
+
+    with pytest.raises(ValueError, match="Meal with ID 2 has been deleted"):
+        record_battle_result(winner_id=1, loser_id=2)
+    with get_db_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM battle_results").fetchone() == (0,)
+
+def test_aggregate_updates_leaderboard(meals_db, mocker):
+    """Test that aggregated stats reach the materialized leaderboard."""
+    mocker.patch.object(kitchen_model, "BATTLE_STATS_MODE", "async")
+    assert get_leaderboard(limit=1)[0]["id"] == 34
+    for _ in range(6):
+        record_battle_result(winner_id=1, loser_id=2)
+    assert get_leaderboard(limit=1)[0]["id"] == 34, "Stats should not change before aggregation"
+
+    aggregate_battle_results()
+
+    top = get_leaderboard(limit=1)[0]
+    assert (top["id"], top["battles"], top["wins"]) == (1, 16, 7)
+
+def test_concurrent_stats_updates(meals_db):
+    """Test that battles and stat updates racing on the same meals lose no updates."""
+    def run(worker):
+        try:
+            for i in range(50):
+                if i % 5:
+                    record_battle_result(winner_id=1 + (worker + i) % 3, loser_id=4)
+                else:
+                    update_meal_stats(4, "loss")
+        finally:
+            close_db_connection()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(run, range(8)))
+
+    with get_db_connection() as conn:
+        rows = conn.execute("SELECT battles, wins, version FROM meals WHERE id <= 4 ORDER BY id").fetchall()
+    assert sum(battles - 10 for battles, _, _ in rows) == 8 * (40 * 2 + 10)
+    assert sum(wins for _, wins, _ in rows) - (1 + 2 + 3 + 4) == 8 * 40
+    assert rows[3][:2] == (10 + 8 * 50, 4), "Every battle and update should reach meal 4"
+    assert [version for _, _, version in rows] == [battles - 10 for battles, _, _ in rows]
+
+######################################################
+#
+#    Meal and MealBatch
+#
+######################################################
+
+def test_meal_battle_score_precomputed():
+    """Test that the battle score is computed once, at construction."""
+    meal = Meal(id=1, meal="Meal A", cuisine="Italian", price=10.0, difficulty="MED")
+
+    assert meal.battle_score == 10.0 * 7 - 2
+    assert not hasattr(meal, "__dict__"), "Meal should be slotted"
+    assert "battle_score" not in repr(meal)
+    assert meal == Meal(id=1, meal="Meal A", cuisine="Italian", price=10.0, difficulty="MED")
+    with pytest.raises(AttributeError):
+        meal.battle_score = 0
+
+def test_meal_copy_and_pickle():
+    """Test that frozen slotted meals survive copying and pickling with their score."""
+    meal = Meal(id=1, meal="Meal A", cuisine="Italian", price=10.0, difficulty="LOW")
+
+    for clone in (copy.deepcopy(meal), pickle.loads(pickle.dumps(meal))):
+        assert clone == meal
+        assert clone.battle_score == meal.battle_score
+
+def test_meal_batch():
+    """Test that a batch exposes IDs and scores as typed arrays, by position."""
+    meals = [
+        Meal(id=7, meal="Meal A", cuisine="Italian", price=10.0, difficulty="LOW"),
+        Meal(id=3, meal="Meal B", cuisine="Thai", price=2.5, difficulty="HIGH"),
+    ]
+    batch = MealBatch(meals)
+
+    assert len(batch) == 2
+    assert list(batch.ids) == [7, 3]
+    assert list(batch.scores) == [67.0, 9.0]
+    assert batch.scores.typecode == "d"
+    assert batch[batch.position(3)] is meals[1]
+    with pytest.raises(KeyError):
+        batch.position(99)
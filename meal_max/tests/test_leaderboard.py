@@ -0,0 +1,94 @@
+import pytest
+
+from meal_max.models.leaderboard import MaterializedLeaderboard
+
+
+ROWS = [
+    (1, "Burger", "American", 9.99, "LOW", 10, 7, 10),
+    (2, "Sushi", "Japanese", 15.99, "HIGH", 8, 6, 8),
+    (3, "Lasagna", "Italian", 12.99, "MED", 5, 3, 5),
+]
+
+
+@pytest.fixture
+def board():
+    board = MaterializedLeaderboard(refresh_interval=60)
+    board.load(ROWS, board.begin_load())
+    return board
+
+
+def names(entries):
+    return [entry["meal"] for entry in entries]
+
+
+def test_top_requires_load():
+    board = MaterializedLeaderboard(refresh_interval=60)
+    assert board.top("wins") is None
+    assert board.stats()["misses"] == 1
+
+
+def test_top_sorted(board):
+    assert names(board.top("wins")) == ["Burger", "Sushi", "Lasagna"]
+    assert names(board.top("win_pct")) == ["Sushi", "Burger", "Lasagna"]
+    assert names(board.top("wins", limit=2)) == ["Burger", "Sushi"]
+    assert board.top("win_pct", limit=1)[0]["win_pct"] == 75.0
+
+
+def test_top_returns_copies(board):
+    board.top("wins")[0]["wins"] = 100
+    assert board.top("wins")[0]["wins"] == 7
+
+
+def test_update_moves_and_adds_meals(board):
+    board.top("wins")  # cache a page, which the update must drop
+    board.update([(3, "Lasagna", "Italian", 12.99, "MED", 6, 4, 6), (4, "Tacos", "Mexican", 8.5, "LOW", 1, 0, 1)])
+
+    assert names(board.top("win_pct")) == ["Sushi", "Burger", "Lasagna", "Tacos"]
+    assert [entry["wins"] for entry in board.top("wins")] == [7, 6, 4, 0]
+
+
+def test_out_of_order_update_is_skipped(board):
+    """Test that an update older than the stats held, e.g. from a battle committed earlier, is ignored."""
+    board.update([(1, "Burger", "American", 9.99, "LOW", 12, 9, 12)])
+    board.update([(1, "Burger", "American", 9.99, "LOW", 11, 8, 11)])
+    board.update([(2, "Sushi", "Japanese", 15.99, "HIGH", 7, 5, 7)])  # predates the load
+
+    assert [(entry["meal"], entry["wins"]) for entry in board.top("wins")] == \
+        [("Burger", 9), ("Sushi", 6), ("Lasagna", 3)]
+
+
+def test_top_caches_one_page_per_sort(board):
+    """Test that shorter pages are sliced from the longest one rendered, so any number of limits costs one page."""
+    for limit in range(1, 50):
+        board.top("wins", limit)
+
+    assert list(board._pages) == ["wins"]
+    assert len(board._pages["wins"]) == 3
+    assert names(board.top("wins", limit=1)) == ["Burger"]
+
+
+def test_remove(board):
+    board.remove(1)
+    board.remove(99)
+    assert names(board.top("wins")) == ["Sushi", "Lasagna"]
+
+    board.update([(1, "Burger", "American", 9.99, "LOW", 11, 8, 11)])  # a battle committed before the delete
+    assert names(board.top("wins")) == ["Sushi", "Lasagna"]
+
+
+def test_stale_load_is_discarded(board):
+    token = board.begin_load()
+    board.update([(1, "Burger", "American", 9.99, "LOW", 11, 8, 11)])
+
+    assert not board.load(ROWS, token)
+    assert board.top("wins")[0]["wins"] == 8
+
+
+def test_invalidate_and_refresh_interval(board):
+    board.invalidate()
+    assert board.top("wins") is None
+
+    disabled = MaterializedLeaderboard(refresh_interval=0)
+    assert not disabled.enabled
+    disabled.load(ROWS, disabled.begin_load())
+    assert disabled.top("wins") is None
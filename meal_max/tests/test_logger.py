@@ -0,0 +1,125 @@
+import json
+import logging
+import queue
+
+import pytest
+from flask import Flask, g
+
+from meal_max.utils import logger as logger_module
+from meal_max.utils.logger import (
+    TEXT_FORMAT,
+    JsonFormatter,
+    NonBlockingQueueHandler,
+    RequestIdFilter,
+    SamplingFilter,
+    configure_logger,
+    init_request_ids,
+    level_for,
+    parse_levels
+)
+
+
+def make_record(level=logging.INFO, msg="Meal %s", args=("Burger",)):
+    return logging.LogRecord("meal_max.test", level, __file__, 1, msg, args, None)
+
+
+def test_configure_logger_is_idempotent():
+    """Test that configuring a logger twice does not duplicate its handler."""
+    test_logger = logging.getLogger("meal_max.test.idempotent")
+    configure_logger(test_logger)
+    configure_logger(test_logger)
+
+    assert len(test_logger.handlers) == 1
+    assert isinstance(test_logger.handlers[0], NonBlockingQueueHandler)
+
+def test_configure_logger_level(mocker):
+    """Test that per-module overrides take precedence over the default level."""
+    mocker.patch.object(logger_module, "_levels", parse_levels("meal_max.test.quiet=WARNING"))
+    mocker.patch.object(logger_module, "LOG_LEVEL", "DEBUG")
+    quiet, loud = logging.getLogger("meal_max.test.quiet.sub"), logging.getLogger("meal_max.test.loud")
+
+    configure_logger(quiet)
+    configure_logger(loud)
+
+    assert quiet.level == logging.WARNING
+    assert loud.level == logging.DEBUG
+
+def test_parse_levels():
+    levels = parse_levels(" meal_max.models=DEBUG, meal_max.models.kitchen_model=error ,")
+
+    assert levels == {"meal_max.models": logging.DEBUG, "meal_max.models.kitchen_model": logging.ERROR}
+    assert level_for("meal_max.models.kitchen_model", levels, logging.INFO) == logging.ERROR
+    assert level_for("meal_max.models.battle_model", levels, logging.INFO) == logging.DEBUG
+    assert level_for("meal_max.modelsx", levels, logging.INFO) == logging.INFO
+
+@pytest.mark.parametrize("spec", ["meal_max.models", "meal_max.models=LOUD"])
+def test_parse_levels_invalid(spec):
+    with pytest.raises(ValueError, match="Invalid log level override"):
+        parse_levels(spec)
+
+def test_queue_handler_drops_when_full():
+    """Test that a full queue drops records instead of blocking the caller."""
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+
+    handler.handle(make_record())
+    handler.handle(make_record())
+
+    assert handler.dropped == 1
+    record = handler.queue.get_nowait()
+    assert (record.msg, record.args) == ("Meal Burger", None)
+
+def test_sampling_filter_keeps_warnings(mocker):
+    """Test that sampling thins out INFO records but never drops warnings."""
+    mocker.patch("meal_max.utils.logger.random.random", return_value=0.5)
+
+    assert not SamplingFilter(0.1).filter(make_record(logging.INFO))
+    assert SamplingFilter(0.9).filter(make_record(logging.INFO))
+    assert SamplingFilter(0.0).filter(make_record(logging.WARNING))
+
+def test_json_formatter_includes_request_id():
+    """Test that JSON log lines carry the request ID set for the current request."""
+    app = Flask(__name__)
+    init_request_ids(app)
+    lines = []
+
+    @app.route("/ping")
+    def ping():
+        record = make_record()
+        RequestIdFilter().filter(record)
+        lines.append(json.loads(JsonFormatter().format(record)))
+        return "pong"
+
+    response = app.test_client().get("/ping", headers={"X-Request-ID": "abc123"})
+
+    assert response.headers["X-Request-ID"] == "abc123"
+    assert lines[0]["request_id"] == "abc123"
+    assert lines[0]["message"] == "Meal Burger"
+    assert lines[0]["level"] == "INFO"
+
+def test_request_id_generated():
+    app = Flask(__name__)
+    init_request_ids(app)
+    app.add_url_rule("/ping", "ping", lambda: "pong")
+
+    first = app.test_client().get("/ping").headers["X-Request-ID"]
+    second = app.test_client().get("/ping").headers["X-Request-ID"]
+
+    assert len(first) == 32 and first != second
+
+def test_record_outside_request_has_no_request_id():
+    record = make_record()
+    RequestIdFilter().filter(record)
+
+    assert record.request_id is None
+    assert json.loads(JsonFormatter().format(record))["request_id"] is None
+
+def test_text_format_includes_request_id():
+    """Test that text log lines carry the request ID, so they can be correlated like JSON ones."""
+    app = Flask(__name__)
+
+    with app.test_request_context("/ping"):
+        g.request_id = "abc123"
+        record = make_record()
+        RequestIdFilter().filter(record)
+
+    assert logging.Formatter(TEXT_FORMAT).format(record).endswith("INFO - [abc123] - Meal Burger")
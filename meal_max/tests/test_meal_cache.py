@@ -0,0 +1,77 @@
+import pytest
+
+from meal_max.models.kitchen_model import Meal
+from meal_max.models.meal_cache import MealCache
+
+
+def make_meal(meal_id: int, name: str = None) -> Meal:
+    return Meal(id=meal_id, meal=name or f"Meal {meal_id}", cuisine="Italian", price=10.0, difficulty="LOW")
+
+
+def test_get_by_id_and_name():
+    cache = MealCache(max_size=10, ttl=60)
+    meal = make_meal(1)
+    cache.put(meal, cache.begin_read())
+
+    assert cache.get(1) is meal
+    assert cache.get_by_name("Meal 1") is meal
+    assert cache.get(2) is None
+    assert cache.get_by_name("Meal 2") is None
+    assert cache.stats() == {"size": 1, "hits": 2, "misses": 2, "hit_rate": 0.5}
+
+
+def test_lru_eviction():
+    cache = MealCache(max_size=2, ttl=60)
+    cache.put(make_meal(1), cache.begin_read())
+    cache.put(make_meal(2), cache.begin_read())
+    cache.get(1)  # 2 is now least recently used
+    cache.put(make_meal(3), cache.begin_read())
+
+    assert cache.get(2) is None
+    assert cache.get_by_name("Meal 2") is None
+    assert cache.get(1) is not None
+    assert cache.get(3) is not None
+
+
+def test_invalidate_and_clear():
+    cache = MealCache(max_size=10, ttl=60)
+    cache.put(make_meal(1), cache.begin_read())
+    cache.put(make_meal(2), cache.begin_read())
+
+    cache.invalidate(1)
+    assert cache.get(1) is None
+    assert cache.get_by_name("Meal 1") is None
+    assert cache.get(2) is not None
+
+    cache.clear()
+    assert cache.stats()["size"] == 0
+
+
+def test_expired_entries_are_dropped(mocker):
+    clock = mocker.patch("meal_max.models.meal_cache.time.monotonic", return_value=100.0)
+    cache = MealCache(max_size=10, ttl=5)
+    cache.put(make_meal(1), cache.begin_read())
+
+    clock.return_value = 106.0
+    assert cache.get_by_name("Meal 1") is None
+    assert cache.stats()["size"] == 0
+
+
+@pytest.mark.parametrize("max_size", [0, -1])
+def test_disabled(max_size):
+    cache = MealCache(max_size=max_size, ttl=60)
+    cache.put(make_meal(1), cache.begin_read())
+    assert cache.get(1) is None
+
+
+def test_put_after_invalidation_is_skipped():
+    """Test that a meal read before a concurrent delete is not cached once the delete has invalidated it."""
+    cache = MealCache(max_size=10, ttl=60)
+    token = cache.begin_read()
+    cache.invalidate(1)  # the delete lands between the read and the put
+
+    cache.put(make_meal(1), token)
+
+    assert cache.get(1) is None
+    cache.put(make_meal(1), cache.begin_read())
+    assert cache.get(1) is not None
@@ -0,0 +1,57 @@
+import pytest
+
+from meal_max.clients import mongo_client
+from meal_max.clients.mongo_client import LazyCollection, PoolCheckoutListener, get_mongo_client
+
+
+@pytest.fixture
+def mock_mongo_client(mocker):
+    """Fixture to replace MongoClient and reset the cached client."""
+    mocker.patch.object(mongo_client, "_client", None)
+    mocker.patch.object(mongo_client, "_client_pid", None)
+    return mocker.patch("meal_max.clients.mongo_client.MongoClient")
+
+
+def test_client_created_lazily_once(mock_mongo_client):
+    """Test that the client is created on first use and then reused."""
+    mock_mongo_client.assert_not_called()
+
+    client = get_mongo_client()
+
+    assert get_mongo_client() is client
+    mock_mongo_client.assert_called_once()
+    kwargs = mock_mongo_client.call_args.kwargs
+    assert kwargs["maxPoolSize"] == mongo_client.MONGO_MAX_POOL_SIZE
+    assert kwargs["serverSelectionTimeoutMS"] == mongo_client.MONGO_SERVER_SELECTION_TIMEOUT_MS
+    assert kwargs["event_listeners"] == [mongo_client.pool_listener]
+
+def test_client_recreated_in_forked_child(mocker, mock_mongo_client):
+    """Test that a client inherited from a parent process is not reused."""
+    get_mongo_client()
+    mocker.patch("meal_max.clients.mongo_client.os.getpid", return_value=-1)
+
+    get_mongo_client()
+
+    assert mock_mongo_client.call_count == 2
+
+def test_lazy_collection_resolves_on_access(mock_mongo_client):
+    """Test that a LazyCollection only connects when used."""
+    collection = LazyCollection("sessions")
+    mock_mongo_client.assert_not_called()
+
+    collection.find_one({"user_id": 1})
+
+    mock_mongo_client.return_value.__getitem__.assert_called_once_with(mongo_client.MONGO_DB_NAME)
+    mock_mongo_client.return_value.__getitem__.return_value.__getitem__.assert_called_once_with("sessions")
+
+def test_pool_listener_stats(mocker):
+    """Test that checkouts and wait time are accounted."""
+    listener = PoolCheckoutListener()
+    listener.connection_checked_out(mocker.Mock(duration=0.002))
+    listener.connection_checked_out(mocker.Mock(duration=0.004))
+    listener.connection_checked_in(mocker.Mock())
+
+    stats = listener.stats()
+    assert stats["checkouts"] == 2
+    assert stats["checked_out"] == 1
+    assert stats["avg_checkout_wait_ms"] == pytest.approx(3.0)
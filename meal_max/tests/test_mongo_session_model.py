@@ -1,5 +1,6 @@
 import pytest
 
+from meal_max.models.kitchen_model import Meal
 from meal_max.models.mongo_session_model import login_user, logout_user
 
 @pytest.fixture
@@ -7,64 +8,148 @@ def sample_user_id():
     return 1  # Primary key for user
 
 
+@pytest.fixture
+def sample_meals():
+    return [
+        Meal(id=1, meal="Lasagna", cuisine="Italian", price=10.99, difficulty="HIGH"),
+        Meal(id=2, meal="Burger", cuisine="American", price=12.99, difficulty="LOW"),
+    ]
+
+
 @pytest.fixture
 def sample_combatants():
-    return [{"meal_id": 1}, {"meal_id": 2}]  # Sample combatant data
+    return [1, 2]  # Combatants as stored in a session: meal IDs
+
+
+@pytest.fixture
+def mock_get_meals_by_ids(mocker, sample_meals):
+    return mocker.patch(
+        "meal_max.models.combatant_codec.get_meals_by_ids",
+        return_value={meal.id: meal for meal in sample_meals}
+    )
 
 
 def test_login_user_creates_session_if_not_exists(mocker, sample_user_id):
     """Test login_user creates a session with no combatants if it does not exist."""
-    mock_find = mocker.patch("meal_max.clients.mongo_client.sessions_collection.find_one", return_value=None)
+    mock_find = mocker.patch("meal_max.clients.mongo_client.sessions_collection.find_one_and_update", return_value=None)
     mock_insert = mocker.patch("meal_max.clients.mongo_client.sessions_collection.insert_one")
     mock_battle_model = mocker.Mock()
 
     login_user(sample_user_id, mock_battle_model)
 
-    mock_find.assert_called_once_with({"user_id": sample_user_id})
-    mock_insert.assert_called_once_with({"user_id": sample_user_id, "combatants": []})
+    mock_find.assert_called_once_with({"user_id": sample_user_id}, {"$set": {"last_active": mocker.ANY}})
+    mock_insert.assert_called_once_with({"user_id": sample_user_id, "combatants": [], "last_active": mocker.ANY})
     mock_battle_model.clear_combatants.assert_not_called()
     mock_battle_model.prep_combatant.assert_not_called()
 
-def test_login_user_loads_combatants_if_session_exists(mocker, sample_user_id, sample_combatants):
+def test_login_user_loads_combatants_if_session_exists(mocker, sample_user_id, sample_combatants, sample_meals, mock_get_meals_by_ids):
     """Test login_user loads combatants if session exists."""
     mock_find = mocker.patch(
-        "meal_max.clients.mongo_client.sessions_collection.find_one",
+        "meal_max.clients.mongo_client.sessions_collection.find_one_and_update",
         return_value={"user_id": sample_user_id, "combatants": sample_combatants}
     )
     mock_battle_model = mocker.Mock()
 
     login_user(sample_user_id, mock_battle_model)
 
-    mock_find.assert_called_once_with({"user_id": sample_user_id})
+    mock_find.assert_called_once_with({"user_id": sample_user_id}, {"$set": {"last_active": mocker.ANY}})
+    mock_get_meals_by_ids.assert_called_once_with(sample_combatants)
     mock_battle_model.clear_combatants.assert_called_once()
-    mock_battle_model.prep_combatant.assert_has_calls([mocker.call(combatant) for combatant in sample_combatants])
+    mock_battle_model.prep_combatant.assert_has_calls([mocker.call(meal) for meal in sample_meals])
+
+def test_login_user_loads_legacy_combatants(mocker, sample_user_id, sample_meals, mock_get_meals_by_ids):
+    """Test login_user still loads sessions that stored combatants as dicts."""
+    mocker.patch(
+        "meal_max.clients.mongo_client.sessions_collection.find_one_and_update",
+        return_value={"user_id": sample_user_id, "combatants": [{"meal_id": 1}, {"id": 2, "meal": "Burger"}]}
+    )
+    mock_battle_model = mocker.Mock()
+
+    login_user(sample_user_id, mock_battle_model)
+
+    mock_get_meals_by_ids.assert_called_once_with([1, 2])
+    mock_battle_model.prep_combatant.assert_has_calls([mocker.call(meal) for meal in sample_meals])
+
+def test_login_user_skips_deleted_combatants(mocker, sample_user_id, sample_meals):
+    """Test login_user drops combatants whose meals no longer exist."""
+    mocker.patch(
+        "meal_max.clients.mongo_client.sessions_collection.find_one_and_update",
+        return_value={"user_id": sample_user_id, "combatants": [1, 2]}
+    )
+    mocker.patch("meal_max.models.combatant_codec.get_meals_by_ids", return_value={2: sample_meals[1]})
+    mock_battle_model = mocker.Mock()
+
+    login_user(sample_user_id, mock_battle_model)
+
+    mock_battle_model.prep_combatant.assert_called_once_with(sample_meals[1])
 
-def test_logout_user_updates_combatants(mocker, sample_user_id, sample_combatants):
-    """Test logout_user updates the combatants list in the session."""
+def test_logout_user_updates_combatants(mocker, sample_user_id, sample_combatants, sample_meals):
+    """Test logout_user updates the combatants list in the session, stored as meal IDs."""
     mock_update = mocker.patch("meal_max.clients.mongo_client.sessions_collection.update_one", return_value=mocker.Mock(matched_count=1))
     mock_battle_model = mocker.Mock()
-    mock_battle_model.get_combatants.return_value = sample_combatants
+    mock_battle_model.get_combatants.return_value = sample_meals
 
     logout_user(sample_user_id, mock_battle_model)
 
     mock_update.assert_called_once_with(
         {"user_id": sample_user_id},
-        {"$set": {"combatants": sample_combatants}},
+        {"$set": {"combatants": sample_combatants, "last_active": mocker.ANY}},
         upsert=False
     )
     mock_battle_model.clear_combatants.assert_called_once()
 
-def test_logout_user_raises_value_error_if_no_user(mocker, sample_user_id, sample_combatants):
+def test_logout_user_raises_value_error_if_no_user(mocker, sample_user_id, sample_combatants, sample_meals):
     """Test logout_user raises ValueError if no session document exists."""
     mock_update = mocker.patch("meal_max.clients.mongo_client.sessions_collection.update_one", return_value=mocker.Mock(matched_count=0))
     mock_battle_model = mocker.Mock()
-    mock_battle_model.get_combatants.return_value = sample_combatants
+    mock_battle_model.get_combatants.return_value = sample_meals
 
     with pytest.raises(ValueError, match=f"User with ID {sample_user_id} not found for logout."):
         logout_user(sample_user_id, mock_battle_model)
 
     mock_update.assert_called_once_with(
         {"user_id": sample_user_id},
-        {"$set": {"combatants": sample_combatants}},
+        {"$set": {"combatants": sample_combatants, "last_active": mocker.ANY}},
         upsert=False
-    )
\ No newline at end of file
+    )
+def test_logout_user_write_behind_queues_update(mocker, sample_user_id, sample_combatants, sample_meals):
+    """Test logout_user queues the update instead of writing when write-behind is enabled."""
+    mocker.patch("meal_max.models.session_write_behind.SESSION_WRITE_BEHIND", True)
+    mock_enqueue = mocker.patch("meal_max.models.mongo_session_model.session_writer.enqueue")
+    mock_update = mocker.patch("meal_max.clients.mongo_client.sessions_collection.update_one")
+    mock_battle_model = mocker.Mock()
+    mock_battle_model.get_combatants.return_value = sample_meals
+
+    logout_user(sample_user_id, mock_battle_model)
+
+    mock_enqueue.assert_called_once_with(sample_user_id, sample_combatants)
+    mock_update.assert_not_called()
+    mock_battle_model.clear_combatants.assert_called_once()
+
+def test_login_user_reads_queued_update(mocker, sample_user_id, sample_combatants, sample_meals, mock_get_meals_by_ids):
+    """Test login_user loads combatants still queued for write-behind without hitting MongoDB."""
+    mocker.patch(
+        "meal_max.models.mongo_session_model.session_writer.get_pending",
+        return_value=(True, sample_combatants)
+    )
+    mock_find = mocker.patch("meal_max.clients.mongo_client.sessions_collection.find_one_and_update")
+    mock_battle_model = mocker.Mock()
+
+    login_user(sample_user_id, mock_battle_model)
+
+    mock_find.assert_not_called()
+    mock_battle_model.prep_combatant.assert_has_calls([mocker.call(meal) for meal in sample_meals])
+
+
+def test_login_user_served_from_cache(mocker, sample_user_id, sample_combatants, sample_meals, mock_get_meals_by_ids):
+    """Test that, with the session cache enabled, a repeat login is served from it without hitting MongoDB."""
+    mocker.patch("meal_max.models.session_store.SESSION_CACHE_SIZE", 100)
+    mock_find = mocker.patch(
+        "meal_max.clients.mongo_client.sessions_collection.find_one_and_update",
+        return_value={"user_id": sample_user_id, "combatants": sample_combatants}
+    )
+
+    login_user(sample_user_id, mocker.Mock())
+    login_user(sample_user_id, mocker.Mock())
+
+    mock_find.assert_called_once_with({"user_id": sample_user_id}, {"$set": {"last_active": mocker.ANY}})
@@ -1,7 +1,20 @@
+import threading
+import time
+
 import pytest
 import requests
 
-from meal_max.utils.random_utils import get_random
+from meal_max.utils.random_utils import (
+    BufferedRandomSource,
+    LocalRandomSource,
+    RandomOrgSource,
+    create_random_source,
+    fetch_randoms,
+    get_random,
+    next_random,
+    next_randoms,
+    set_random_source
+)
 
 RANDOM_NUMBER = 0.42
 
@@ -44,4 +57,87 @@ def test_get_random_invalid_response(mock_random_org):
     mock_random_org.text = "invalid_response"
 
     with pytest.raises(ValueError, match="Invalid response from random.org: invalid_response"):
-        get_random()
\ No newline at end of file
+        get_random()
+
+def test_fetch_randoms(mock_random_org):
+    """Test fetching many numbers in one request."""
+    mock_random_org.text = "0.1\n0.25\n0.9\n"
+
+    assert fetch_randoms(3) == [0.1, 0.25, 0.9]
+    requests.get.assert_called_once_with("https://www.random.org/decimal-fractions/?num=3&dec=2&col=1&format=plain&rnd=new", timeout=5)
+
+def test_fetch_randoms_short_response(mock_random_org):
+    """Simulate a response with fewer numbers than requested."""
+    mock_random_org.text = "0.1\n0.25\n"
+
+    with pytest.raises(ValueError, match="expected 3 numbers, got 2"):
+        fetch_randoms(3)
+
+def test_local_source_deterministic():
+    """Test that a seeded source repeats its sequence."""
+    first = LocalRandomSource(seed=42).randoms(5)
+
+    assert LocalRandomSource(seed=42).randoms(5) == first
+    assert all(0 <= number < 1 for number in first)
+
+def test_buffered_source_serves_prefetched_numbers():
+    """Test that numbers come from the buffer once the prefetcher has filled it."""
+    fetch = lambda num: [0.5] * num
+    source = BufferedRandomSource(capacity=10, batch_size=4, low_watermark=5, fetch=fetch)
+    source.fill()
+    source.fill()
+
+    assert source.randoms(3) == [0.5, 0.5, 0.5]
+    assert source.stats()["served_buffered"] == 3
+    source.close()
+
+def test_buffered_source_falls_back_when_empty():
+    """Test that an empty buffer is backed by the local PRNG rather than a blocking request."""
+    fallback = LocalRandomSource(seed=1)
+    expected = LocalRandomSource(seed=1).randoms(2)
+    source = BufferedRandomSource(capacity=10, batch_size=4, low_watermark=5, fallback=fallback,
+                                  fetch=lambda num: (_ for _ in ()).throw(RuntimeError("down")))
+
+    assert source.randoms(2) == expected
+    assert source.stats()["served_fallback"] == 2
+    source.close()
+
+def test_buffered_source_prefetches_in_background():
+    """Test that draining the buffer below the low watermark triggers a background refill."""
+    fetched = threading.Event()
+
+    def fetch(num):
+        fetched.set()
+        return [0.25] * num
+
+    source = BufferedRandomSource(capacity=10, batch_size=10, low_watermark=5, fetch=fetch)
+    source.random()
+
+    assert fetched.wait(5), "The prefetcher should have fetched a batch"
+    for _ in range(50):
+        if source.stats()["buffered"] == 10:
+            break
+        time.sleep(0.01)
+    assert source.random() == 0.25
+    source.close()
+
+def test_buffered_source_fill_respects_capacity():
+    """Test that a full buffer is not refilled."""
+    fetch = lambda num: [0.5] * num
+    source = BufferedRandomSource(capacity=6, batch_size=4, low_watermark=2, fetch=fetch)
+
+    assert source.fill() == 4
+    assert source.fill() == 2
+    assert source.fill() == 0
+
+def test_create_random_source():
+    assert isinstance(create_random_source("deterministic"), LocalRandomSource)
+    assert isinstance(create_random_source("random_org"), RandomOrgSource)
+    with pytest.raises(ValueError, match="Invalid RNG mode: dice"):
+        create_random_source("dice")
+
+def test_next_random_uses_configured_source():
+    set_random_source(LocalRandomSource(seed=7))
+    expected = LocalRandomSource(seed=7).randoms(3)
+
+    assert [next_random()] + next_randoms(2) == expected
@@ -0,0 +1,65 @@
+import pytest
+
+from meal_max.utils import rate_limit
+from meal_max.utils.rate_limit import RedisSlidingWindowLimiter, SlidingWindowLimiter, create_limiter
+
+
+@pytest.fixture
+def clock(mocker):
+    """Fixture to control time.monotonic in the limiter."""
+    now = [1000.0]
+    mocker.patch("meal_max.utils.rate_limit.time.monotonic", side_effect=lambda: now[0])
+    return now
+
+
+def test_limiter_rejects_over_limit(clock):
+    """Test that hits beyond the limit inside the window are rejected."""
+    limiter = SlidingWindowLimiter(limit=2, window=60)
+
+    assert limiter.hit("alice") is True
+    assert limiter.hit("alice") is True
+    assert limiter.hit("alice") is False, "Third hit within the window should be rejected"
+    assert limiter.hit("bob") is True, "Other keys should not be affected"
+    assert limiter.stats() == {"allowed": 3, "rejected": 1, "tracked_keys": 2}
+
+def test_limiter_window_slides(clock):
+    """Test that hits become available again as old ones leave the window."""
+    limiter = SlidingWindowLimiter(limit=2, window=60)
+    limiter.hit("alice")
+    clock[0] += 30
+    limiter.hit("alice")
+
+    assert limiter.retry_after("alice") == pytest.approx(30)
+
+    clock[0] += 31
+    assert limiter.hit("alice") is True, "First hit has left the window"
+    assert limiter.hit("alice") is False
+
+def test_limiter_sweeps_idle_keys(clock):
+    """Test that idle keys are dropped so the table stays bounded."""
+    limiter = SlidingWindowLimiter(limit=2, window=60)
+    for i in range(10):
+        limiter.hit(f"ip{i}")
+
+    clock[0] += 61
+    limiter.hit("fresh")
+
+    assert limiter.stats()["tracked_keys"] == 1
+
+def test_redis_limiter(mocker):
+    """Test that the Redis limiter delegates the window check to its script."""
+    client = mocker.Mock()
+    client.register_script.return_value = mocker.Mock(side_effect=[1, 0])
+    limiter = RedisSlidingWindowLimiter(limit=1, window=60, name="login_user", client=client)
+
+    assert limiter.hit("alice") is True
+    assert limiter.hit("alice") is False
+    assert limiter.stats() == {"allowed": 1, "rejected": 1}
+    assert client.register_script.return_value.call_args.kwargs["keys"] == ["ratelimit:login_user:alice"]
+
+def test_create_limiter_invalid_backend(mocker):
+    """Test that an unknown backend is rejected."""
+    mocker.patch.object(rate_limit, "RATE_LIMIT_BACKEND", "memcached")
+
+    with pytest.raises(ValueError, match="Invalid RATE_LIMIT_BACKEND: memcached"):
+        create_limiter(5, 60, "login_user")
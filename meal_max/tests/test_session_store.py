@@ -0,0 +1,226 @@
+import pytest
+from pymongo.errors import OperationFailure
+
+from meal_max.models.session_store import (
+    CachedSessionStore,
+    InMemorySessionStore,
+    MongoSessionStore,
+    SessionStore,
+    SQLiteSessionStore,
+    create_session_store
+)
+
+
+@pytest.fixture(params=["memory", "sqlite", "cached"])
+def store(request, tmp_path):
+    """Fixture to run the same contract tests against each local backend."""
+    if request.param == "memory":
+        return InMemorySessionStore()
+    if request.param == "cached":
+        return CachedSessionStore(InMemorySessionStore())
+    return SQLiteSessionStore(str(tmp_path / "sessions.db"))
+
+@pytest.fixture
+def clock(mocker):
+    """Fixture to control time.time and time.monotonic in the session store."""
+    now = [1000.0]
+    mocker.patch("meal_max.models.session_store.time.time", side_effect=lambda: now[0])
+    mocker.patch("meal_max.models.session_store.time.monotonic", side_effect=lambda: now[0])
+    return now
+
+
+def test_session_store_is_abstract():
+    """Test that a store missing part of the interface cannot be created."""
+    class FindOnlyStore(SessionStore):
+        def find(self, user_id):
+            return None
+
+    with pytest.raises(TypeError):
+        FindOnlyStore()
+
+def test_find_missing_session(store):
+    """Test that an unknown user has no session."""
+    assert store.find(1) is None
+
+def test_create_and_find_session(store):
+    """Test that a created session starts with no combatants."""
+    store.create(1)
+    assert store.find(1) == {"user_id": 1, "combatants": []}
+
+def test_create_existing_session(store):
+    """Test that creating a session that already exists, e.g. from two racing first logins, keeps it."""
+    store.create(1)
+    store.save(1, [{"meal_id": 1}])
+
+    store.create(1)
+
+    assert store.find(1)["combatants"] == [{"meal_id": 1}]
+
+def test_save_session(store):
+    """Test saving combatants to an existing session."""
+    store.create(1)
+    assert store.save(1, [{"meal_id": 1}]) is True
+    assert store.find(1)["combatants"] == [{"meal_id": 1}]
+
+def test_save_without_session(store):
+    """Test that saving never creates a session."""
+    assert store.save(1, [{"meal_id": 1}]) is False
+    assert store.find(1) is None
+
+def test_save_many(store):
+    """Test saving many sessions in one batch, skipping users without a session."""
+    store.create(1)
+    store.create(2)
+
+    assert store.save_many({1: [{"meal_id": 1}], 2: [], 3: [{"meal_id": 3}]}) == 2
+    assert store.find(1)["combatants"] == [{"meal_id": 1}]
+    assert store.find(3) is None
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_sessions_expire(backend, clock, tmp_path):
+    """Test that sessions inactive for longer than the TTL are gone, and saving keeps them alive."""
+    if backend == "memory":
+        store = InMemorySessionStore(ttl_seconds=60)
+    else:
+        store = SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl_seconds=60)
+    store.create(1)
+    store.create(2)
+    clock[0] += 50
+    store.save(1, [1])
+    clock[0] += 20
+
+    assert store.find(1) == {"user_id": 1, "combatants": [1]}, "Saved session should still be active"
+    assert store.find(2) is None, "Idle session should have expired"
+    assert store.save(2, [1]) is False, "Expired session should not be revived by a save"
+    store.create(2)
+    assert store.find(2) == {"user_id": 2, "combatants": []}
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_find_keeps_session_alive(backend, clock, tmp_path):
+    """Test that reading a session, e.g. on login, counts as activity."""
+    if backend == "memory":
+        store = InMemorySessionStore(ttl_seconds=60)
+    else:
+        store = SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl_seconds=60)
+    store.create(1)
+    clock[0] += 50
+    store.find(1)
+    clock[0] += 50
+
+    assert store.find(1) == {"user_id": 1, "combatants": []}
+
+def test_mongo_store_find_marks_active(mocker):
+    """Test that the Mongo backend refreshes last_active in the same round trip as the read."""
+    mock_find = mocker.patch("meal_max.clients.mongo_client.sessions_collection.find_one_and_update",
+                             return_value=None)
+
+    assert MongoSessionStore().find(1) is None
+    mock_find.assert_called_once_with({"user_id": 1}, {"$set": {"last_active": mocker.ANY}})
+
+def test_cached_store_serves_repeat_finds(mocker, clock):
+    """Test that the cache serves repeat finds until its TTL, and counts hits."""
+    backing = mocker.Mock(wraps=InMemorySessionStore())
+    store = CachedSessionStore(backing, max_size=10, ttl=30)
+    backing.create(1)
+
+    store.find(1)
+    store.find(1)
+    assert backing.find.call_count == 1
+    assert store.stats()["hits"] == 1
+
+    clock[0] += 31
+    store.find(1)
+    assert backing.find.call_count == 2, "Expired cache entry should be re-read"
+
+def test_cached_store_is_bounded(mocker):
+    """Test that the least recently used entries are evicted."""
+    store = CachedSessionStore(InMemorySessionStore(), max_size=2)
+    for user_id in range(3):
+        store.create(user_id)
+        store.find(user_id)
+
+    assert store.stats()["size"] == 2
+
+def test_cached_store_save_many_invalidates(mocker):
+    """Test that batch saves drop cached entries so the next find sees the new data."""
+    backing = InMemorySessionStore()
+    store = CachedSessionStore(backing)
+    store.create(1)
+    store.find(1)
+
+    store.save_many({1: [5]})
+
+    assert store.find(1)["combatants"] == [5]
+
+def test_cached_store_find_during_save_many_is_not_cached(mocker):
+    """Test that a find racing a batch save cannot cache the pre-save document."""
+    backing = InMemorySessionStore()
+    store = CachedSessionStore(backing)
+    backing.create(1)
+    racing_reads = []
+
+    def save_many_with_racing_find(updates):
+        racing_reads.append(store.find(1))  # reads the old document while the write is in progress
+        return InMemorySessionStore.save_many(backing, updates)
+    mocker.patch.object(backing, "save_many", side_effect=save_many_with_racing_find)
+
+    store.save_many({1: [5]})
+
+    assert racing_reads == [{"user_id": 1, "combatants": []}]
+    assert store.find(1)["combatants"] == [5]
+
+def test_mongo_store_creates_ttl_index_once(mocker):
+    """Test that the TTL index on last_active is created on the first write only."""
+    mock_index = mocker.patch("meal_max.clients.mongo_client.sessions_collection.create_index")
+    mocker.patch("meal_max.clients.mongo_client.sessions_collection.insert_one")
+    store = MongoSessionStore(ttl_seconds=3600)
+
+    store.create(1)
+    store.create(2)
+
+    mock_index.assert_called_once_with("last_active", expireAfterSeconds=3600)
+
+def test_mongo_store_updates_conflicting_ttl_index(mocker):
+    """Test that an existing index with another TTL is updated with collMod, and not retried on every write."""
+    mock_index = mocker.patch("meal_max.clients.mongo_client.sessions_collection.create_index",
+                              side_effect=OperationFailure("IndexOptionsConflict", code=85))
+    mock_database = mocker.patch("meal_max.clients.mongo_client.sessions_collection.database")
+    mocker.patch("meal_max.clients.mongo_client.sessions_collection.insert_one")
+    store = MongoSessionStore(ttl_seconds=60)
+
+    store.create(1)
+    store.create(2)
+
+    mock_index.assert_called_once()
+    mock_database.command.assert_called_once_with(
+        "collMod", "sessions", index={"keyPattern": {"last_active": 1}, "expireAfterSeconds": 60}
+    )
+
+def test_mongo_store_ttl_index_failure_not_retried(mocker):
+    """Test that a failed index creation is logged once rather than on every write."""
+    mock_index = mocker.patch("meal_max.clients.mongo_client.sessions_collection.create_index",
+                              side_effect=OperationFailure("not authorized", code=13))
+    mocker.patch("meal_max.clients.mongo_client.sessions_collection.insert_one")
+    store = MongoSessionStore()
+
+    store.create(1)
+    store.create(2)
+
+    mock_index.assert_called_once()
+
+def test_mongo_store_save(mocker):
+    """Test that the Mongo backend saves with update_one and no upsert."""
+    mock_update = mocker.patch(
+        "meal_max.clients.mongo_client.sessions_collection.update_one",
+        return_value=mocker.Mock(matched_count=0)
+    )
+
+    assert MongoSessionStore().save(1, []) is False
+    mock_update.assert_called_once_with(
+        {"user_id": 1}, {"$set": {"combatants": [], "last_active": mocker.ANY}}, upsert=False
+    )
+
+def test_create_session_store_invalid_backend():
+    """Test that an unknown backend is rejected."""
+    with pytest.raises(ValueError, match="Invalid session store backend: redis"):
+        create_session_store("redis")
@@ -0,0 +1,98 @@
+import time
+
+import pytest
+
+from meal_max.models.session_write_behind import SessionWriteBehind
+
+
+@pytest.fixture
+def writer():
+    """Fixture to provide a writer whose background thread never fires on its own."""
+    writer = SessionWriteBehind(flush_interval=3600, batch_size=100)
+    yield writer
+    # Drop leftovers so the stopping thread cannot flush them into a later test's mocks
+    writer._pending.clear()
+    writer._stopped = True
+    writer._wakeup.set()
+    if writer._thread is not None:
+        writer._thread.join(timeout=5)
+
+@pytest.fixture
+def mock_bulk_write(mocker):
+    return mocker.patch(
+        "meal_max.clients.mongo_client.sessions_collection.bulk_write",
+        side_effect=lambda operations, ordered: mocker.Mock(matched_count=len(operations))
+    )
+
+
+def test_enqueue_coalesces_per_user(writer, mock_bulk_write):
+    """Test that only the latest update per user is written."""
+    writer.enqueue(1, [{"meal_id": 1}])
+    writer.enqueue(1, [{"meal_id": 2}])
+    writer.enqueue(2, [])
+
+    assert writer.flush() == 2
+
+    operations = mock_bulk_write.call_args.args[0]
+    assert [op._filter for op in operations] == [{"user_id": 1}, {"user_id": 2}]
+    assert operations[0]._doc["$set"]["combatants"] == [{"meal_id": 2}]
+
+def test_enqueue_copies_combatants(writer):
+    """Test that clearing the caller's list after enqueue does not lose the update."""
+    combatants = [{"meal_id": 1}]
+    writer.enqueue(1, combatants)
+    combatants.clear()
+
+    assert writer.get_pending(1) == (True, [{"meal_id": 1}])
+    assert writer.get_pending(2) == (False, None)
+
+def test_flush_failure_requeues(writer, mocker):
+    """Test that a failed bulk_write keeps the updates, without overwriting newer ones."""
+    def fail_and_race(operations, ordered):
+        writer.enqueue(1, ["newer"])
+        raise RuntimeError("mongo down")
+    mocker.patch("meal_max.clients.mongo_client.sessions_collection.bulk_write", side_effect=fail_and_race)
+    writer.enqueue(1, ["older"])
+    writer.enqueue(2, ["other"])
+
+    assert writer.flush() == 0
+
+    assert writer.get_pending(1) == (True, ["newer"])
+    assert writer.get_pending(2) == (True, ["other"])
+
+def test_pending_visible_during_flush(writer, mocker):
+    """Test that a read while the batch is being written still sees it, and stops once it is written."""
+    seen = []
+    def record_pending(operations, ordered):
+        seen.append(writer.get_pending(1))
+        return mocker.Mock(matched_count=len(operations))
+    mocker.patch("meal_max.clients.mongo_client.sessions_collection.bulk_write", side_effect=record_pending)
+    writer.enqueue(1, ["flushing"])
+
+    assert writer.flush() == 1
+
+    assert seen == [(True, ["flushing"])]
+    assert writer.get_pending(1) == (False, None)
+
+def test_close_flushes_pending(writer, mock_bulk_write):
+    """Test that closing the writer durably flushes queued updates."""
+    writer.enqueue(1, [])
+
+    writer.close()
+
+    mock_bulk_write.assert_called_once()
+    assert writer.get_pending(1) == (False, None)
+
+def test_batch_size_triggers_flush(mocker, mock_bulk_write):
+    """Test that reaching the batch size wakes the background flusher."""
+    writer = SessionWriteBehind(flush_interval=3600, batch_size=2)
+    writer.enqueue(1, [])
+    writer.enqueue(2, [])
+
+    deadline = time.monotonic() + 5
+    while not mock_bulk_write.called and time.monotonic() < deadline:
+        time.sleep(0.01)
+    writer._stopped = True
+    writer._wakeup.set()
+
+    mock_bulk_write.assert_called_once()
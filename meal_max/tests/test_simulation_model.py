@@ -0,0 +1,98 @@
+import pytest
+
+from meal_max.models import simulation_model
+from meal_max.models.battle_model import BattleModel
+from meal_max.models.kitchen_model import Meal
+from meal_max.models.simulation_model import battle_scores, simulate_win_probabilities
+
+
+MEALS = {
+    1: Meal(id=1, meal="Meal 1", cuisine="Italian", price=7.0, difficulty="LOW"),    # score 46
+    2: Meal(id=2, meal="Meal 2", cuisine="Mexican", price=5.5, difficulty="HIGH"),   # score 37.5
+    3: Meal(id=3, meal="Meal 3", cuisine="Thai", price=3.0, difficulty="LOW"),       # score 9
+}
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, mocker):
+    """Run each test with NumPy (when installed) and with the pure-Python fallback."""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        mocker.patch.object(simulation_model, "_numpy", return_value=None)
+    return request.param
+
+@pytest.fixture
+def mock_meals(mocker):
+    return mocker.patch("meal_max.models.simulation_model.get_meals_by_ids",
+                        side_effect=lambda meal_ids: {meal_id: MEALS[meal_id] for meal_id in meal_ids if meal_id in MEALS})
+
+
+def test_battle_scores(backend):
+    """Test that batch scoring matches BattleModel.get_battle_score."""
+    expected = [BattleModel().get_battle_score(meal) for meal in MEALS.values()]
+
+    assert list(battle_scores(list(MEALS.values()))) == expected
+
+def test_simulate_win_probabilities(backend, mock_meals):
+    """Test that estimates are close to the exact probabilities and symmetric in seating."""
+    result = simulate_win_probabilities([1, 2, 3], simulations=20000, seed=1)
+    matrix = result["win_probability"]
+
+    assert result["meal_ids"] == [1, 2, 3]
+    assert [matrix[i][i] for i in range(3)] == [None, None, None]
+    # The first combatant wins with probability |score difference| / 100
+    assert matrix[0][1] == pytest.approx(0.085, abs=0.01)
+    assert matrix[0][2] == pytest.approx(0.37, abs=0.01)
+    assert matrix[1][2] == pytest.approx(0.285, abs=0.01)
+    assert matrix[1][0] == matrix[0][1]
+
+def test_simulate_is_reproducible(backend, mock_meals):
+    first = simulate_win_probabilities([1, 2, 3], simulations=500, seed=7)
+
+    assert simulate_win_probabilities([1, 2, 3], simulations=500, seed=7) == first
+
+def test_simulate_in_chunks(mocker, mock_meals):
+    """Test that a small chunk size gives the same answer as one big draw."""
+    pytest.importorskip("numpy")
+    whole = simulate_win_probabilities([1, 2, 3], simulations=1000, seed=3)
+
+    mocker.patch.object(simulation_model, "SIMULATION_CHUNK_SIZE", 30)
+    chunked = simulate_win_probabilities([1, 2, 3], simulations=1000, seed=3)
+
+    assert chunked["win_probability"][0][2] == pytest.approx(whole["win_probability"][0][2], abs=0.06)
+
+def test_simulate_does_not_record(mocker, mock_meals):
+    mock_record = mocker.patch("meal_max.models.kitchen_model.record_battle_result")
+
+    simulate_win_probabilities([1, 2], simulations=10, seed=0)
+
+    mock_record.assert_not_called()
+
+@pytest.mark.parametrize("meal_ids, simulations, message", [
+    ([1], 10, "A simulation needs between 2 and"),
+    ([1, 1], 10, "A simulation needs between 2 and"),
+    ([1, 99], 10, "Meal with ID 99 not found or has been deleted"),
+    ([1, 2], 0, "Invalid simulations: 0"),
+    ([1, 2], True, "Invalid simulations: True"),
+    ([1, 2], 10.0, "Invalid simulations: 10.0"),
+])
+def test_simulate_invalid(mock_meals, meal_ids, simulations, message):
+    with pytest.raises(ValueError, match=message):
+        simulate_win_probabilities(meal_ids, simulations=simulations)
+
+@pytest.mark.parametrize("seed", ["abc", -1, 1.5, True])
+def test_simulate_invalid_seed(mock_meals, seed):
+    """Test that a seed NumPy or random would reject, or silently accept as another type, is a ValueError."""
+    with pytest.raises(ValueError, match="Invalid seed"):
+        simulate_win_probabilities([1, 2], simulations=10, seed=seed)
+
+def test_simulate_python_fallback_is_capped(mocker, mock_meals):
+    """Test that without NumPy a simulation too big to run in a request is rejected up front."""
+    mocker.patch.object(simulation_model, "_numpy", return_value=None)
+    mocker.patch.object(simulation_model, "SIMULATION_PYTHON_MAX_BATTLES", 2000)
+
+    simulate_win_probabilities([1, 2, 3], simulations=600, seed=0)  # 1800 battles
+    with pytest.raises(ValueError, match="Simulation too large: 3000 battles"):
+        simulate_win_probabilities([1, 2, 3], simulations=1000, seed=0)
+    mock_meals.assert_called_once()
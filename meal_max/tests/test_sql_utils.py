@@ -0,0 +1,85 @@
+import sqlite3
+import threading
+
+import pytest
+
+from meal_max.utils import sql_utils
+from meal_max.utils.sql_utils import close_db_connection, get_db_connection
+
+
+@pytest.fixture
+def db_path(mocker, tmp_path):
+    """Fixture to point the pool at a scratch database."""
+    path = str(tmp_path / "meal_max.db")
+    mocker.patch.object(sql_utils, "DB_PATH", path)
+    with get_db_connection() as conn:
+        conn.execute("CREATE TABLE meals (id INTEGER PRIMARY KEY, meal TEXT)")
+        conn.commit()
+    yield path
+    close_db_connection()
+
+
+def test_connection_reused_within_thread(db_path):
+    """Test that a thread gets the same connection every time."""
+    with get_db_connection() as first:
+        pass
+    with get_db_connection() as second:
+        pass
+
+    assert first is second, "Connection should be reused within a thread"
+
+def test_connection_per_thread(db_path):
+    """Test that each thread gets its own connection."""
+    connections = []
+
+    def worker():
+        with get_db_connection() as conn:
+            connections.append(conn)
+        close_db_connection()
+
+    with get_db_connection() as main_conn:
+        pass
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+
+    assert connections[0] is not main_conn
+
+def test_pragmas_applied(db_path):
+    """Test that the tuning pragmas are applied to pooled connections."""
+    with get_db_connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == sql_utils.SQLITE_BUSY_TIMEOUT_MS
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == sql_utils.SQLITE_CACHE_SIZE
+
+def test_uncommitted_work_rolled_back(db_path):
+    """Test that an error inside the block leaves no open transaction behind."""
+    with pytest.raises(ValueError):
+        with get_db_connection() as conn:
+            conn.execute("INSERT INTO meals (meal) VALUES ('Lasagna')")
+            raise ValueError("boom")
+
+    with get_db_connection() as conn:
+        assert not conn.in_transaction
+        assert conn.execute("SELECT COUNT(*) FROM meals").fetchone()[0] == 0
+
+def test_new_connection_after_db_path_change(db_path, mocker, tmp_path):
+    """Test that changing DB_PATH opens a new connection."""
+    with get_db_connection() as first:
+        pass
+    mocker.patch.object(sql_utils, "DB_PATH", str(tmp_path / "other.db"))
+
+    with get_db_connection() as second:
+        pass
+
+    assert first is not second
+
+def test_connection_error_logged_and_raised(mocker):
+    """Test that a failure to open the database is raised as sqlite3.Error."""
+    mocker.patch.object(sql_utils, "DB_PATH", "/nonexistent/dir/meal_max.db")
+    close_db_connection()
+
+    with pytest.raises(sqlite3.Error):
+        with get_db_connection():
+            pass
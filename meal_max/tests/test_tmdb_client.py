@@ -0,0 +1,37 @@
+import pytest
+
+from meal_max.clients import tmdb_client
+from meal_max.clients.tmdb_client import close_tmdb_session, get_tmdb_session, tmdb_get
+
+
+@pytest.fixture(autouse=True)
+def fresh_session():
+    close_tmdb_session()
+    yield
+    close_tmdb_session()
+
+
+def test_session_created_once():
+    """Test that the session is created on first use and then reused."""
+    assert tmdb_client._session is None
+
+    session = get_tmdb_session()
+
+    assert get_tmdb_session() is session
+    assert session.headers["accept"] == "application/json"
+
+def test_session_not_reused_after_fork(mocker):
+    """Test that a forked worker does not share the parent's connections."""
+    session = get_tmdb_session()
+    mocker.patch("meal_max.clients.tmdb_client.os.getpid", return_value=-1)
+
+    assert get_tmdb_session() is not session
+
+def test_tmdb_get(mocker):
+    """Test that requests carry the token and a timeout."""
+    mock_get = mocker.patch.object(get_tmdb_session(), "get")
+
+    tmdb_get("/movie/550", "token", {"language": "en-US"})
+
+    mock_get.assert_called_once_with(f"{tmdb_client.TMDB_BASE_URL}/movie/550", params={"language": "en-US"},
+                                     timeout=tmdb_client.TMDB_TIMEOUT, headers={"Authorization": "Bearer token"})
@@ -0,0 +1,55 @@
+import pytest
+
+from meal_max.utils import token_utils
+from meal_max.utils.token_utils import issue_token, revoke_token, verify_token
+
+
+def test_issue_and_verify_token():
+    """Test that a freshly issued token identifies its user."""
+    token = issue_token(42)
+    assert verify_token(token) == 42, "Token should embed the user ID"
+
+def test_verify_token_tampered():
+    """Test that a token with a modified payload is rejected."""
+    payload, signature = issue_token(42).split(".")
+    forged = token_utils._b64encode(b'{"uid":1,"exp":9999999999,"jti":"x"}')
+
+    with pytest.raises(ValueError, match="Invalid session token signature"):
+        verify_token(f"{forged}.{signature}")
+
+def test_verify_token_malformed():
+    """Test that garbage is rejected."""
+    with pytest.raises(ValueError, match="Malformed session token"):
+        verify_token("not-a-token")
+
+def test_verify_token_non_ascii():
+    """Test that a non-ASCII token is rejected as invalid rather than crashing the comparison."""
+    with pytest.raises(ValueError, match="Invalid session token signature"):
+        verify_token("é.é")
+
+def test_verify_token_expired():
+    """Test that an expired token is rejected."""
+    token = issue_token(42, ttl=-1)
+
+    with pytest.raises(ValueError, match="Session token has expired"):
+        verify_token(token)
+
+def test_revoke_token():
+    """Test that a revoked token is rejected while other tokens still work."""
+    token = issue_token(42)
+    other = issue_token(42)
+    revoke_token(token)
+
+    with pytest.raises(ValueError, match="Session token has been revoked"):
+        verify_token(token)
+    assert verify_token(other) == 42
+
+def test_revocation_cache_is_bounded(mocker):
+    """Test that the revocation cache never grows past its limit."""
+    mocker.patch.object(token_utils, "REVOCATION_CACHE_SIZE", 3)
+    mocker.patch.object(token_utils, "_revoked", {})
+
+    for _ in range(5):
+        revoke_token(issue_token(42))
+
+    assert len(token_utils._revoked) == 3
@@ -0,0 +1,88 @@
+import pytest
+
+from meal_max.models.kitchen_model import Meal
+from meal_max.models.tournament_model import run_tournament
+
+
+@pytest.fixture
+def meals():
+    """Four meals with scores 46, 37.5, 9 and 24."""
+    return {
+        1: Meal(id=1, meal="Meal 1", cuisine="Italian", price=7.0, difficulty="LOW"),     # 7 * 7 - 3 = 46
+        2: Meal(id=2, meal="Meal 2", cuisine="Mexican", price=5.5, difficulty="HIGH"),    # 5.5 * 7 - 1 = 37.5
+        3: Meal(id=3, meal="Meal 3", cuisine="Thai", price=3.0, difficulty="LOW"),        # 3 * 4 - 3 = 9
+        4: Meal(id=4, meal="Meal 4", cuisine="French", price=4.5, difficulty="LOW"),      # 4.5 * 6 - 3 = 24
+    }
+
+@pytest.fixture
+def mock_meals(mocker, meals):
+    return mocker.patch("meal_max.models.tournament_model.get_meals_by_ids",
+                        side_effect=lambda meal_ids: {meal_id: meals[meal_id] for meal_id in meal_ids if meal_id in meals})
+
+@pytest.fixture
+def mock_record(mocker):
+    return mocker.patch("meal_max.models.tournament_model.record_tournament_results")
+
+@pytest.fixture
+def mock_randoms(mocker):
+    return mocker.patch("meal_max.models.tournament_model.next_randoms")
+
+
+def test_single_elimination(mock_meals, mock_record, mock_randoms):
+    """Test a four-meal bracket with every random number drawn in one batch."""
+    # Round 1: 1 v 2 (delta 0.085 > 0.05, so 1 wins), 3 v 4 (delta 0.15 < 0.5, so 4 wins)
+    # Final: 1 v 4 (delta 0.22 > 0.0, so 1 wins)
+    mock_randoms.return_value = [0.05, 0.5, 0.0]
+
+    result = run_tournament([1, 2, 3, 4])
+
+    mock_meals.assert_called_once_with([1, 2, 3, 4])
+    mock_randoms.assert_called_once_with(3)
+    assert result["champion"] == {"id": 1, "meal": "Meal 1"}
+    assert result["battles"] == 3
+    assert result["rounds"] == [[(1, 2), (4, 3)], [(1, 4)]]
+    assert [meal["id"] for meal in result["standings"]] == [1, 4, 2, 3]
+    mock_record.assert_called_once_with({1: (2, 2), 2: (1, 0), 3: (1, 0), 4: (2, 1)})
+
+def test_single_elimination_bye(mock_meals, mock_record, mock_randoms):
+    """Test that the odd meal out advances without a battle."""
+    mock_randoms.return_value = [0.9, 0.9]
+
+    result = run_tournament([1, 2, 3])
+
+    # 2 beats 1, 3 has a bye, then 3 beats 2
+    assert result["rounds"] == [[(2, 1)], [(3, 2)]]
+    assert result["champion"]["id"] == 3
+    mock_record.assert_called_once_with({1: (1, 0), 2: (2, 1), 3: (1, 1)})
+
+def test_round_robin(mock_meals, mock_record, mock_randoms):
+    """Test that every meal battles every other meal once."""
+    mock_randoms.return_value = [0.0] * 6  # the first meal of each pairing always wins
+
+    result = run_tournament([1, 2, 3, 4], fmt="round_robin")
+
+    mock_randoms.assert_called_once_with(6)
+    assert result["battles"] == 6
+    assert "rounds" not in result
+    assert result["champion"]["id"] == 1
+    assert [(meal["id"], meal["wins"]) for meal in result["standings"]] == [(1, 3), (2, 2), (3, 1), (4, 0)]
+    mock_record.assert_called_once_with({1: (3, 3), 2: (3, 2), 3: (3, 1), 4: (3, 0)})
+
+def test_tournament_without_recording(mock_meals, mock_record, mock_randoms):
+    mock_randoms.return_value = [0.5]
+
+    run_tournament([1, 2], record=False)
+
+    mock_record.assert_not_called()
+
+@pytest.mark.parametrize("meal_ids, fmt, message", [
+    ([1], "single_elimination", "A tournament needs between 2 and"),
+    ([1, 1], "single_elimination", "A meal cannot enter a tournament twice."),
+    ([1, 2], "swiss", "Invalid tournament format: swiss"),
+    ([1, 99], "round_robin", "Meal with ID 99 not found or has been deleted"),
+])
+def test_tournament_invalid(mock_meals, mock_record, mock_randoms, meal_ids, fmt, message):
+    with pytest.raises(ValueError, match=message):
+        run_tournament(meal_ids, fmt=fmt)
+
+    mock_record.assert_not_called()
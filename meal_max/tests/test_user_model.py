@@ -1,6 +1,10 @@
+import hashlib
+
 import pytest
+from sqlalchemy import text
 
 from meal_max.models.user_model import Users
+from meal_max.utils.hash_utils import current_params
 
 
 @pytest.fixture
@@ -107,4 +111,120 @@ def test_get_id_by_username_user_not_found(session):
     Test failure when retrieving a non-existent user's ID by their username.
     """
     with pytest.raises(ValueError, match="User nonexistentuser not found"):
-        Users.get_id_by_username("nonexistentuser")
\ No newline at end of file
+        Users.get_id_by_username("nonexistentuser")
+
+##########################################################
+# Password Hashing
+##########################################################
+
+def test_create_user_stores_kdf_params(session, sample_user):
+    """Test that new users are hashed with the current KDF parameters."""
+    Users.create_user(**sample_user)
+    user = session.query(Users).filter_by(username=sample_user["username"]).first()
+    assert user.kdf_params == current_params(), "KDF parameters should be stored alongside the salt."
+
+def test_check_password_rehashes_legacy_hash(session, sample_user):
+    """Test that a legacy SHA-256 hash is upgraded on successful login."""
+    salt = "00" * 16
+    legacy_hash = hashlib.sha256((sample_user["password"] + salt).encode()).hexdigest()
+    session.add(Users(username=sample_user["username"], salt=salt, password=legacy_hash))
+    session.commit()
+
+    assert Users.check_password(sample_user["username"], sample_user["password"]) is True
+
+    user = session.query(Users).filter_by(username=sample_user["username"]).first()
+    assert user.kdf_params == current_params(), "Legacy hash should be upgraded to the current KDF."
+    assert user.password != legacy_hash, "Stored hash should be replaced."
+    assert Users.check_password(sample_user["username"], sample_user["password"]) is True
+
+def test_check_password_incorrect_does_not_rehash(session, sample_user):
+    """Test that a failed login leaves a legacy hash untouched."""
+    salt = "00" * 16
+    legacy_hash = hashlib.sha256((sample_user["password"] + salt).encode()).hexdigest()
+    session.add(Users(username=sample_user["username"], salt=salt, password=legacy_hash))
+    session.commit()
+
+    assert Users.check_password(sample_user["username"], "wrongpassword") is False
+
+    user = session.query(Users).filter_by(username=sample_user["username"]).first()
+    assert user.kdf_params is None and user.password == legacy_hash
+
+def test_ensure_kdf_params_column_upgrades_legacy_table(session, sample_user):
+    """Test that a users table from before kdf_params gains the column and its users can log in."""
+    salt = "00" * 16
+    legacy_hash = hashlib.sha256((sample_user["password"] + salt).encode()).hexdigest()
+    session.execute(text("DROP TABLE users"))
+    session.execute(text(
+        "CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR(80) UNIQUE NOT NULL, "
+        "salt VARCHAR(32) NOT NULL, password VARCHAR(64) NOT NULL)"
+    ))
+    session.execute(text("INSERT INTO users (username, salt, password) VALUES (:username, :salt, :password)"),
+                    {"username": sample_user["username"], "salt": salt, "password": legacy_hash})
+    session.commit()
+
+    assert Users.ensure_kdf_params_column() is True
+    assert Users.ensure_kdf_params_column() is False, "The column should only be added once."
+
+    assert Users.check_password(sample_user["username"], sample_user["password"]) is True
+    user = session.query(Users).filter_by(username=sample_user["username"]).first()
+    assert user.kdf_params == current_params()
+
+##########################################################
+# Bulk Creation
+##########################################################
+
+def test_bulk_create_users(session):
+    """Test creating many users across several batches."""
+    rows = [{"username": f"user{i}", "password": f"password{i}"} for i in range(5)]
+
+    summary = Users.bulk_create_users(iter(rows), batch_size=2)
+
+    assert summary == {"created": 5, "duplicates": [], "invalid": []}
+    assert session.query(Users).count() == 5
+    assert Users.check_password("user3", "password3") is True
+
+def test_bulk_create_users_reports_duplicates(session, sample_user):
+    """Test that duplicates in the database and within the file are reported, not fatal."""
+    Users.create_user(**sample_user)
+    rows = [
+        sample_user,
+        {"username": "newuser", "password": "pw"},
+        {"username": "newuser", "password": "other"},
+        {"username": "", "password": "pw"},
+    ]
+
+    summary = Users.bulk_create_users(rows)
+
+    assert summary["created"] == 1
+    assert sorted(summary["duplicates"]) == ["newuser", "testuser"]
+    assert summary["invalid"] == [{"row": 4, "error": "both username and password are required"}]
+    assert session.query(Users).count() == 2
+
+def test_bulk_create_users_reports_malformed_rows(session):
+    """Test that rows of the wrong type are reported as invalid instead of failing the import."""
+    rows = [
+        {"username": "gooduser", "password": "pw"},
+        {"username": "b", "password": 123},
+        "junk",
+    ]
+
+    summary = Users.bulk_create_users(rows)
+
+    assert summary["created"] == 1
+    assert summary["invalid"] == [
+        {"row": 2, "error": "username and password must be strings"},
+        {"row": 3, "error": "each row must be an object with username and password"},
+    ]
+
+def test_check_password_rehash_skipped_when_pool_saturated(session, sample_user, mocker):
+    """Test that a verified login still succeeds when there is no pool slot left to upgrade the hash."""
+    salt = "00" * 16
+    legacy_hash = hashlib.sha256((sample_user["password"] + salt).encode()).hexdigest()
+    session.add(Users(username=sample_user["username"], salt=salt, password=legacy_hash))
+    session.commit()
+    mocker.patch.object(Users, "_generate_hashed_password", side_effect=RuntimeError("Password hashing pool is saturated."))
+
+    assert Users.check_password(sample_user["username"], sample_user["password"]) is True
+
+    user = session.query(Users).filter_by(username=sample_user["username"]).first()
+    assert user.kdf_params is None and user.password == legacy_hash